@@ -5,6 +5,8 @@ Performs: review summarization, skill trend analysis, insight generation.
 
 from datetime import datetime, timezone
 from llm.client import llm
+from llm.scheduler import PRIORITY_BACKGROUND
+from agents.schemas import BackgroundInsights
 from db.mongo import get_db
 from profile.service import get_profile, update_profile
 from prompts.loader import load_prompt
@@ -54,7 +56,7 @@ Total Submissions: {profile.get('submissions_count', 0)}
 Generate the learning insights JSON."""
 
     try:
-        insights = await llm.complete_json(prompt, system=system, temperature=0.3)
+        insights = await llm.complete_json(prompt, system=system, temperature=0.3, priority=PRIORITY_BACKGROUND, agent="background", schema=BackgroundInsights)
     except Exception as e:
         print(f"[Background Agent] LLM call failed for user {user_id}: {e}")
         return
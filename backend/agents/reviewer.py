@@ -10,21 +10,32 @@ Extracts rich learning signals from a code submission:
 """
 
 import logging
+from typing import Any, AsyncIterator
+from config import get_settings
 from llm.client import llm
+from agents.schemas import ReviewOutput
+from prompts.builder import PromptBuilder, clip_code, clip_text, estimate_tokens, join_recent
 from prompts.loader import load_prompt
+from prompts.prefix import memoized_prefix
 
 logger = logging.getLogger(__name__)
 
 
-def _build_reviewer_context(problem: dict, user_code: str, profile: dict, language: str) -> str:
+def _build_reviewer_prefix(problem: dict, profile: dict, budget: int) -> str:
     """
     Build the richest possible personalisation context for the reviewer.
     Every field from the dynamic profile that helps the LLM tailor its analysis
     and feedback is included here so the prompt template never needs to change.
+
+    Only depends on the problem and the profile, so the result is memoized
+    and sent as the provider-cacheable prompt prefix. Long profile lists and
+    onboarding context are trimmed or dropped first when space runs out.
     """
+    max_items = get_settings().prompt_max_list_items
+
     skills = profile.get("skills", {})
-    # Top 8 skills by score — most signal-rich
-    top_skills = sorted(skills.items(), key=lambda x: x[1], reverse=True)[:8]
+    # Top 8 skills by score — most signal-rich (ties by name, so the text is stable)
+    top_skills = sorted(skills.items(), key=lambda x: (-x[1], x[0]))[:8]
     top_skills_str = ", ".join(f"{k}: {v:.2f}" for k, v in top_skills) or "None yet"
 
     # Infer learning velocity from submissions count (simple heuristic)
@@ -36,37 +47,100 @@ def _build_reviewer_context(problem: dict, user_code: str, profile: dict, langua
     else:
         velocity = "fast (experienced user)"
 
-    return f"""## PERSONALISATION PROFILE
+    def history_block(limit: int) -> str:
+        return f"""Known Strengths:     {join_recent(profile.get('strengths', []), limit) or 'None identified yet'}
+Known Gaps:          {join_recent(profile.get('gaps', []), limit) or 'None identified yet'}
+Recurring Mistakes:  {join_recent(profile.get('mistake_patterns', []), limit) or 'None identified yet'}
+Recent Weaknesses:   {join_recent(profile.get('recent_weaknesses', []), limit) or 'None identified yet'}
+Known Concepts:      {join_recent(profile.get('known_concepts', []), limit) or 'Not specified'}
+Top Skill Scores:    {top_skills_str}"""
+
+    def problem_block(description: str) -> str:
+        return f"""## PROBLEM
+Title:       {problem.get('title', 'Unknown')}
+Description: {description}
+Difficulty:  {problem.get('difficulty', 'unknown')}
+Concepts:    {', '.join(problem.get('concept_ids', []))}
+Constraints: {'; '.join(problem.get('constraints', [])) or 'None listed'}"""
+
+    description = problem.get('description', '')
+    onboarding = f"Onboarding Context:  {profile.get('onboarding_summary', 'Not available')}"
+    short_history = history_block(5)
+
+    pb = PromptBuilder(budget)
+    pb.add(problem_block(description), priority=1,
+           shrink=lambda n: problem_block(clip_text(description, n - estimate_tokens(problem_block("")))))
+    pb.add(f"""## PERSONALISATION PROFILE
 Experience Level:    {profile.get('experience_level', 'beginner')}
 Skill Level:         {profile.get('skill_level', profile.get('experience_level', 'beginner'))}
 Learning Velocity:   {velocity} ({submissions} submissions so far)
 Preferred Style:     {profile.get('preferred_style', 'visual')}
 Background:          {profile.get('background', 'Not specified')}
 Goal:                {profile.get('goal', 'General DSA mastery')}
-Prior Thinking Style: {profile.get('thinking_style', 'unknown')}
+Prior Thinking Style: {profile.get('thinking_style', 'unknown')}""")
+    pb.add(history_block(max_items), priority=3,
+           shrink=lambda n: short_history if estimate_tokens(short_history) <= n else "")
+    pb.add(onboarding, priority=4, shrink=lambda n: clip_text(onboarding, n))
+    return pb.build()
+
+
+def _tests_block(tests: dict, detailed: bool = True) -> str:
+    """Sandbox results (sandbox/runner.py) as ground truth for correctness."""
+    if tests["status"] == "no_tests":
+        return ""
+    lines = [f"## TEST RESULTS (executed locally)\nPassed {tests['passed']}/{tests['total']} test cases."]
+    if detailed:
+        for case in tests["cases"]:
+            line = f"- {case['name']}: {case['status']}"
+            if case.get("time_ms") is not None:
+                line += f" ({case['time_ms']} ms)"
+            if case.get("order_only"):
+                line += " — matches only if order is ignored"
+            if case["status"] == "wrong_answer" and not case["hidden"]:
+                line += f" — input {case['input']}; expected {case['expected']}; got {case['actual']}"
+            elif case.get("error"):
+                line += f" — {case['error']}"
+            lines.append(line)
+    lines.append(
+        "Treat these results as ground truth for correctness. An expected output is one valid "
+        "answer; a mismatch may still be an acceptable alternative, so check before penalising."
+    )
+    return "\n".join(lines)
 
-Known Strengths:     {', '.join(profile.get('strengths', [])) or 'None identified yet'}
-Known Gaps:          {', '.join(profile.get('gaps', [])) or 'None identified yet'}
-Recurring Mistakes:  {', '.join(profile.get('mistake_patterns', [])) or 'None identified yet'}
-Recent Weaknesses:   {', '.join(profile.get('recent_weaknesses', [])) or 'None identified yet'}
-Known Concepts:      {', '.join(profile.get('known_concepts', [])) or 'Not specified'}
-Top Skill Scores:    {top_skills_str}
 
-Onboarding Context:  {profile.get('onboarding_summary', 'Not available')}
+def _build_reviewer_context(
+    problem: dict,
+    user_code: str,
+    profile: dict,
+    language: str,
+    tests: dict | None = None,
+) -> tuple[str, str]:
+    """
+    Returns (prefix, prompt) within `prompt_budget_reviewer` tokens.
 
-## PROBLEM
-Title:       {problem.get('title', 'Unknown')}
-Description: {problem.get('description', '')}
-Difficulty:  {problem.get('difficulty', 'unknown')}
-Concepts:    {', '.join(problem.get('concept_ids', []))}
-Constraints: {'; '.join(problem.get('constraints', [])) or 'None listed'}
+    The prefix (problem + profile, see `_build_reviewer_prefix`) is memoized
+    per problem and profile version and may use up to half the budget; the
+    submission goes last and gets whatever is left. Sandbox test results,
+    when there are any, follow the code and shrink to a pass count first.
+    """
+    budget = get_settings().prompt_budget_reviewer
+    prefix = memoized_prefix("reviewer", problem, profile, lambda: _build_reviewer_prefix(problem, profile, budget // 2))
 
-## STUDENT SUBMISSION ({language})
+    def code_block(code: str) -> str:
+        return f"""## STUDENT SUBMISSION ({language})
 ```{language}
-{user_code}
-```
+{code}
+```"""
 
-Perform your full internal analysis and return ONLY the JSON review object."""
+    pb = PromptBuilder(budget - estimate_tokens(prefix))
+    pb.add(code_block(user_code), priority=1,
+           shrink=lambda n: code_block(clip_code(user_code, n - estimate_tokens(code_block("")))))
+    if tests:
+        summary = _tests_block(tests, detailed=False)
+        pb.add(_tests_block(tests), priority=2,
+               shrink=lambda n: summary if estimate_tokens(summary) <= n else "")
+    pb.add("Perform your full internal analysis and return ONLY the JSON review object.")
+    return prefix, pb.build()
 
 
 async def run_reviewer(
@@ -74,6 +148,7 @@ async def run_reviewer(
     user_code: str,
     profile: dict,
     language: str = "python",
+    tests: dict | None = None,
 ) -> dict:
     """
     Run the Reviewer Agent.
@@ -83,12 +158,13 @@ async def run_reviewer(
         user_code: Code submitted by the student
         profile:   Current Dynamic Profile of the student
         language:  Programming language used
+        tests:     Sandbox test results (sandbox/runner.py), if the code was run
 
     Returns:
         Structured review result dict matching the JSON schema in reviewer.md
     """
     system = load_prompt("reviewer")
-    prompt = _build_reviewer_context(problem, user_code, profile, language)
+    prefix, prompt = _build_reviewer_context(problem, user_code, profile, language, tests)
 
     logger.info(
         "Running Reviewer for user=%s problem=%s lang=%s",
@@ -97,23 +173,56 @@ async def run_reviewer(
         language,
     )
 
-    result = await llm.complete_json(prompt, system=system, temperature=0.2)
-
-    # Ensure all expected keys are present with safe defaults
-    result.setdefault("score", 0)
-    result.setdefault("strengths", [])
-    result.setdefault("weaknesses", [])
-    result.setdefault("thinking_style", "brute_force")
-    result.setdefault("concept_gaps", [])
-    result.setdefault("known_concepts", [])
-    result.setdefault("topics_to_revise", [])
-    result.setdefault("detailed_feedback", "")
-    result.setdefault("profile_updates", {})
-
-    pu = result["profile_updates"]
-    pu.setdefault("skills", {})
-    pu.setdefault("gaps", [])
-    pu.setdefault("strengths", [])
-    pu.setdefault("mistake_patterns", [])
-
-    return result
+    return await llm.complete_json(
+        prompt, system=system, prefix=prefix, temperature=0.2, agent="reviewer", schema=ReviewOutput
+    )
+
+
+async def run_reviewer_stream(
+    problem: dict,
+    user_code: str,
+    profile: dict,
+    language: str = "python",
+    tests: dict | None = None,
+) -> AsyncIterator[tuple[str, Any]]:
+    """
+    Streaming variant of `run_reviewer` — yields (key, value) for each
+    top-level review field as soon as the model has finished generating it.
+    The caller assembles the dict and passes it through `apply_review_defaults`.
+    """
+    system = load_prompt("reviewer")
+    prefix, prompt = _build_reviewer_context(problem, user_code, profile, language, tests)
+
+    logger.info(
+        "Running Reviewer stream for user=%s problem=%s lang=%s",
+        profile.get("user_id", "?"),
+        problem.get("id", "?"),
+        language,
+    )
+
+    async for key, value in llm.complete_json_stream(
+        prompt, system=system, prefix=prefix, temperature=0.2, agent="reviewer"
+    ):
+        yield key, value
+
+
+def apply_review_defaults(result: dict) -> dict:
+    """Ensure all expected keys are present with safe defaults (see ReviewOutput)."""
+    return ReviewOutput.model_validate(result).model_dump()
+
+
+def syntax_error_review(error: str) -> dict:
+    """
+    Deterministic review for code that doesn't compile — returned without
+    calling the LLM. Carries no profile deltas or thinking style, since
+    there is nothing to infer them from.
+    """
+    return apply_review_defaults({
+        "score": 0,
+        "weaknesses": [f"The code does not run: {error}"],
+        "thinking_style": "",
+        "detailed_feedback": (
+            f"Your submission has a syntax error, so it couldn't be run against the examples.\n\n"
+            f"{error}\n\nFix it and submit again to get a full review."
+        ),
+    })
@@ -0,0 +1,80 @@
+"""
+Output contracts for the JSON-producing agents.
+
+`LLMClient.complete_json(..., schema=Model)` validates the parsed response
+against these models and fills in defaults, so callers always get every
+key. Unknown keys are kept. The shapes mirror the OUTPUT sections of the
+prompts in backend/prompts/*.md.
+"""
+
+from typing import Any
+from pydantic import BaseModel, ConfigDict, field_validator, model_validator
+
+
+class _AgentOutput(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+    @field_validator("*", mode="before")
+    @classmethod
+    def _null_to_default(cls, value: Any, info):
+        # Models sometimes emit null for "nothing" — treat it as the default
+        if value is None:
+            field = cls.model_fields[info.field_name]
+            return field.get_default(call_default_factory=True)
+        return value
+
+
+class ProfileUpdates(_AgentOutput):
+    skills: dict[str, float] = {}
+    gaps: list[str] = []
+    strengths: list[str] = []
+    mistake_patterns: list[str] = []
+
+
+class ReviewOutput(_AgentOutput):
+    score: int = 0
+    strengths: list[str] = []
+    weaknesses: list[str] = []
+    thinking_style: str = "brute_force"
+    concept_gaps: list[str] = []
+    known_concepts: list[str] = []
+    topics_to_revise: list[str] = []
+    detailed_feedback: str = ""
+    profile_updates: ProfileUpdates = ProfileUpdates()
+
+    @field_validator("score", mode="before")
+    @classmethod
+    def _round_score(cls, value: Any):
+        if isinstance(value, str):
+            value = value.strip().rstrip("%")
+        try:
+            return max(0, min(100, round(float(value))))
+        except (TypeError, ValueError):
+            return value  # let validation report it
+
+
+class OnboardingOutput(_AgentOutput):
+    experience_level: str = "beginner"
+    skill_level: str | None = None
+    preferred_style: str = "visual"
+    background: str = ""
+    goal: str = ""
+    initial_skills: dict[str, float] = {}
+    initial_gaps: list[str] = []
+    initial_strengths: list[str] = []
+    known_concepts: list[str] = []
+
+    @model_validator(mode="after")
+    def _default_skill_level(self):
+        if not self.skill_level:
+            self.skill_level = self.experience_level
+        return self
+
+
+class BackgroundInsights(_AgentOutput):
+    summary: str = ""
+    improving_concepts: list[str] = []
+    declining_concepts: list[str] = []
+    top_mistake_pattern: str = ""
+    recommended_focus: list[str] = []
+    motivational_note: str = ""
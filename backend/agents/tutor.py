@@ -3,82 +3,165 @@ Tutor Agent + Hint Agent — Socratic teaching engine.
 
 Tutor: Responds to student questions with calibrated Socratic guidance.
 Hint:  Generates a single progressive conceptual nudge.
+
+Both agents have `*_stream` variants that yield tokens as they are generated.
 """
 
 import logging
+from typing import AsyncIterator
+from config import get_settings
 from llm.client import llm
+from prompts.builder import PromptBuilder, clip_code, clip_text, estimate_tokens, join_recent
 from prompts.loader import load_prompt
+from prompts.prefix import memoized_prefix
 
 logger = logging.getLogger(__name__)
 
 
-def _build_tutor_context(
-    user_question: str,
-    problem: dict,
-    profile: dict,
-    conversation_history: list[dict] | None = None,
-) -> str:
-    """
-    Build the full personalisation context for the Socratic tutor.
-    Includes conversation history so the tutor can build progressively.
-    """
-    # Infer session depth from recent hints (proxy for conversation depth)
-    hints_given = len(profile.get("recent_hints", []))
-    session_depth = "early" if hints_given < 2 else "mid" if hints_given < 5 else "deep"
-
+def _is_beginner(profile: dict) -> bool:
     # Detect beginner mode explicitly — used by the prompt to unlock syntax hints
-    is_beginner = (
+    return (
         profile.get('experience_level', 'beginner') == 'beginner'
         or profile.get('submissions_count', 0) < 5
     )
 
+
+def _syntax_topics(profile: dict) -> list[str]:
     # Syntax topics flagged by the Reviewer — the tutor should reference these
     all_topics = profile.get('topics_to_revise', [])
-    syntax_topics = [t for t in all_topics if 'Python:' in t or 'syntax' in t.lower() or 'string' in t.lower()]
-    algo_topics   = [t for t in all_topics if t not in syntax_topics]
-
-    history_str = "None yet."
-    if conversation_history:
-        history_str = "\n".join(
-            f"  [{m['role'].upper()}]: {m['content']}"
-            for m in conversation_history[-6:]  # last 3 exchanges
-        )
+    return [t for t in all_topics if 'Python:' in t or 'syntax' in t.lower() or 'string' in t.lower()]
+
 
-    return f"""## PERSONALISATION PROFILE
+def _build_tutor_prefix(problem: dict, profile: dict, budget: int) -> str:
+    """
+    Problem + personalisation profile for the Socratic tutor. Depends only on
+    the problem and the profile, so it is memoized and sent as the
+    provider-cacheable prompt prefix. Long profile lists are trimmed first.
+    """
+    max_items = get_settings().prompt_max_list_items
+
+    # Infer session depth from recent hints (proxy for conversation depth)
+    hints_given = len(profile.get("recent_hints", []))
+    session_depth = "early" if hints_given < 2 else "mid" if hints_given < 5 else "deep"
+
+    is_beginner = _is_beginner(profile)
+    syntax_topics = _syntax_topics(profile)
+    algo_topics   = [t for t in profile.get('topics_to_revise', []) if t not in syntax_topics]
+
+    def problem_block(description: str) -> str:
+        return f"""## PROBLEM CONTEXT
+Title:       {problem.get('title', 'Unknown')}
+Description: {description}
+Concepts:    {', '.join(problem.get('concept_ids', []))}"""
+
+    def lists_block(limit: int) -> str:
+        return f"""Known Strengths:    {join_recent(profile.get('strengths', []), limit) or 'None yet'}
+Known Gaps:         {join_recent(profile.get('gaps', []), limit) or 'None yet'}
+Mistake Patterns:   {join_recent(profile.get('mistake_patterns', []), limit) or 'None yet'}
+Recent Weaknesses:  {join_recent(profile.get('recent_weaknesses', []), limit) or 'None yet'}
+Known Concepts:     {join_recent(profile.get('known_concepts', []), limit) or 'Not specified'}
+Session Depth:      {session_depth} (hints given this problem: {hints_given})"""
+
+    description = problem.get('description', '')
+    short_lists = lists_block(5)
+
+    pb = PromptBuilder(budget)
+    pb.add(problem_block(description), priority=1,
+           shrink=lambda n: problem_block(clip_text(description, n - estimate_tokens(problem_block("")))))
+    pb.add(f"""## PERSONALISATION PROFILE
 Experience Level:   {profile.get('experience_level', 'beginner')}
 Mode:               {"⚡ BEGINNER MODE — syntax hints allowed" if is_beginner else "SOCRATIC MODE — conceptual nudges only"}
 Preferred Style:    {profile.get('preferred_style', 'visual')}
 Thinking Style:     {profile.get('thinking_style', 'unknown')}
 Background:         {profile.get('background', 'Not specified')}
 Goal:               {profile.get('goal', 'General DSA mastery')}
-Learning Velocity:  {'fast' if profile.get('submissions_count', 0) > 20 else 'normal' if profile.get('submissions_count', 0) > 5 else 'slow'}
+Learning Velocity:  {'fast' if profile.get('submissions_count', 0) > 20 else 'normal' if profile.get('submissions_count', 0) > 5 else 'slow'}""")
+    pb.add(lists_block(max_items), priority=3,
+           shrink=lambda n: short_lists if estimate_tokens(short_lists) <= n else "")
+    pb.add(f"""## SYNTAX TOPICS TO REVISE (flagged by Reviewer)
+{chr(10).join(f'  • {t}' for t in syntax_topics[-max_items:]) if syntax_topics else '  None flagged — student may know their syntax.'}""", priority=3)
+    pb.add(f"""## ALGORITHM TOPICS TO REVISE
+{chr(10).join(f'  • {t}' for t in algo_topics[-max_items:]) if algo_topics else '  None flagged.'}""", priority=4)
+    return pb.build()
 
-Known Strengths:    {', '.join(profile.get('strengths', [])) or 'None yet'}
-Known Gaps:         {', '.join(profile.get('gaps', [])) or 'None yet'}
-Mistake Patterns:   {', '.join(profile.get('mistake_patterns', [])) or 'None yet'}
-Recent Weaknesses:  {', '.join(profile.get('recent_weaknesses', [])) or 'None yet'}
-Known Concepts:     {', '.join(profile.get('known_concepts', [])) or 'Not specified'}
-Session Depth:      {session_depth} (hints given this problem: {hints_given})
 
-## SYNTAX TOPICS TO REVISE (flagged by Reviewer)
-{chr(10).join(f'  • {t}' for t in syntax_topics) if syntax_topics else '  None flagged — student may know their syntax.'}
+def _build_tutor_context(
+    user_question: str,
+    problem: dict,
+    profile: dict,
+    conversation_history: list[dict] | None = None,
+) -> tuple[str, str]:
+    """
+    Build the full personalisation context for the Socratic tutor.
+    Includes conversation history so the tutor can build progressively.
 
-## ALGORITHM TOPICS TO REVISE
-{chr(10).join(f'  • {t}' for t in algo_topics) if algo_topics else '  None flagged.'}
+    Returns (prefix, prompt) within `prompt_budget_tutor` tokens: the memoized
+    prefix (see `_build_tutor_prefix`) may use up to half; the conversation
+    and question go last — the question always fits, history is trimmed.
+    """
+    budget = get_settings().prompt_budget_tutor
+    prefix = memoized_prefix("tutor", problem, profile, lambda: _build_tutor_prefix(problem, profile, budget // 2))
+    is_beginner = _is_beginner(profile)
 
-## PROBLEM CONTEXT
-Title:       {problem.get('title', 'Unknown')}
-Description: {problem.get('description', '')}
-Concepts:    {', '.join(problem.get('concept_ids', []))}
+    recent = (conversation_history or [])[-6:]  # last 3 exchanges
 
-## CONVERSATION HISTORY (last exchanges)
-{history_str}
+    def history_block(messages: list[dict], per_message_tokens: int | None = None) -> str:
+        lines = "\n".join(
+            f"  [{m['role'].upper()}]: "
+            + (clip_text(m['content'], per_message_tokens) if per_message_tokens else m['content'])
+            for m in messages
+        )
+        return f"""## CONVERSATION HISTORY (last exchanges)
+{lines or "None yet."}"""
+
+    def shrink_history(n: int) -> str:
+        # Keep the newest exchanges, clipping each message to an equal share
+        for keep in (4, 2):
+            messages = recent[-keep:]
+            header = estimate_tokens(history_block(messages, 1))
+            block = history_block(messages, max(20, (n - header) // max(1, len(messages))))
+            if estimate_tokens(block) <= n:
+                return block
+        return ""
+
+    pb = PromptBuilder(budget - estimate_tokens(prefix))
+    pb.add(history_block(recent), priority=2, shrink=shrink_history)
+    pb.add(f"""## STUDENT'S CURRENT QUESTION
+{user_question}""")
+    pb.add(f"""Respond as instructed for {"BEGINNER MODE" if is_beginner else "SOCRATIC MODE"}. End with exactly ONE question.""")
+    return prefix, pb.build()
+
+
+def _build_hint_prefix(problem: dict, profile: dict, budget: int) -> str:
+    """Problem + personalisation profile for the hint agent — memoized like the tutor's."""
+    max_items = get_settings().prompt_max_list_items
+    is_beginner = _is_beginner(profile)
 
-## STUDENT'S CURRENT QUESTION
-{user_question}
+    # Syntax-specific topics flagged by Reviewer for this beginner
+    syntax_topics = _syntax_topics(profile)
 
-Respond as instructed for {"BEGINNER MODE" if is_beginner else "SOCRATIC MODE"}. End with exactly ONE question."""
+    def problem_block(description: str) -> str:
+        return f"""## PROBLEM
+Title:       {problem.get('title', 'Unknown')}
+Description: {description}
+Concepts:    {', '.join(problem.get('concept_ids', []))}
+Constraints: {'; '.join(problem.get('constraints', [])) or 'None'}"""
 
+    description = problem.get('description', '')
+
+    pb = PromptBuilder(budget)
+    pb.add(problem_block(description), priority=1,
+           shrink=lambda n: problem_block(clip_text(description, n - estimate_tokens(problem_block("")))))
+    pb.add(f"""## PERSONALISATION PROFILE
+Experience Level:   {profile.get('experience_level', 'beginner')}
+Mode:               {"⚡ BEGINNER MODE — syntax example allowed" if is_beginner else "SOCRATIC MODE — conceptual only"}
+Thinking Style:     {profile.get('thinking_style', 'unknown')}
+Known Gaps:         {join_recent(profile.get('gaps', []), max_items) or 'None'}
+Mistake Patterns:   {join_recent(profile.get('mistake_patterns', []), max_items) or 'None'}
+Recent Weaknesses:  {join_recent(profile.get('recent_weaknesses', []), max_items) or 'None'}""")
+    pb.add(f"""## SYNTAX TOPICS REVIEWER FLAGGED (prioritise these for the code snippet)
+{chr(10).join(f'  • {t}' for t in syntax_topics[-max_items:]) if syntax_topics else '  None — infer from student code.'}""", priority=4)
+    return pb.build()
 
 
 def _build_hint_context(
@@ -86,60 +169,53 @@ def _build_hint_context(
     profile: dict,
     previous_hints: list[str],
     current_code: str | None = None,
-) -> str:
+) -> tuple[str, str]:
     """
     Build hint context. Includes current code snapshot if available
     so hints can reference where the student actually is.
-    """
-    prev_hints_str = (
-        "\n".join(f"  {i+1}. {h}" for i, h in enumerate(previous_hints))
-        if previous_hints
-        else "  None given yet."
-    )
 
-    code_context = ""
-    if current_code:
-        # Only show first 30 lines to keep context tight
-        lines = current_code.strip().splitlines()[:30]
-        code_context = f"""
-## STUDENT'S CURRENT CODE SNAPSHOT
+    Returns (prefix, prompt) within `prompt_budget_hint` tokens: the memoized
+    prefix may use up to half; older previous hints and the code snapshot
+    are trimmed to fit the rest.
+    """
+    budget = get_settings().prompt_budget_hint
+    prefix = memoized_prefix("hint", problem, profile, lambda: _build_hint_prefix(problem, profile, budget // 2))
+    is_beginner = _is_beginner(profile)
+
+    def hints_block(hints: list[str], offset: int = 0) -> str:
+        listed = (
+            "\n".join(f"  {offset + i + 1}. {h}" for i, h in enumerate(hints))
+            if hints
+            else "  None given yet."
+        )
+        return f"""## PREVIOUS HINTS (DO NOT REPEAT OR PARAPHRASE ANY OF THESE)
+{listed}"""
+
+    def shrink_hints(n: int) -> str:
+        # Drop the oldest hints first — the newest are the likeliest to be repeated
+        for start in range(1, len(previous_hints)):
+            block = hints_block(previous_hints[start:], offset=start)
+            if estimate_tokens(block) <= n:
+                return block
+        return ""
+
+    def code_block(code: str) -> str:
+        return f"""## STUDENT'S CURRENT CODE SNAPSHOT
 ```
-{chr(10).join(lines)}
+{code}
 ```
 (calibrate hint to what they've already written — don't repeat what's already correct)"""
 
-    is_beginner = (
-        profile.get('experience_level', 'beginner') == 'beginner'
-        or profile.get('submissions_count', 0) < 5
-    )
-
-    # Syntax-specific topics flagged by Reviewer for this beginner
-    all_topics = profile.get('topics_to_revise', [])
-    syntax_topics = [t for t in all_topics if 'Python:' in t or 'syntax' in t.lower() or 'string' in t.lower()]
-
-    return f"""## PERSONALISATION PROFILE
-Experience Level:   {profile.get('experience_level', 'beginner')}
-Mode:               {"⚡ BEGINNER MODE — syntax example allowed" if is_beginner else "SOCRATIC MODE — conceptual only"}
-Thinking Style:     {profile.get('thinking_style', 'unknown')}
-Known Gaps:         {', '.join(profile.get('gaps', [])) or 'None'}
-Mistake Patterns:   {', '.join(profile.get('mistake_patterns', [])) or 'None'}
-Recent Weaknesses:  {', '.join(profile.get('recent_weaknesses', [])) or 'None'}
-
-## SYNTAX TOPICS REVIEWER FLAGGED (prioritise these for the code snippet)
-{chr(10).join(f'  • {t}' for t in syntax_topics) if syntax_topics else '  None — infer from student code.'}
-
-## PROBLEM
-Title:       {problem.get('title', 'Unknown')}
-Description: {problem.get('description', '')}
-Concepts:    {', '.join(problem.get('concept_ids', []))}
-Constraints: {'; '.join(problem.get('constraints', [])) or 'None'}
-{code_context}
-
-## PREVIOUS HINTS (DO NOT REPEAT OR PARAPHRASE ANY OF THESE)
-{prev_hints_str}
-
-Generate ONE hint calibrated to {"BEGINNER MODE" if is_beginner else "SOCRATIC MODE"} as per your instructions."""
+    # Only show first 30 lines to keep context tight
+    snapshot = "\n".join(current_code.strip().splitlines()[:30]) if current_code else ""
 
+    pb = PromptBuilder(budget - estimate_tokens(prefix))
+    if snapshot:
+        pb.add(code_block(snapshot), priority=2,
+               shrink=lambda n: code_block(clip_code(snapshot, n - estimate_tokens(code_block("")))))
+    pb.add(hints_block(previous_hints), priority=1, shrink=shrink_hints)
+    pb.add(f"""Generate ONE hint calibrated to {"BEGINNER MODE" if is_beginner else "SOCRATIC MODE"} as per your instructions.""")
+    return prefix, pb.build()
 
 
 async def run_tutor(
@@ -158,7 +234,7 @@ async def run_tutor(
         conversation_history: Optional recent message history for continuity
     """
     system = load_prompt("tutor")
-    prompt = _build_tutor_context(user_question, problem, profile, conversation_history)
+    prefix, prompt = _build_tutor_context(user_question, problem, profile, conversation_history)
 
     logger.info(
         "Tutor called: user=%s problem=%s",
@@ -166,7 +242,7 @@ async def run_tutor(
         problem.get("id", "?"),
     )
 
-    return await llm.complete(prompt, system=system, temperature=0.65, max_tokens=500)
+    return await llm.complete(prompt, system=system, prefix=prefix, temperature=0.65, max_tokens=500, agent="tutor")
 
 
 async def run_hint(
@@ -185,7 +261,7 @@ async def run_hint(
         current_code:   Optional snapshot of student's current code
     """
     system = load_prompt("hint")
-    prompt = _build_hint_context(problem, profile, previous_hints, current_code)
+    prefix, prompt = _build_hint_context(problem, profile, previous_hints, current_code)
 
     logger.info(
         "Hint called: user=%s problem=%s previous=%d",
@@ -194,4 +270,45 @@ async def run_hint(
         len(previous_hints),
     )
 
-    return await llm.complete(prompt, system=system, temperature=0.55, max_tokens=180)
+    return await llm.complete(prompt, system=system, prefix=prefix, temperature=0.55, max_tokens=180, agent="hint")
+
+
+async def run_tutor_stream(
+    user_question: str,
+    problem: dict,
+    profile: dict,
+    conversation_history: list[dict] | None = None,
+) -> AsyncIterator[str]:
+    """Streaming variant of `run_tutor` — yields response tokens as they arrive."""
+    system = load_prompt("tutor")
+    prefix, prompt = _build_tutor_context(user_question, problem, profile, conversation_history)
+
+    logger.info(
+        "Tutor stream called: user=%s problem=%s",
+        profile.get("user_id", "?"),
+        problem.get("id", "?"),
+    )
+
+    async for token in llm.complete_stream(prompt, system=system, prefix=prefix, temperature=0.65, max_tokens=500, agent="tutor"):
+        yield token
+
+
+async def run_hint_stream(
+    problem: dict,
+    profile: dict,
+    previous_hints: list[str],
+    current_code: str | None = None,
+) -> AsyncIterator[str]:
+    """Streaming variant of `run_hint` — yields hint tokens as they arrive."""
+    system = load_prompt("hint")
+    prefix, prompt = _build_hint_context(problem, profile, previous_hints, current_code)
+
+    logger.info(
+        "Hint stream called: user=%s problem=%s previous=%d",
+        profile.get("user_id", "?"),
+        problem.get("id", "?"),
+        len(previous_hints),
+    )
+
+    async for token in llm.complete_stream(prompt, system=system, prefix=prefix, temperature=0.55, max_tokens=180, agent="hint"):
+        yield token
@@ -12,9 +12,97 @@ class Settings(BaseSettings):
     groq_api_key: str = ""
     openai_api_key: str = ""
 
+    # LLM HTTP connection pool (one long-lived client per provider)
+    llm_http_timeout: float = 60.0            # total read timeout per request (seconds)
+    llm_http_connect_timeout: float = 5.0
+    llm_http_max_connections: int = 100
+    llm_http_max_keepalive: int = 20
+    llm_http_keepalive_expiry: float = 30.0   # seconds an idle connection stays open
+    llm_http2: bool = False                   # requires the `h2` package (httpx[http2])
+
+    # LLM response cache (in-process LRU + Mongo `llm_cache` TTL collection)
+    llm_cache_enabled: bool = False           # default for calls that don't pass cache=
+    llm_cache_max_entries: int = 1000
+    llm_cache_ttl_seconds: int = 3600
+    llm_cache_persist: bool = True            # also store entries in MongoDB
+    llm_coalesce_enabled: bool = True         # share one call among identical concurrent requests
+
+    # LLM provider resilience — circuit breaker + hedged requests
+    llm_breaker_window: int = 20              # recent calls tracked per provider
+    llm_breaker_min_calls: int = 5            # calls needed before a breaker can trip
+    llm_breaker_error_rate: float = 0.5       # trip at/above this failure ratio...
+    llm_breaker_latency_ms: float = 20000     # ...or at/above this p95 latency
+    llm_breaker_cooldown_seconds: float = 30  # open → half-open (one probe) after this
+    llm_hedge_enabled: bool = False
+    llm_hedge_after_ms: float = 4000          # start the fallback if the primary hasn't answered (≈ primary p95)
+
+    # LLM request scheduling — per provider, interactive calls ahead of background
+    llm_max_concurrency: int = 16             # in-flight calls per provider
+    llm_tokens_per_minute: int = 0            # estimated token budget per provider; 0 = unlimited
+    llm_provider_limits: dict[str, dict] = {} # per-provider overrides, e.g. {"groq": {"max_concurrency": 4, "tokens_per_minute": 30000}}
+
+    # Per-route time budgets (seconds) shared by retries and fallbacks; 0 = no deadline
+    deadline_review_seconds: float = 45
+    deadline_tutor_seconds: float = 20
+    deadline_hint_seconds: float = 12
+    deadline_onboarding_seconds: float = 30
+
+    # Mock provider (LLM_PROVIDER=mock) — deterministic local responses for load testing
+    mock_llm_latency_median_ms: float = 600   # time to first token, log-normally distributed
+    mock_llm_latency_sigma: float = 0.4       # log-normal spread (0 = constant latency)
+    mock_llm_error_rate: float = 0.0          # fraction of calls that raise
+    mock_llm_tokens_per_second: float = 80    # generation speed (0 = instant)
+
+    # Agent prompt budgets (user-message tokens, estimated locally at ~4 chars/token)
+    prompt_budget_reviewer: int = 6000
+    prompt_budget_tutor: int = 3000
+    prompt_budget_hint: int = 2000
+    prompt_max_list_items: int = 20           # cap on profile lists (known_concepts, gaps, ...)
+
     # MongoDB
     mongodb_uri: str = "mongodb://localhost:27017"
     mongodb_db_name: str = "perspectra"
+    mongo_transactions: bool = True           # needs a replica set (Atlas); turned off at runtime if the server refuses
+
+    # In-process profile cache (profile/service.py)
+    profile_cache_enabled: bool = True
+    profile_cache_max_entries: int = 10000
+    profile_cache_ttl_seconds: float = 30     # bound on staleness if the change stream is down
+    profile_cache_change_stream: bool = True  # evict on writes from other workers (replica set only)
+
+    # Mongo → Neo4j write-behind sync (graph_outbox collection)
+    graph_sync_poll_seconds: float = 1.0
+    graph_sync_batch_size: int = 50           # students synced per worker iteration
+    graph_sync_lease_seconds: float = 60      # a claimed entry is retried by another worker after this
+    graph_sync_backoff_seconds: float = 2     # first retry delay, doubled per failed attempt
+    graph_sync_max_backoff_seconds: float = 300
+
+    # Submission dedup (review/fingerprint.py) — reuse a recent review of the same code
+    review_dedup_policy: str = "same_profile"  # off | any | same_profile
+    review_dedup_window_hours: float = 24
+
+    # Test sandbox (sandbox/runner.py) — runs Python submissions against problem examples
+    sandbox_enabled: bool = False             # runs untrusted code — enable only with real isolation below
+    sandbox_isolation: str = "bwrap"          # bwrap | uid | none (local development only)
+    sandbox_bwrap_path: str = "bwrap"
+    sandbox_uid: int = 65534                  # child uid/gid when the API runs as root (nobody/nogroup)
+    sandbox_gid: int = 65534
+    sandbox_python: str = ""                  # child interpreter, runnable by sandbox_uid; default: the API's own
+    sandbox_workers: int = 2                  # test cases running at once
+    sandbox_cpu_seconds: int = 2              # per test case
+    sandbox_memory_mb: int = 256
+    sandbox_wall_seconds: float = 5
+    sandbox_short_circuit: bool = True        # code that doesn't compile gets a review without an LLM call
+
+    # Async review jobs (review/jobs.py, review_jobs collection)
+    review_job_workers: int = 2               # in-process workers, started on first enqueue; 0 with `python -m review.jobs`
+    review_queue_max: int = 200               # queued jobs before POST /review/jobs answers 429
+    review_queue_retry_after_seconds: int = 10
+    review_job_poll_seconds: float = 0.5      # idle worker poll and SSE status poll interval
+    review_job_lease_seconds: float = 120     # keep above deadline_review_seconds
+    review_job_max_attempts: int = 3          # transient failures and lease expiries (hung or crashed workers)
+    review_job_backoff_seconds: float = 2
+    review_job_ttl_seconds: int = 86400       # finished jobs are deleted after this
 
     # Neo4j
     neo4j_uri: str = ""
@@ -0,0 +1,36 @@
+"""
+Prometheus metrics for database work off the LLM path — Perspectra
+
+Exported on GET /metrics alongside the LLM series (llm/metrics.py).
+"""
+
+from prometheus_client import Counter, Gauge, Histogram
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2, 5)
+
+NEO4J_WRITE_SECONDS = Histogram(
+    "neo4j_write_seconds", "Duration of one Neo4j write transaction",
+    ["operation"], buckets=LATENCY_BUCKETS,
+)
+
+# Mongo → Neo4j write-behind sync (graph/sync.py)
+GRAPH_OUTBOX_PENDING = Gauge("graph_outbox_pending", "Students with graph changes not yet written to Neo4j")
+GRAPH_OUTBOX_LAG_SECONDS = Gauge("graph_outbox_lag_seconds", "Age of the oldest unsynced profile change")
+GRAPH_SYNC_DELAY_SECONDS = Histogram(
+    "graph_sync_delay_seconds", "Time from a profile change to the start of its graph write",
+    buckets=(0.1, 0.5, 1, 2, 5, 10, 30, 60, 300, 1800),
+)
+GRAPH_SYNC_FAILURES = Counter("graph_sync_failures", "Failed graph writes (retried with backoff)")
+GRAPH_RECONCILE_CHANGES = Counter("graph_reconcile_changes", "HAS_SKILL / HAS_GAP edge changes applied by the reconciler", ["change"])
+GRAPH_RECONCILE_UNKNOWN_CONCEPTS = Counter("graph_reconcile_unknown_concepts", "Profile skills/gaps skipped because no Concept node exists")
+
+PROFILE_CACHE_LOOKUPS = Counter("profile_cache_lookups", "In-process profile cache lookups", ["result"])
+
+REVIEW_JOBS_QUEUED = Gauge("review_jobs_queued", "Review jobs waiting for a worker (sampled on enqueue)")
+REVIEW_JOB_SECONDS = Histogram(
+    "review_job_seconds", "Time a worker spends on one successful review job",
+    buckets=(1, 2, 5, 10, 20, 30, 45, 60, 120),
+)
+REVIEW_JOB_FAILURES = Counter("review_job_failures", "Review job attempts that failed (transient ones are retried)")
+
+REVIEW_DEDUP_LOOKUPS = Counter("review_dedup_lookups", "Submissions checked for a reusable review of the same code", ["result"])
@@ -35,8 +35,15 @@ async def connect_mongo():
     try:
         await _db.users.create_index("email", unique=True)
         await _db.profiles.create_index("user_id", unique=True)
-        await _db.reviews.create_index("user_id")
+        await _db.reviews.create_index([("user_id", 1), ("created_at", -1), ("_id", -1)])
+        await _db.reviews.create_index([("user_id", 1), ("fingerprint", 1), ("created_at", -1)])
+        # One review per async job, however many workers ran it
+        await _db.reviews.create_index("job_id", unique=True, partialFilterExpression={"job_id": {"$exists": True}})
         await _db.submissions.create_index([("user_id", 1), ("problem_id", 1)])
+        await _db.llm_cache.create_index("expires_at", expireAfterSeconds=0)
+        await _db.graph_outbox.create_index([("next_attempt_at", 1), ("pending_since", 1)])
+        await _db.review_jobs.create_index([("status", 1), ("created_at", 1)])
+        await _db.review_jobs.create_index("finished_at", expireAfterSeconds=settings.review_job_ttl_seconds)
         print("[MongoDB] Indexes ensured.")
     except Exception as e:
         # Indexes already exist from seeder, or replica set is in election — safe to continue
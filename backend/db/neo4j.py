@@ -40,6 +40,21 @@ async def run_query(cypher: str, params: dict = {}) -> list[dict]:
         return [dict(record) for record in await result.data()]
 
 
+async def run_write(cypher: str, params: dict = {}) -> list[dict]:
+    """
+    Execute a write Cypher statement in one managed write transaction.
+    The driver retries the whole transaction on transient errors.
+    """
+    driver = get_driver()
+
+    async def work(tx) -> list[dict]:
+        result = await tx.run(cypher, params)
+        return [dict(record) for record in await result.data()]
+
+    async with driver.session() as session:
+        return await session.execute_write(work)
+
+
 async def test_connection():
     result = await run_query("RETURN 'Neo4j OK' AS status")
     print(result)
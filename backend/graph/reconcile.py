@@ -0,0 +1,195 @@
+"""
+HAS_SKILL / HAS_GAP reconciliation — Mongo profiles are the source of truth
+
+For a batch of students: read their current skill/gap edges from Neo4j in one
+query, diff them against the Mongo profiles, and apply only the difference
+(new or changed skill levels, new gaps, and deletes for skills/gaps the
+profile no longer has) in one write transaction. Nothing is written when
+the graph is already in sync.
+
+Edges are only created to Concept nodes that already exist (the seed
+script owns the concept taxonomy). Skills and gaps naming an unknown
+concept are left out of the diff and reported as `unknown_concepts`, so
+they aren't re-sent on every run.
+
+Used per student by the write-behind worker (graph/sync.py), and in bulk to
+repair existing drift:
+
+Usage:
+  cd backend
+  python -m graph.reconcile [--batch-size 200]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+from datetime import datetime, timezone
+
+# Allow running as a module from backend/
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from db.metrics import GRAPH_RECONCILE_CHANGES, GRAPH_RECONCILE_UNKNOWN_CONCEPTS, NEO4J_WRITE_SECONDS
+from db.mongo import connect_mongo, close_mongo, get_db
+from db.neo4j import connect_neo4j, close_neo4j, run_query, run_write
+
+logger = logging.getLogger(__name__)
+
+# Current edges, plus which of the profiles' concepts exist as Concept nodes
+_READ_EDGES_CYPHER = """
+UNWIND $uids AS uid
+MATCH (:Student {id: uid})-[r:HAS_SKILL|HAS_GAP]->(c:Concept)
+RETURN uid, type(r) AS kind, c.name AS concept, r.level AS level
+UNION ALL
+UNWIND $concepts AS name
+MATCH (c:Concept {name: name})
+RETURN null AS uid, "CONCEPT" AS kind, c.name AS concept, null AS level
+"""
+
+# Each subquery aggregates, so it yields one row even when its list is empty.
+_APPLY_DIFF_CYPHER = """
+CALL {
+    UNWIND $set_skills AS row
+    MERGE (s:Student {id: row.uid})
+    WITH s, row
+    MATCH (c:Concept {name: row.concept})
+    MERGE (s)-[r:HAS_SKILL]->(c)
+    SET r.level = row.level, r.updated_at = $ts
+    RETURN count(r) AS skills_set
+}
+CALL {
+    UNWIND $delete_skills AS row
+    MATCH (:Student {id: row.uid})-[r:HAS_SKILL]->(:Concept {name: row.concept})
+    DELETE r
+    RETURN count(*) AS skills_deleted
+}
+CALL {
+    UNWIND $create_gaps AS row
+    MERGE (s:Student {id: row.uid})
+    WITH s, row
+    MATCH (c:Concept {name: row.concept})
+    MERGE (s)-[r:HAS_GAP]->(c)
+    ON CREATE SET r.since = $ts
+    RETURN count(r) AS gaps_created
+}
+CALL {
+    UNWIND $delete_gaps AS row
+    MATCH (:Student {id: row.uid})-[r:HAS_GAP]->(:Concept {name: row.concept})
+    DELETE r
+    RETURN count(*) AS gaps_deleted
+}
+RETURN skills_set, skills_deleted, gaps_created, gaps_deleted
+"""
+
+_CHANGE_KEYS = ("set_skills", "delete_skills", "create_gaps", "delete_gaps")
+
+
+def diff_edges(
+    profile: dict, skills_in_graph: dict[str, float], gaps_in_graph: set[str], concepts: set[str],
+) -> dict[str, list[dict]]:
+    """Minimal edge changes that make the graph match `profile` for one student, among known `concepts`."""
+    uid = profile["user_id"]
+    skills = {
+        name: round(float(level), 2)
+        for name, level in (profile.get("skills") or {}).items()
+        if name in concepts
+    }
+    gaps = set(profile.get("gaps") or []) & concepts
+    return {
+        "set_skills": [
+            {"uid": uid, "concept": name, "level": level}
+            for name, level in skills.items()
+            if skills_in_graph.get(name) is None or round(skills_in_graph[name], 2) != level
+        ],
+        "delete_skills": [{"uid": uid, "concept": name} for name in skills_in_graph if name not in skills],
+        "create_gaps": [{"uid": uid, "concept": name} for name in gaps - gaps_in_graph],
+        "delete_gaps": [{"uid": uid, "concept": name} for name in gaps_in_graph - gaps],
+    }
+
+
+async def reconcile_students(profiles: list[dict]) -> dict[str, int]:
+    """Bring the graph edges of every student in `profiles` in line with Mongo. Returns change counts."""
+    if not profiles:
+        return {key: 0 for key in (*_CHANGE_KEYS, "unknown_concepts")}
+
+    wanted = {name for p in profiles for name in (*(p.get("skills") or {}), *(p.get("gaps") or []))}
+    graph: dict[str, tuple[dict[str, float], set[str]]] = {p["user_id"]: ({}, set()) for p in profiles}
+    concepts: set[str] = set()
+    for row in await run_query(_READ_EDGES_CYPHER, {"uids": list(graph), "concepts": sorted(wanted)}):
+        if row["kind"] == "CONCEPT":
+            concepts.add(row["concept"])
+            continue
+        skills, gaps = graph[row["uid"]]
+        if row["kind"] == "HAS_SKILL":
+            skills[row["concept"]] = row["level"] if row["level"] is not None else float("nan")
+        else:
+            gaps.add(row["concept"])
+
+    changes: dict[str, list[dict]] = {key: [] for key in _CHANGE_KEYS}
+    for profile in profiles:
+        for key, rows in diff_edges(profile, *graph[profile["user_id"]], concepts).items():
+            changes[key].extend(rows)
+
+    counts = {key: len(rows) for key, rows in changes.items()}
+    unknown = sorted(wanted - concepts)
+    if unknown:
+        GRAPH_RECONCILE_UNKNOWN_CONCEPTS.inc(len(unknown))
+        logger.warning(
+            "Neo4j reconcile skipped %d concepts with no Concept node: %s",
+            len(unknown), ", ".join(unknown[:20]),
+        )
+    if not any(counts.values()):
+        return {**counts, "unknown_concepts": len(unknown)}
+
+    started = time.perf_counter()
+    await run_write(_APPLY_DIFF_CYPHER, {**changes, "ts": datetime.now(timezone.utc).isoformat()})
+    elapsed = time.perf_counter() - started
+    NEO4J_WRITE_SECONDS.labels("reconcile").observe(elapsed)
+    for key, n in counts.items():
+        GRAPH_RECONCILE_CHANGES.labels(key).inc(n)
+    logger.info(
+        "Neo4j reconcile students=%d %s in %.1fms",
+        len(profiles), " ".join(f"{k}={v}" for k, v in counts.items()), elapsed * 1000,
+    )
+    return {**counts, "unknown_concepts": len(unknown)}
+
+
+async def reconcile_all(batch_size: int = 200) -> dict[str, int]:
+    """Bulk mode — scan every profile in `_id` order, one read + at most one write per batch."""
+    db = get_db()
+    totals = {key: 0 for key in (*_CHANGE_KEYS, "unknown_concepts")}
+    students = 0
+    last_id = None
+    while True:
+        query = {} if last_id is None else {"_id": {"$gt": last_id}}
+        batch = await db.profiles.find(query, {"user_id": 1, "skills": 1, "gaps": 1}) \
+            .sort("_id", 1).limit(batch_size).to_list(length=batch_size)
+        if not batch:
+            break
+        for key, n in (await reconcile_students(batch)).items():
+            totals[key] += n
+        students += len(batch)
+        last_id = batch[-1]["_id"]
+        print(f"  ✓ {students} students checked — {totals}")
+    return totals
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Repair HAS_SKILL / HAS_GAP drift between MongoDB and Neo4j")
+    parser.add_argument("--batch-size", type=int, default=200)
+    args = parser.parse_args()
+
+    await connect_mongo()
+    await connect_neo4j()
+    try:
+        totals = await reconcile_all(args.batch_size)
+        print(f"\n✅ Reconcile complete: {totals}")
+    finally:
+        await close_mongo()
+        await close_neo4j()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
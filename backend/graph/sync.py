@@ -0,0 +1,164 @@
+"""
+Mongo → Neo4j profile sync — transactional outbox + write-behind worker
+
+The request path never talks to Neo4j. `update_profile` records a pending
+change in the `graph_outbox` collection in the same Mongo transaction as the
+profile write (`record_graph_change`). One outbox document per student:
+
+    {_id: user_id, seq: 3, pending_since, next_attempt_at, attempts, locked_until, last_error}
+
+so any number of changes made before the worker gets to a student coalesce
+into a single graph write against their current skills and gaps.
+
+The worker (started from the app lifespan) claims due entries with a lease,
+reconciles the student's edges against their profile (graph/reconcile.py —
+only the difference is written), and deletes the entry unless more changes
+arrived in the meantime. Failures back off exponentially. Lag and queue
+depth are exported as `graph_outbox_*` metrics.
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+
+from pymongo import ReturnDocument
+
+from config import get_settings
+from db.metrics import (
+    GRAPH_OUTBOX_LAG_SECONDS,
+    GRAPH_OUTBOX_PENDING,
+    GRAPH_SYNC_DELAY_SECONDS,
+    GRAPH_SYNC_FAILURES,
+)
+from db.mongo import get_db
+from graph.reconcile import reconcile_students
+
+logger = logging.getLogger(__name__)
+
+_worker: asyncio.Task | None = None
+
+
+async def record_graph_change(db, user_id: str, session=None) -> None:
+    """Mark the student's graph edges as stale. Pass the session of the profile write's transaction."""
+    now = datetime.now(timezone.utc)
+    await db.graph_outbox.update_one(
+        {"_id": user_id},
+        {
+            "$inc": {"seq": 1},
+            "$min": {"pending_since": now},
+            "$setOnInsert": {"attempts": 0, "next_attempt_at": now, "locked_until": None},
+        },
+        upsert=True,
+        session=session,
+    )
+
+
+async def _claim(db, now: datetime, lease_seconds: float) -> dict | None:
+    """Lease the oldest due entry so concurrent workers (one per uvicorn process) don't double-sync."""
+    return await db.graph_outbox.find_one_and_update(
+        {
+            "next_attempt_at": {"$lte": now},
+            "$or": [{"locked_until": None}, {"locked_until": {"$lte": now}}],
+        },
+        {"$set": {"locked_until": now + timedelta(seconds=lease_seconds)}},
+        sort=[("pending_since", 1)],
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+async def _process(db, entry: dict) -> bool:
+    settings = get_settings()
+    user_id = entry["_id"]
+    started = datetime.now(timezone.utc)
+    try:
+        profile = await db.profiles.find_one({"user_id": user_id}, {"_id": 0, "user_id": 1, "skills": 1, "gaps": 1})
+        if profile:
+            await reconcile_students([profile])
+    except Exception as e:
+        attempts = entry.get("attempts", 0) + 1
+        delay = min(settings.graph_sync_max_backoff_seconds, settings.graph_sync_backoff_seconds * 2 ** (attempts - 1))
+        GRAPH_SYNC_FAILURES.inc()
+        logger.warning(f"Graph sync for user={user_id} failed (attempt {attempts}), retrying in {delay:.0f}s: {e}")
+        await db.graph_outbox.update_one({"_id": user_id}, {"$set": {
+            "attempts": attempts,
+            "next_attempt_at": started + timedelta(seconds=delay),
+            "locked_until": None,
+            "last_error": str(e),
+        }})
+        return False
+
+    GRAPH_SYNC_DELAY_SECONDS.observe((started - _aware(entry["pending_since"])).total_seconds())
+    # Done — unless more changes were recorded while we were syncing
+    result = await db.graph_outbox.delete_one({"_id": user_id, "seq": entry["seq"]})
+    if result.deleted_count == 0:
+        await db.graph_outbox.update_one({"_id": user_id}, {"$set": {
+            "pending_since": started,
+            "attempts": 0,
+            "next_attempt_at": started,
+            "locked_until": None,
+        }})
+    return True
+
+
+async def drain_outbox(limit: int | None = None) -> int:
+    """Sync up to `limit` due students; returns how many were processed."""
+    settings = get_settings()
+    db = get_db()
+    processed = 0
+    for _ in range(limit or settings.graph_sync_batch_size):
+        entry = await _claim(db, datetime.now(timezone.utc), settings.graph_sync_lease_seconds)
+        if entry is None:
+            break
+        await _process(db, entry)
+        processed += 1
+    return processed
+
+
+async def outbox_stats() -> dict:
+    """Pending students and the age of the oldest unsynced change."""
+    db = get_db()
+    pending = await db.graph_outbox.count_documents({})
+    oldest = await db.graph_outbox.find_one({}, {"pending_since": 1}, sort=[("pending_since", 1)])
+    lag = (datetime.now(timezone.utc) - _aware(oldest["pending_since"])).total_seconds() if oldest else 0.0
+    GRAPH_OUTBOX_PENDING.set(pending)
+    GRAPH_OUTBOX_LAG_SECONDS.set(lag)
+    return {"pending": pending, "lag_seconds": lag}
+
+
+def _aware(ts: datetime) -> datetime:
+    # Motor returns naive UTC datetimes unless the client is tz_aware
+    return ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)
+
+
+async def _run() -> None:
+    settings = get_settings()
+    while True:
+        try:
+            processed = await drain_outbox()
+            await outbox_stats()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Graph sync worker iteration failed: {e}")
+            processed = 0
+        if processed < settings.graph_sync_batch_size:
+            await asyncio.sleep(settings.graph_sync_poll_seconds)
+
+
+def start_graph_sync_worker() -> None:
+    """Start the write-behind worker. Called from the app lifespan."""
+    global _worker
+    if _worker is None:
+        _worker = asyncio.create_task(_run())
+
+
+async def stop_graph_sync_worker() -> None:
+    global _worker
+    if _worker is None:
+        return
+    _worker.cancel()
+    try:
+        await _worker
+    except asyncio.CancelledError:
+        pass
+    _worker = None
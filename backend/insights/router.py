@@ -34,7 +34,7 @@ async def list_problems(difficulty: int = None, concept_id: str = None):
     if concept_id:
         query["concept_ids"] = concept_id
 
-    cursor = db.problems.find(query, {"_id": 0, "examples": 0}).sort("difficulty", 1)
+    cursor = db.problems.find(query, {"_id": 0, "examples": 0, "hidden_tests": 0}).sort("difficulty", 1)
     problems = await cursor.to_list(length=100)
     return {"problems": problems, "total": len(problems)}
 
@@ -42,7 +42,7 @@ async def list_problems(difficulty: int = None, concept_id: str = None):
 @problems_router.get("/{problem_id}")
 async def get_problem(problem_id: str):
     db = get_db()
-    problem = await db.problems.find_one({"id": problem_id}, {"_id": 0})
+    problem = await db.problems.find_one({"id": problem_id}, {"_id": 0, "hidden_tests": 0})
     if not problem:
         raise HTTPException(status_code=404, detail="Problem not found")
     return problem
@@ -0,0 +1,128 @@
+"""
+Per-provider circuit breaker — Perspectra
+
+Tracks the outcome and latency of the last `window` calls to a provider.
+The breaker opens (provider is skipped) when, over at least `min_calls`
+calls, the error rate or the p95 latency crosses its threshold. After
+`cooldown_seconds` one probe call is let through (half-open): success
+closes the breaker, failure re-opens it.
+
+`allow()` hands out a Permit that the caller passes back with the call's
+outcome, so only the probe's own outcome can close or re-open the breaker —
+not a call admitted before it opened, nor a cancelled hedge loser.
+"""
+
+import time
+from collections import deque
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpen(Exception):
+    """Every provider that could take the call has its breaker open."""
+
+
+class Permit:
+    """Admission for one call; pass it back to `record_*` with the call's outcome."""
+
+    __slots__ = ()
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        name: str,
+        window: int = 20,
+        min_calls: int = 5,
+        error_rate: float = 0.5,
+        latency_ms: float = 20000,
+        cooldown_seconds: float = 30,
+    ):
+        self.name = name
+        self.min_calls = min_calls
+        self.error_rate = error_rate
+        self.latency_ms = latency_ms
+        self.cooldown_seconds = cooldown_seconds
+        self._outcomes: deque[tuple[bool, float]] = deque(maxlen=window)  # (ok, latency_ms)
+        self._opened_at: float | None = None
+        self._probe: Permit | None = None   # the half-open probe in flight, if any
+        self.times_opened = 0
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return CLOSED
+        if time.monotonic() - self._opened_at >= self.cooldown_seconds:
+            return HALF_OPEN
+        return OPEN
+
+    def allow(self) -> Permit | None:
+        """A Permit if a call may be sent to this provider right now, else None."""
+        state = self.state
+        if state == CLOSED:
+            return Permit()
+        if state == HALF_OPEN and self._probe is None:
+            self._probe = Permit()
+            return self._probe
+        return None
+
+    def record_success(self, permit: Permit, latency_ms: float) -> None:
+        if self._opened_at is not None:
+            if permit is not self._probe:
+                return   # admitted before the breaker opened — says nothing about recovery
+            # Probe succeeded — start over with a clean window
+            self._close()
+        self._outcomes.append((True, latency_ms))
+        self._evaluate()
+
+    def record_failure(self, permit: Permit, latency_ms: float) -> None:
+        if self._opened_at is not None:
+            if permit is self._probe:
+                self._trip()   # failed probe — stay open for another cooldown
+            return
+        self._outcomes.append((False, latency_ms))
+        self._evaluate()
+
+    def record_cancelled(self, permit: Permit) -> None:
+        """A call was abandoned (e.g. lost a hedge race) — neither success nor failure."""
+        if permit is self._probe:
+            self._probe = None   # let another probe through
+
+    def p95_ms(self) -> float | None:
+        """p95 latency of successful calls in the window, if there are enough."""
+        latencies = sorted(ms for ok, ms in self._outcomes if ok)
+        if len(latencies) < self.min_calls:
+            return None
+        return latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+
+    def snapshot(self) -> dict:
+        calls = len(self._outcomes)
+        failures = sum(1 for ok, _ in self._outcomes if not ok)
+        return {
+            "state": self.state,
+            "calls": calls,
+            "error_rate": round(failures / calls, 3) if calls else 0.0,
+            "p95_ms": self.p95_ms(),
+            "times_opened": self.times_opened,
+        }
+
+    def _evaluate(self) -> None:
+        calls = len(self._outcomes)
+        if calls < self.min_calls:
+            return
+        failures = sum(1 for ok, _ in self._outcomes if not ok)
+        p95 = self.p95_ms()
+        if failures / calls >= self.error_rate or (p95 is not None and p95 >= self.latency_ms):
+            self._trip()
+
+    def _trip(self) -> None:
+        self._opened_at = time.monotonic()
+        self._probe = None
+        self.times_opened += 1
+
+    def _close(self) -> None:
+        self._opened_at = None
+        self._probe = None
+        self._outcomes.clear()
@@ -0,0 +1,117 @@
+"""
+LLM response cache — Perspectra
+
+Two tiers, checked in order:
+  1. In-process LRU with a per-entry TTL (per worker, no I/O)
+  2. MongoDB `llm_cache` collection, expired by a TTL index on `expires_at`
+     (shared across workers and restarts)
+
+Keys are a SHA-256 of the normalised request, so identical
+(system, prompt, provider, model, temperature, ...) tuples share one entry.
+The Mongo tier is best-effort: any error there degrades to a cache miss.
+"""
+
+import copy
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from db.mongo import get_db
+
+logger = logging.getLogger(__name__)
+
+
+def make_cache_key(**parts: Any) -> str:
+    """Content-addressed key for an LLM request. Strings are whitespace-trimmed."""
+    normalised = {k: v.strip() if isinstance(v, str) else v for k, v in parts.items()}
+    blob = json.dumps(normalised, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Two-tier (memory LRU + Mongo TTL) cache for LLM responses."""
+
+    def __init__(self, max_entries: int = 1000, ttl_seconds: int = 3600, persist: bool = True):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.persist = persist
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self.memory_hits = 0
+        self.mongo_hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    async def get(self, key: str) -> Any | None:
+        """Return a copy of the cached value, or None on a miss."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+                return copy.deepcopy(value)
+            del self._entries[key]
+
+        if self.persist:
+            try:
+                doc = await get_db().llm_cache.find_one(
+                    {"_id": key, "expires_at": {"$gt": datetime.now(timezone.utc)}}
+                )
+            except Exception as e:
+                logger.debug(f"LLM cache lookup failed: {e}")
+                doc = None
+            if doc:
+                value = json.loads(doc["value"])
+                self._remember(key, value)
+                self.mongo_hits += 1
+                return copy.deepcopy(value)
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, value: Any, prompt_version: str = "") -> None:
+        self._remember(key, copy.deepcopy(value))
+        self.stores += 1
+        if not self.persist:
+            return
+        now = datetime.now(timezone.utc)
+        try:
+            await get_db().llm_cache.replace_one(
+                {"_id": key},
+                {
+                    "_id": key,
+                    "value": json.dumps(value),
+                    "prompt_version": prompt_version,
+                    "created_at": now,
+                    "expires_at": now + timedelta(seconds=self.ttl_seconds),
+                },
+                upsert=True,
+            )
+        except Exception as e:
+            logger.debug(f"LLM cache store failed: {e}")
+
+    def _remember(self, key: str, value: Any) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop the in-process tier. Mongo entries expire via their TTL index."""
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        hits = self.memory_hits + self.mongo_hits
+        total = hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "memory_hits": self.memory_hits,
+            "mongo_hits": self.mongo_hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "hit_rate": round(hits / total, 4) if total else 0.0,
+        }
@@ -1,18 +1,64 @@
 """
 Unified LLM Client — Perspectra
-Supports OpenRouter, Groq, and any OpenAI-compatible provider.
-Falls back automatically if the primary provider fails.
+Supports OpenRouter, Groq, any OpenAI-compatible provider, and a local
+deterministic `mock` provider for load testing.
+Falls back automatically if the primary provider fails, skips providers
+whose circuit breaker is open, and can optionally hedge a slow primary by
+racing the fallback against it.
+
+Calls honour the deadline set by the route (see llm/deadline.py): retries
+and fallbacks only happen while time remains, and only transient errors
+are retried.
+
+Each provider gets one long-lived AsyncOpenAI client backed by a pooled
+httpx.AsyncClient, so TLS handshakes are paid once per connection rather
+than once per call. Call `await llm.aclose()` on shutdown.
+
+Agents pass the stable part of their prompt (problem + profile) as `prefix=`.
+It is sent first in the user message, right after the system prompt, so
+providers with automatic prefix caching (OpenAI, Groq) reuse it; providers
+that need an explicit marker (`prompt_cache_control`) get a cache_control
+breakpoint after it.
 """
 
-import json
+import asyncio
+import copy
 import logging
-from typing import Any
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, TypeVar
+import httpx
 from openai import AsyncOpenAI
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
+from pydantic import BaseModel, ValidationError
+from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception
 from config import get_settings
+from llm.breaker import CircuitBreaker, CircuitOpen, Permit
+from llm.cache import ResponseCache, make_cache_key
+from llm import deadline, metrics
+from llm.json_repair import parse_json_lenient
+from llm.json_stream import IncrementalJSONParser
+from llm.mock import MockAsyncClient
+from llm.scheduler import PRIORITY_INTERACTIVE, ProviderScheduler
+from prompts.builder import CHARS_PER_TOKEN, estimate_tokens
+from prompts.loader import prompt_version as system_prompt_version
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+_MIN_BACKOFF_SECONDS = 1
+
+
+class _Flight:
+    """One shared provider call and the callers currently waiting on it."""
+
+    __slots__ = ("task", "budget", "waiters")
+
+    def __init__(self, task: asyncio.Task, budget: deadline.Budget):
+        self.task = task
+        self.budget = budget
+        self.waiters = 0
+
+
 PROVIDER_CONFIGS = {
     "openrouter": {
         "base_url": "https://openrouter.ai/api/v1",
@@ -21,6 +67,8 @@ PROVIDER_CONFIGS = {
             "HTTP-Referer": "https://perspectra.app",
             "X-Title": "Perspectra",
         },
+        # Forwarded to Anthropic / Gemini models, ignored by the rest
+        "prompt_cache_control": True,
     },
     "groq": {
         "base_url": "https://api.groq.com/openai/v1",
@@ -32,17 +80,87 @@ PROVIDER_CONFIGS = {
         "api_key_field": "openai_api_key",
         "extra_headers": {},
     },
+    # Local, no network — see llm/mock.py
+    "mock": {
+        "base_url": None,
+        "api_key_field": None,
+        "extra_headers": {},
+    },
 }
 
 
-def _build_client(provider: str) -> AsyncOpenAI:
+def _count_retry(retry_state) -> None:
+    """tenacity before_sleep hook — count a retry of `_call`."""
+    kwargs = retry_state.kwargs
+    metrics.RETRIES.labels(
+        kwargs.get("agent", "unknown"), kwargs.get("prompt_version", ""), kwargs.get("provider", "?"),
+    ).inc()
+
+
+def _messages(system: str, prompt: str, prefix: str = "") -> list[dict]:
+    """Chat messages for one call — the stable `prefix` leads the user turn as its own part."""
+    if not prefix:
+        content: str | list[dict] = prompt
+    else:
+        content = [
+            {"type": "text", "text": prefix, "cache_control": {"type": "ephemeral"}},
+            {"type": "text", "text": prompt},
+        ]
+    return [
+        {"role": "system", "content": system},
+        {"role": "user", "content": content},
+    ]
+
+
+def _for_provider(provider: str, messages: list[dict]) -> list[dict]:
+    """Keep cache_control parts only for providers that accept them; flatten them to text otherwise."""
+    if PROVIDER_CONFIGS[provider].get("prompt_cache_control"):
+        return messages
+    return [
+        {**m, "content": _message_text(m)} if isinstance(m.get("content"), list) else m
+        for m in messages
+    ]
+
+
+def _message_text(message: dict) -> str:
+    content = message.get("content") or ""
+    if isinstance(content, list):
+        return "\n\n".join(part.get("text", "") for part in content)
+    return content
+
+
+def _deadline_spent(retry_state) -> bool:
+    """tenacity stop hook — no retry once less than the minimum backoff remains."""
+    left = deadline.remaining()
+    return left is not None and left < _MIN_BACKOFF_SECONDS
+
+
+def _build_http_client() -> httpx.AsyncClient:
+    """Pooled HTTP transport shared by every request to one provider."""
+    settings = get_settings()
+    return httpx.AsyncClient(
+        http2=settings.llm_http2,
+        timeout=httpx.Timeout(settings.llm_http_timeout, connect=settings.llm_http_connect_timeout),
+        limits=httpx.Limits(
+            max_connections=settings.llm_http_max_connections,
+            max_keepalive_connections=settings.llm_http_max_keepalive,
+            keepalive_expiry=settings.llm_http_keepalive_expiry,
+        ),
+    )
+
+
+def _build_client(provider: str) -> AsyncOpenAI | MockAsyncClient:
     settings = get_settings()
+    if provider == "mock":
+        return MockAsyncClient(settings)
     cfg = PROVIDER_CONFIGS[provider]
     api_key = getattr(settings, cfg["api_key_field"])
     return AsyncOpenAI(
         api_key=api_key,
         base_url=cfg["base_url"],
         default_headers=cfg.get("extra_headers", {}),
+        http_client=_build_http_client(),
+        max_retries=0,  # retries are ours (tenacity in _call), bounded by the request deadline
     )
 
 
@@ -54,16 +172,140 @@ class LLMClient:
         client = LLMClient()
         text = await client.complete("Explain recursion", system="You are a tutor")
         data = await client.complete_json("Analyze this code", system="...", schema_hint="...")
+        async for token in client.complete_stream("Give me a hint", system="..."):
+            ...
     """
 
     def __init__(self):
         self.settings = get_settings()
+        self._clients: dict[str, AsyncOpenAI | MockAsyncClient] = {}
+        self.cache = ResponseCache(
+            max_entries=self.settings.llm_cache_max_entries,
+            ttl_seconds=self.settings.llm_cache_ttl_seconds,
+            persist=self.settings.llm_cache_persist,
+        )
+        self.breakers: dict[str, CircuitBreaker] = {}
+        self.schedulers: dict[str, ProviderScheduler] = {}
+        self._inflight: dict[str, _Flight] = {}
+        self.coalesced_calls = 0
+
+    def _get_client(self, provider: str) -> AsyncOpenAI | MockAsyncClient:
+        """Return the persistent client for `provider`, creating it on first use."""
+        client = self._clients.get(provider)
+        if client is None:
+            client = _build_client(provider)
+            self._clients[provider] = client
+        return client
+
+    def _breaker(self, provider: str) -> CircuitBreaker:
+        breaker = self.breakers.get(provider)
+        if breaker is None:
+            settings = self.settings
+            breaker = CircuitBreaker(
+                provider,
+                window=settings.llm_breaker_window,
+                min_calls=settings.llm_breaker_min_calls,
+                error_rate=settings.llm_breaker_error_rate,
+                latency_ms=settings.llm_breaker_latency_ms,
+                cooldown_seconds=settings.llm_breaker_cooldown_seconds,
+            )
+            self.breakers[provider] = breaker
+        return breaker
+
+    def _scheduler(self, provider: str) -> ProviderScheduler:
+        scheduler = self.schedulers.get(provider)
+        if scheduler is None:
+            settings = self.settings
+            limits = settings.llm_provider_limits.get(provider, {})
+            scheduler = ProviderScheduler(
+                provider,
+                max_concurrency=limits.get("max_concurrency", settings.llm_max_concurrency),
+                tokens_per_minute=limits.get("tokens_per_minute", settings.llm_tokens_per_minute),
+            )
+            self.schedulers[provider] = scheduler
+        return scheduler
+
+    def _fingerprint(self, kind: str, **parts: Any) -> str:
+        """Content hash identifying a request — shared by the cache and single-flight."""
+        return make_cache_key(
+            kind=kind,
+            provider=self.settings.llm_provider,
+            model=self.settings.llm_model,
+            **parts,
+        )
+
+    def _use_cache(self, cache: bool | None) -> bool:
+        return self.settings.llm_cache_enabled if cache is None else cache
+
+    async def _single_flight(
+        self, key: str, call: Callable[[], Awaitable[T]], agent: str = "unknown", prompt_version: str = "",
+    ) -> T:
+        """
+        Collapse concurrent identical requests into one provider round-trip.
+        The first caller starts the call; later callers with the same key await
+        the same task. The call runs under the latest deadline of the callers
+        waiting on it and is cancelled once all of them have gone. Every caller
+        gets its own copy of the result.
+        """
+        if not self.settings.llm_coalesce_enabled:
+            return await call()
+
+        flight = self._inflight.get(key)
+        if flight is not None:
+            self.coalesced_calls += 1
+            metrics.COALESCED.labels(agent, prompt_version).inc()
+            flight.budget.extend()
+        else:
+            budget = deadline.shared()
+            with deadline.using(budget):
+                flight = _Flight(asyncio.ensure_future(call()), budget)
+            self._inflight[key] = flight
+            flight.task.add_done_callback(lambda _: self._forget_inflight(key, flight))
+
+        flight.waiters += 1
+        try:
+            # shield: one caller leaving must not cancel the call the others wait on
+            result = await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                # Nobody is left to read the result — free the scheduler slot
+                self._forget_inflight(key, flight)
+                flight.task.cancel()
+        return copy.deepcopy(result)
+
+    def _forget_inflight(self, key: str, flight: _Flight) -> None:
+        if self._inflight.get(key) is flight:
+            del self._inflight[key]
+        task = flight.task
+        if task.done() and not task.cancelled():
+            task.exception()  # mark retrieved even if every waiter went away
+
+    def stats(self) -> dict:
+        """Snapshot of cache, breaker and coalescing counters."""
+        return {
+            "cache": self.cache.stats(),
+            "breakers": {name: b.snapshot() for name, b in self.breakers.items()},
+            "schedulers": {name: s.snapshot() for name, s in self.schedulers.items()},
+            "inflight": len(self._inflight),
+            "coalesced_calls": self.coalesced_calls,
+        }
+
+    async def aclose(self) -> None:
+        """Close every pooled provider client. Called from the app lifespan."""
+        clients, self._clients = self._clients, {}
+        for provider, client in clients.items():
+            try:
+                await client.close()
+            except Exception as e:
+                logger.warning(f"Closing LLM client [{provider}] failed: {e}")
 
     @retry(
-        stop=stop_after_attempt(2),
-        wait=wait_exponential(multiplier=1, min=1, max=5),
-        retry=retry_if_exception_type(Exception),
-        reraise=False,
+        stop=stop_after_attempt(2) | _deadline_spent,
+        wait=wait_exponential(multiplier=1, min=_MIN_BACKOFF_SECONDS, max=5),
+        retry=retry_if_exception(deadline.is_retryable),
+        before_sleep=_count_retry,
+        reraise=True,
     )
     async def _call(
         self,
@@ -73,67 +315,401 @@ class LLMClient:
         json_mode: bool = False,
         temperature: float = 0.7,
         max_tokens: int = 2048,
+        priority: str = PRIORITY_INTERACTIVE,
+        agent: str = "unknown",
+        prompt_version: str = "",
     ) -> str:
-        client = _build_client(provider)
+        client = self._get_client(provider)
         kwargs: dict[str, Any] = {
             "model": model,
-            "messages": messages,
+            "messages": _for_provider(provider, messages),
             "temperature": temperature,
             "max_tokens": max_tokens,
         }
         if json_mode:
             kwargs["response_format"] = {"type": "json_object"}
+        deadline.check(f"calling [{provider}]")
+        left = deadline.remaining()
+        if left is not None:
+            kwargs["timeout"] = min(left, self.settings.llm_http_timeout)
 
-        response = await client.chat.completions.create(**kwargs)
+        async with self._scheduler(provider).slot(priority, _estimate_tokens(messages, max_tokens)) as slot:
+            started = time.perf_counter()
+            try:
+                response = await client.chat.completions.create(**kwargs)
+            except Exception as e:
+                metrics.ERRORS.labels(agent, prompt_version, provider, type(e).__name__).inc()
+                raise
+            metrics.REQUEST_SECONDS.labels(agent, prompt_version, provider, model, "complete").observe(time.perf_counter() - started)
+            usage = response.usage
+            if usage:
+                metrics.PROMPT_TOKENS.labels(agent, prompt_version, provider, model).inc(usage.prompt_tokens or 0)
+                metrics.COMPLETION_TOKENS.labels(agent, prompt_version, provider, model).inc(usage.completion_tokens or 0)
+                details = getattr(usage, "prompt_tokens_details", None)
+                metrics.CACHED_PROMPT_TOKENS.labels(agent, prompt_version, provider, model).inc(getattr(details, "cached_tokens", None) or 0)
+            slot.settle(usage.total_tokens if usage else None)
         return response.choices[0].message.content or ""
 
+    async def _attempt(self, provider: str, model: str, op: Callable[[str, str], Awaitable[T]], permit: Permit) -> T:
+        """Run `op` against one provider, feeding the outcome to its circuit breaker under `permit`."""
+        breaker = self._breaker(provider)
+        started = time.perf_counter()
+        try:
+            result = await op(provider, model)
+        except (asyncio.CancelledError, deadline.DeadlineExceeded):
+            # Our own time budget ran out — not the provider's fault
+            breaker.record_cancelled(permit)
+            raise
+        except Exception:
+            breaker.record_failure(permit, (time.perf_counter() - started) * 1000)
+            raise
+        breaker.record_success(permit, (time.perf_counter() - started) * 1000)
+        return result
+
+    async def _with_fallback(
+        self, op: Callable[[str, str], Awaitable[T]], agent: str = "unknown", prompt_version: str = "",
+    ) -> T:
+        """
+        Run `op(provider, model)` on the primary, falling back on failure.
+        An open breaker sends the call straight to the fallback; with hedging
+        on, a slow primary is raced against the fallback.
+        """
+        settings = self.settings
+        primary = (settings.llm_provider, settings.llm_model)
+        fallback = (settings.llm_fallback_provider, settings.llm_fallback_model)
+
+        permit = self._breaker(primary[0]).allow()
+        if permit is None:
+            fallback_permit = self._check_fallback(primary, fallback)
+            logger.warning(f"Circuit open for [{primary[0]}]. Routing to [{fallback[0]}]")
+            metrics.FALLBACKS.labels(agent, prompt_version, fallback[0], "circuit_open").inc()
+            return await self._attempt(*fallback, op, fallback_permit)
+
+        if settings.llm_hedge_enabled and fallback[0] != primary[0]:
+            return await self._hedged(primary, fallback, op, permit, agent, prompt_version)
+
+        try:
+            return await self._attempt(*primary, op, permit)
+        except deadline.DeadlineExceeded:
+            raise
+        except Exception as e:
+            deadline.check(f"falling back to [{fallback[0]}]")
+            fallback_permit = self._check_fallback(primary, fallback, e)
+            logger.warning(f"Primary LLM [{primary[0]}] failed: {e}. Falling back to [{fallback[0]}]")
+            metrics.FALLBACKS.labels(agent, prompt_version, fallback[0], "error").inc()
+            return await self._attempt(*fallback, op, fallback_permit)
+
+    def _check_fallback(
+        self, primary: tuple[str, str], fallback: tuple[str, str], cause: BaseException | None = None,
+    ) -> Permit:
+        """The fallback breaker's permit; raises CircuitOpen instead when that breaker is open too."""
+        permit = self._breaker(fallback[0]).allow()
+        if permit is None:
+            raise CircuitOpen(f"Circuits open for [{primary[0]}] and [{fallback[0]}]") from cause
+        return permit
+
+    async def _hedged(
+        self,
+        primary: tuple[str, str],
+        fallback: tuple[str, str],
+        op: Callable[[str, str], Awaitable[T]],
+        permit: Permit,
+        agent: str = "unknown",
+        prompt_version: str = "",
+    ) -> T:
+        """Start the fallback if the primary misses the hedge deadline; first success wins."""
+        pending = {asyncio.create_task(self._attempt(*primary, op, permit))}
+        hedged = False
+        error: BaseException | None = None
+        try:
+            done, pending = await asyncio.wait(pending, timeout=self.settings.llm_hedge_after_ms / 1000)
+            hedge_permit = self._breaker(fallback[0]).allow() if pending else None
+            if hedge_permit is not None:
+                logger.info(f"Primary LLM [{primary[0]}] slow. Hedging with [{fallback[0]}]")
+                metrics.FALLBACKS.labels(agent, prompt_version, fallback[0], "hedge").inc()
+                pending.add(asyncio.create_task(self._attempt(*fallback, op, hedge_permit)))
+                hedged = True
+            while True:
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+                if not pending:
+                    break
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in pending:
+                task.cancel()
+
+        if hedged or isinstance(error, deadline.DeadlineExceeded):
+            raise error
+        deadline.check(f"falling back to [{fallback[0]}]")
+        fallback_permit = self._check_fallback(primary, fallback, error)
+        logger.warning(f"Primary LLM [{primary[0]}] failed: {error}. Falling back to [{fallback[0]}]")
+        metrics.FALLBACKS.labels(agent, prompt_version, fallback[0], "error").inc()
+        return await self._attempt(*fallback, op, fallback_permit)
+
+    async def _stream(
+        self,
+        provider: str,
+        model: str,
+        messages: list[dict],
+        temperature: float = 0.7,
+        max_tokens: int = 2048,
+        priority: str = PRIORITY_INTERACTIVE,
+        json_mode: bool = False,
+        agent: str = "unknown",
+        prompt_version: str = "",
+    ) -> AsyncIterator[str]:
+        """Yield content deltas from a streamed chat completion. No retries."""
+        client = self._get_client(provider)
+        kwargs: dict[str, Any] = {
+            "model": model,
+            "messages": _for_provider(provider, messages),
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "stream": True,
+        }
+        if json_mode:
+            kwargs["response_format"] = {"type": "json_object"}
+
+        async with self._scheduler(provider).slot(priority, _estimate_tokens(messages, max_tokens)):
+            started = time.perf_counter()
+            first_token_at: float | None = None
+            completion_chars = 0
+            try:
+                stream = await client.chat.completions.create(**kwargs)
+                try:
+                    async for chunk in stream:
+                        if not chunk.choices:
+                            continue
+                        delta = chunk.choices[0].delta.content
+                        if delta:
+                            if first_token_at is None:
+                                first_token_at = time.perf_counter()
+                                metrics.TTFT_SECONDS.labels(agent, prompt_version, provider, model).observe(first_token_at - started)
+                            completion_chars += len(delta)
+                            yield delta
+                finally:
+                    await stream.close()
+            except Exception as e:
+                metrics.ERRORS.labels(agent, prompt_version, provider, type(e).__name__).inc()
+                raise
+            metrics.REQUEST_SECONDS.labels(agent, prompt_version, provider, model, "stream").observe(time.perf_counter() - started)
+            # Streams don't report usage on every provider — use the local estimate
+            metrics.PROMPT_TOKENS.labels(agent, prompt_version, provider, model).inc(_estimate_tokens(messages, 0))
+            metrics.COMPLETION_TOKENS.labels(agent, prompt_version, provider, model).inc(completion_chars // CHARS_PER_TOKEN)
+
     async def complete(
         self,
         prompt: str,
         system: str = "You are a helpful assistant.",
+        prefix: str = "",
         temperature: float = 0.7,
         max_tokens: int = 2048,
+        cache: bool | None = None,
+        priority: str = PRIORITY_INTERACTIVE,
+        agent: str = "unknown",
     ) -> str:
-        """Plain text completion with automatic fallback."""
-        messages = [
-            {"role": "system", "content": system},
-            {"role": "user", "content": prompt},
-        ]
-        settings = self.settings
-        try:
+        """
+        Plain text completion with automatic fallback.
+        `cache` overrides the `llm_cache_enabled` setting for this call;
+        `priority` ("interactive" | "background") orders it in the provider queue;
+        `agent` labels its metrics; `prefix` is the stable, provider-cacheable
+        start of the prompt (the prompt itself follows it).
+        """
+        prompt_version = system_prompt_version(system)
+        key = self._fingerprint(
+            "text", system=system, prompt_version=prompt_version, prefix=prefix, prompt=prompt, temperature=temperature, max_tokens=max_tokens,
+        )
+        use_cache = self._use_cache(cache)
+        if use_cache:
+            cached = await self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        messages = _messages(system, prompt, prefix)
+
+        async def attempt(provider: str, model: str) -> str:
             return await self._call(
-                provider=settings.llm_provider,
-                model=settings.llm_model,
+                provider=provider,
+                model=model,
                 messages=messages,
                 temperature=temperature,
                 max_tokens=max_tokens,
+                priority=priority,
+                agent=agent,
+                prompt_version=prompt_version,
             )
-        except Exception as e:
-            logger.warning(f"Primary LLM [{settings.llm_provider}] failed: {e}. Falling back to [{settings.llm_fallback_provider}]")
-            return await self._call(
+
+        text = await _within_deadline(self._single_flight(
+            key, lambda: self._with_fallback(attempt, agent, prompt_version), agent, prompt_version,
+        ))
+
+        if use_cache and text:
+            await self.cache.set(key, text, prompt_version=prompt_version)
+        return text
+
+    async def complete_stream(
+        self,
+        prompt: str,
+        system: str = "You are a helpful assistant.",
+        prefix: str = "",
+        temperature: float = 0.7,
+        max_tokens: int = 2048,
+        priority: str = PRIORITY_INTERACTIVE,
+        json_mode: bool = False,
+        agent: str = "unknown",
+    ) -> AsyncIterator[str]:
+        """
+        Streaming text completion — yields tokens as the provider emits them.
+        Falls back to the secondary provider only if the primary fails before
+        its first token; once output has been sent, errors propagate.
+        """
+        messages = _messages(system, prompt, prefix)
+        prompt_version = system_prompt_version(system)
+        settings = self.settings
+        breaker = self._breaker(settings.llm_provider)
+        permit = breaker.allow()
+        if permit is not None:
+            started = False
+            t0 = time.perf_counter()
+            try:
+                async for token in self._stream(
+                    provider=settings.llm_provider,
+                    model=settings.llm_model,
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    priority=priority,
+                    agent=agent,
+                    prompt_version=prompt_version,
+                    json_mode=json_mode,
+                ):
+                    started = True
+                    yield token
+                breaker.record_success(permit, (time.perf_counter() - t0) * 1000)
+                return
+            except (GeneratorExit, asyncio.CancelledError):
+                breaker.record_cancelled(permit)
+                raise
+            except Exception as e:
+                breaker.record_failure(permit, (time.perf_counter() - t0) * 1000)
+                if started:
+                    raise
+                fallback_permit = self._check_fallback(
+                    (settings.llm_provider, settings.llm_model),
+                    (settings.llm_fallback_provider, settings.llm_fallback_model),
+                    e,
+                )
+                logger.warning(f"Primary LLM stream [{settings.llm_provider}] failed: {e}. Falling back to [{settings.llm_fallback_provider}]")
+                metrics.FALLBACKS.labels(agent, prompt_version, settings.llm_fallback_provider, "error").inc()
+        else:
+            fallback_permit = self._check_fallback(
+                (settings.llm_provider, settings.llm_model),
+                (settings.llm_fallback_provider, settings.llm_fallback_model),
+            )
+            logger.warning(f"Circuit open for [{settings.llm_provider}]. Streaming from [{settings.llm_fallback_provider}]")
+            metrics.FALLBACKS.labels(agent, prompt_version, settings.llm_fallback_provider, "circuit_open").inc()
+
+        # _check_fallback let this call through the fallback's breaker — report back to it
+        fallback_breaker = self._breaker(settings.llm_fallback_provider)
+        t0 = time.perf_counter()
+        try:
+            async for token in self._stream(
                 provider=settings.llm_fallback_provider,
                 model=settings.llm_fallback_model,
                 messages=messages,
                 temperature=temperature,
                 max_tokens=max_tokens,
-            )
+                priority=priority,
+                agent=agent,
+                prompt_version=prompt_version,
+                json_mode=json_mode,
+            ):
+                yield token
+        except (GeneratorExit, asyncio.CancelledError, deadline.DeadlineExceeded):
+            fallback_breaker.record_cancelled(fallback_permit)
+            raise
+        except Exception:
+            fallback_breaker.record_failure(fallback_permit, (time.perf_counter() - t0) * 1000)
+            raise
+        fallback_breaker.record_success(fallback_permit, (time.perf_counter() - t0) * 1000)
+
+    async def complete_json_stream(
+        self,
+        prompt: str,
+        system: str = "You are a helpful assistant. Always respond with valid JSON.",
+        prefix: str = "",
+        temperature: float = 0.3,
+        max_tokens: int = 3000,
+        priority: str = PRIORITY_INTERACTIVE,
+        agent: str = "unknown",
+    ) -> AsyncIterator[tuple[str, Any]]:
+        """
+        Streaming JSON completion — yields (key, value) for each top-level key
+        of the response object as soon as its value has been generated.
+        Keys the incremental parser couldn't read are recovered from the full
+        text once the stream ends.
+        """
+        prompt_version = system_prompt_version(system)
+        parser = IncrementalJSONParser()
+        async for token in self.complete_stream(
+            prompt,
+            system=system,
+            prefix=prefix,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            priority=priority,
+            agent=agent,
+            json_mode=True,
+        ):
+            for key, value in parser.feed(token):
+                yield key, value
+
+        try:
+            full, _ = parse_json_lenient(parser.text)
+        except ValueError:
+            metrics.JSON_PARSE_FAILURES.labels(agent, prompt_version, self.settings.llm_provider).inc()
+            if not parser.parsed:
+                raise
+            return
+        for key, value in full.items():
+            if key not in parser.parsed:
+                yield key, value
 
     async def complete_json(
         self,
         prompt: str,
         system: str = "You are a helpful assistant. Always respond with valid JSON.",
+        prefix: str = "",
         temperature: float = 0.3,
         max_tokens: int = 3000,
+        cache: bool | None = None,
+        priority: str = PRIORITY_INTERACTIVE,
+        agent: str = "unknown",
+        schema: type[BaseModel] | None = None,
     ) -> dict:
         """
         JSON-mode completion. Returns a parsed dict.
         Falls back to text parsing if provider doesn't support json_mode.
+        Malformed output is repaired locally (see llm/json_repair.py); the
+        provider is only called again if repair fails. With `schema`, the
+        result is validated against that Pydantic model and its defaults
+        filled in. `cache`, `priority` and `agent` behave as in `complete`.
         """
-        messages = [
-            {"role": "system", "content": system},
-            {"role": "user", "content": prompt},
-        ]
-        settings = self.settings
+        prompt_version = system_prompt_version(system)
+        key = self._fingerprint(
+            "json", system=system, prompt_version=prompt_version, prefix=prefix, prompt=prompt, temperature=temperature, max_tokens=max_tokens,
+            schema=schema.__name__ if schema else None,
+        )
+        use_cache = self._use_cache(cache)
+        if use_cache:
+            cached = await self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        messages = _messages(system, prompt, prefix)
 
         async def attempt(provider: str, model: str) -> dict:
             try:
@@ -144,9 +720,15 @@ class LLMClient:
                     json_mode=True,
                     temperature=temperature,
                     max_tokens=max_tokens,
+                    priority=priority,
+                    agent=agent,
+                    prompt_version=prompt_version,
                 )
-            except Exception:
-                # Some providers don't support json_mode, retry without
+            except Exception as e:
+                # Some providers don't support json_mode (a 4xx), retry without.
+                # Transient errors were already retried in _call — don't double up.
+                if deadline.is_retryable(e) or isinstance(e, deadline.DeadlineExceeded):
+                    raise
                 raw = await self._call(
                     provider=provider,
                     model=model,
@@ -154,25 +736,53 @@ class LLMClient:
                     json_mode=False,
                     temperature=temperature,
                     max_tokens=max_tokens,
+                    priority=priority,
+                    agent=agent,
+                    prompt_version=prompt_version,
                 )
-            # Extract JSON from response
-            return _extract_json(raw)
+            # Extract JSON from response, repairing it locally if needed
+            try:
+                data, stage = parse_json_lenient(raw)
+            except ValueError:
+                metrics.JSON_PARSE_FAILURES.labels(agent, prompt_version, provider).inc()
+                raise
+            if stage != "strict":
+                metrics.JSON_REPAIRS.labels(agent, prompt_version, provider, stage).inc()
+            if schema is None:
+                return data
+            try:
+                return schema.model_validate(data).model_dump()
+            except ValidationError:
+                metrics.SCHEMA_FAILURES.labels(agent, prompt_version, provider).inc()
+                raise
 
-        try:
-            return await attempt(settings.llm_provider, settings.llm_model)
-        except Exception as e:
-            logger.warning(f"Primary JSON call failed: {e}. Falling back.")
-            return await attempt(settings.llm_fallback_provider, settings.llm_fallback_model)
-
-
-def _extract_json(text: str) -> dict:
-    """Extract JSON from LLM output, handling markdown code fences."""
-    text = text.strip()
-    # Strip ```json ... ``` fences
-    if text.startswith("```"):
-        lines = text.split("\n")
-        text = "\n".join(lines[1:-1]) if lines[-1].strip() == "```" else "\n".join(lines[1:])
-    return json.loads(text)
+        data = await _within_deadline(self._single_flight(
+            key, lambda: self._with_fallback(attempt, agent, prompt_version), agent, prompt_version,
+        ))
+
+        if use_cache:
+            await self.cache.set(key, data, prompt_version=prompt_version)
+        return data
+
+
+async def _within_deadline(call: Awaitable[T]) -> T:
+    """Await `call`, giving up with DeadlineExceeded when the request deadline passes."""
+    left = deadline.remaining()
+    if left is None:
+        return await call
+    if left <= 0:
+        if asyncio.iscoroutine(call):
+            call.close()
+        raise deadline.DeadlineExceeded("Deadline exceeded before the LLM call started")
+    try:
+        return await asyncio.wait_for(call, timeout=left)
+    except asyncio.TimeoutError:
+        raise deadline.DeadlineExceeded(f"LLM call did not finish within the {left:.1f}s left") from None
+
+
+def _estimate_tokens(messages: list[dict], max_tokens: int) -> int:
+    """Rough token cost of a call for the scheduler's budget."""
+    return sum(estimate_tokens(_message_text(m)) for m in messages) + max_tokens
 
 
 # Singleton — import and use anywhere
@@ -0,0 +1,114 @@
+"""
+Request deadlines and retry classification — Perspectra
+
+A route opens `with deadline(seconds):` around its agent call. Everything
+below it — the scheduler queue, tenacity retries, the json_mode retry, the
+fallback provider and hedging — shares that one budget via a contextvar,
+so a request can no longer stack retries past what the client will wait.
+
+    with deadline(settings.deadline_review_seconds):
+        review = await run_reviewer(...)
+
+Identical concurrent calls share one provider round-trip (single-flight in
+llm/client.py). That call runs under a `Budget` stretched to the latest
+deadline among the callers waiting on it, so a patient caller is not cut
+short by an impatient one that happened to arrive first.
+
+Only transient provider failures (timeouts, connection errors, 429, 5xx,
+every breaker open) are retried; 4xx errors and bad output are not.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
+
+import httpx
+import openai
+
+from llm.breaker import CircuitOpen
+from llm.mock import MockProviderError
+
+
+class Budget:
+    """An absolute deadline (time.monotonic), or None for no limit. Shared calls move it out as callers join."""
+
+    __slots__ = ("at",)
+
+    def __init__(self, at: float | None):
+        self.at = at
+
+    def extend(self) -> None:
+        """Stretch to cover the current context's deadline; a caller without one lifts the limit."""
+        current = _deadline.get()
+        if self.at is not None:
+            self.at = None if current is None or current.at is None else max(self.at, current.at)
+
+
+_deadline: ContextVar[Budget | None] = ContextVar("llm_deadline", default=None)
+
+
+class DeadlineExceeded(Exception):
+    """The request's time budget ran out before an LLM call could finish."""
+
+
+@contextmanager
+def deadline(seconds: float | None) -> Iterator[None]:
+    """Bound LLM calls inside the block to `seconds` from now. Nested deadlines only tighten."""
+    if not seconds or seconds <= 0:
+        yield
+        return
+    at = time.monotonic() + seconds
+    outer = _deadline.get()
+    if outer is not None and outer.at is not None:
+        at = min(at, outer.at)
+    token = _deadline.set(Budget(at))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def shared() -> Budget:
+    """A movable copy of the current deadline, for a call other callers may join."""
+    current = _deadline.get()
+    return Budget(None if current is None else current.at)
+
+
+@contextmanager
+def using(budget: Budget) -> Iterator[Budget]:
+    """Run the block (and tasks created in it) under `budget` instead of the caller's deadline."""
+    token = _deadline.set(budget)
+    try:
+        yield budget
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> float | None:
+    """Seconds left on the current deadline, or None when there is none."""
+    budget = _deadline.get()
+    return None if budget is None or budget.at is None else budget.at - time.monotonic()
+
+
+def check(what: str = "LLM call") -> None:
+    """Raise DeadlineExceeded if the current deadline has passed."""
+    left = remaining()
+    if left is not None and left <= 0:
+        raise DeadlineExceeded(f"Deadline exceeded before {what}")
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """True for transient provider failures worth another attempt."""
+    if isinstance(exc, openai.APIStatusError):
+        return exc.status_code in (408, 409, 429) or exc.status_code >= 500
+    return isinstance(exc, (openai.APIConnectionError, httpx.TransportError, MockProviderError, CircuitOpen))
+
+
+def http_status_for(exc: BaseException) -> int:
+    """Status a route should return for a failed agent call: 504 out of time, 503 providers down."""
+    if isinstance(exc, DeadlineExceeded):
+        return 504
+    if is_retryable(exc):
+        return 503
+    return 500
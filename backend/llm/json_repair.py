@@ -0,0 +1,137 @@
+"""
+Local JSON repair — Perspectra
+
+Turns almost-JSON LLM output into a dict without another provider call.
+Stages, cheapest first (the stage that succeeded is returned for metrics):
+
+  strict     orjson/json parse of the stripped text
+  extracted  markdown fences and surrounding prose removed
+  repaired   lenient fixes: single quotes, Python literals, comments,
+             trailing commas, and bracket balancing for truncated output
+
+Raises JSONRepairError (a ValueError) only when every stage fails.
+"""
+
+import json
+import re
+
+try:
+    import orjson
+
+    def _loads(text: str):
+        return orjson.loads(text)
+except ImportError:  # orjson is an accelerator, not a requirement
+    def _loads(text: str):
+        return json.loads(text)
+
+
+class JSONRepairError(ValueError):
+    pass
+
+
+_FENCE = re.compile(r"```(?:json|JSON)?\s*(.*?)(?:```|$)", re.S)
+_PY_LITERALS = {"True": "true", "False": "false", "None": "null"}
+
+
+def parse_json_lenient(text: str) -> tuple[dict, str]:
+    """Parse LLM output into a dict. Returns (data, stage)."""
+    text = text.strip()
+    try:
+        return _as_dict(_loads(text)), "strict"
+    except (ValueError, TypeError):
+        pass
+
+    candidate = _extract_object(text)
+    try:
+        return _as_dict(_loads(candidate)), "extracted"
+    except (ValueError, TypeError):
+        pass
+
+    try:
+        return _as_dict(_loads(_repair(candidate))), "repaired"
+    except (ValueError, TypeError) as e:
+        raise JSONRepairError(f"Could not repair JSON: {e}") from e
+
+
+def _as_dict(value) -> dict:
+    if not isinstance(value, dict):
+        raise TypeError(f"expected a JSON object, got {type(value).__name__}")
+    return value
+
+
+def _extract_object(text: str) -> str:
+    """Drop fences and prose around the outermost object (end may be missing if truncated)."""
+    fenced = _FENCE.search(text)
+    if fenced and "{" in fenced.group(1):
+        text = fenced.group(1)
+    start = text.find("{")
+    if start == -1:
+        return text
+    end = text.rfind("}")
+    return text[start:end + 1] if end > start else text[start:]
+
+
+def _repair(text: str) -> str:
+    """
+    Single pass over the text that normalises strings and literals, drops
+    comments and trailing commas, then closes anything left open.
+    """
+    out: list[str] = []
+    stack: list[str] = []
+    i, n = 0, len(text)
+    while i < n:
+        c = text[i]
+        if c in "\"'":
+            # Re-emit any quoted string as a valid double-quoted JSON string
+            quote, j, buf = c, i + 1, []
+            while j < n and text[j] != quote:
+                if text[j] == "\\" and j + 1 < n:
+                    buf.append(text[j:j + 2])
+                    j += 2
+                    continue
+                buf.append('\\"' if text[j] == '"' else "\\n" if text[j] == "\n" else text[j])
+                j += 1
+            body = "".join(buf)
+            if quote == "'":
+                body = body.replace("\\'", "'")
+            out.append(f'"{body}"')
+            i = j + 1
+            continue
+        if c == "/" and text.startswith("//", i):
+            i = text.find("\n", i) if "\n" in text[i:] else n
+            continue
+        if c == "/" and text.startswith("/*", i):
+            end = text.find("*/", i + 2)
+            i = n if end == -1 else end + 2
+            continue
+        if c in "{[":
+            stack.append("}" if c == "{" else "]")
+        elif c in "}]":
+            _drop_trailing_comma(out)
+            if stack:
+                stack.pop()
+        elif c.isalpha() or c == "_":
+            word = re.match(r"\w+", text[i:]).group(0)
+            i += len(word)
+            if text[i:].lstrip().startswith(":"):
+                out.append(f'"{word}"')  # bare key
+            else:
+                out.append(_PY_LITERALS.get(word, word))
+            continue
+        out.append(c)
+        i += 1
+
+    # Truncated output: drop a dangling key or comma, then close open brackets
+    repaired = "".join(out).rstrip()
+    if stack and stack[-1] == "}":
+        repaired = re.sub(r'([{,])\s*"[^"]*"\s*:?\s*$', r"\1", repaired)
+    repaired = re.sub(r"[,:]\s*$", "", repaired)
+    return repaired + "".join(reversed(stack))
+
+
+def _drop_trailing_comma(out: list[str]) -> None:
+    k = len(out) - 1
+    while k >= 0 and out[k].isspace():
+        k -= 1
+    if k >= 0 and out[k] == ",":
+        del out[k]
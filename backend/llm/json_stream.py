@@ -0,0 +1,107 @@
+"""
+Incremental JSON object parser — Perspectra
+
+Feeds on streamed LLM output and emits each top-level key of the JSON
+object as soon as its value is complete, e.g. `score` long before
+`detailed_feedback` has finished generating.
+
+Text before the opening `{` (prose, ``` fences) is ignored, as is
+anything after the closing `}`.
+
+Usage:
+    parser = IncrementalJSONParser()
+    async for chunk in stream:
+        for key, value in parser.feed(chunk):
+            ...
+"""
+
+import json
+from typing import Any
+
+
+class IncrementalJSONParser:
+    def __init__(self):
+        self._buf = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._expecting = "key"        # key | colon | value (at depth 1)
+        self._key_start: int | None = None
+        self._key: str | None = None
+        self._value_start: int | None = None
+        self.done = False
+        self.parsed: dict[str, Any] = {}
+
+    @property
+    def text(self) -> str:
+        """Everything fed so far."""
+        return self._buf
+
+    def feed(self, chunk: str) -> list[tuple[str, Any]]:
+        """Consume a chunk; return the (key, value) pairs completed by it."""
+        self._buf += chunk
+        completed: list[tuple[str, Any]] = []
+        buf = self._buf
+        i = self._pos
+
+        while i < len(buf) and not self.done:
+            c = buf[i]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    if self._depth == 1 and self._expecting == "key" and self._key_start is not None:
+                        self._key = json.loads(buf[self._key_start:i + 1])
+                        self._key_start = None
+                        self._expecting = "colon"
+                i += 1
+                continue
+
+            if self._depth == 0:
+                if c == "{":
+                    self._depth = 1
+                    self._expecting = "key"
+                i += 1
+                continue
+
+            if c == '"':
+                self._in_string = True
+                if self._depth == 1 and self._expecting == "key":
+                    self._key_start = i
+            elif c in "{[":
+                self._depth += 1
+            elif c in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._emit(buf, i, completed)
+                    self.done = True
+            elif self._depth == 1:
+                if c == ":" and self._expecting == "colon":
+                    self._value_start = i + 1
+                    self._expecting = "value"
+                elif c == "," and self._expecting == "value":
+                    self._emit(buf, i, completed)
+                    self._expecting = "key"
+            i += 1
+
+        self._pos = i
+        return completed
+
+    def _emit(self, buf: str, end: int, completed: list[tuple[str, Any]]) -> None:
+        if self._key is None or self._value_start is None:
+            return
+        raw = buf[self._value_start:end].strip()
+        try:
+            value = json.loads(raw)
+        except ValueError:
+            pass  # malformed value — the caller's full-text parse gets another go at it
+        else:
+            self.parsed[self._key] = value
+            completed.append((self._key, value))
+        self._key = None
+        self._value_start = None
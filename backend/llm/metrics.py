@@ -0,0 +1,63 @@
+"""
+Prometheus metrics for LLM calls — Perspectra
+
+Scraped from GET /metrics (see main.py). Call-level series are labelled by
+the calling agent: reviewer | tutor | hint | background | onboarding, and by
+the version hash of its system prompt (see prompts/loader.py).
+
+Note: with several uvicorn workers each process keeps its own registry;
+set PROMETHEUS_MULTIPROC_DIR for aggregated multi-process metrics.
+"""
+
+from prometheus_client import Counter, Gauge, Histogram
+
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 4, 8, 16, 32, 64)
+QUEUE_WAIT_BUCKETS = (0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2, 4, 8, 16, 32)
+
+REQUEST_SECONDS = Histogram(
+    "llm_request_seconds", "Provider round-trip latency of one LLM request",
+    ["agent", "prompt_version", "provider", "model", "mode"], buckets=LATENCY_BUCKETS,
+)
+TTFT_SECONDS = Histogram(
+    "llm_time_to_first_token_seconds", "Time to first streamed token",
+    ["agent", "prompt_version", "provider", "model"], buckets=LATENCY_BUCKETS,
+)
+PROMPT_TOKENS = Counter("llm_prompt_tokens", "Prompt tokens sent", ["agent", "prompt_version", "provider", "model"])
+COMPLETION_TOKENS = Counter("llm_completion_tokens", "Completion tokens received", ["agent", "prompt_version", "provider", "model"])
+CACHED_PROMPT_TOKENS = Counter(
+    "llm_cached_prompt_tokens", "Prompt tokens the provider served from its prompt cache",
+    ["agent", "prompt_version", "provider", "model"],
+)
+QUEUE_WAIT_SECONDS = Histogram(
+    "llm_queue_wait_seconds", "Time a call waited for a provider slot",
+    ["provider", "priority"], buckets=QUEUE_WAIT_BUCKETS,
+)
+RETRIES = Counter("llm_retries", "Requests retried after an error", ["agent", "prompt_version", "provider"])
+FALLBACKS = Counter("llm_fallbacks", "Calls routed to the fallback provider", ["agent", "prompt_version", "provider", "reason"])
+JSON_PARSE_FAILURES = Counter("llm_json_parse_failures", "Responses that could not be parsed as JSON", ["agent", "prompt_version", "provider"])
+JSON_REPAIRS = Counter(
+    "llm_json_repairs", "Malformed JSON responses recovered locally instead of re-calling the provider",
+    ["agent", "prompt_version", "provider", "stage"],
+)
+SCHEMA_FAILURES = Counter("llm_schema_validation_failures", "Parsed responses that failed the agent's output schema", ["agent", "prompt_version", "provider"])
+ERRORS = Counter("llm_errors", "Failed provider requests by exception class", ["agent", "prompt_version", "provider", "error"])
+COALESCED = Counter("llm_coalesced_calls", "Calls served by an identical in-flight request", ["agent", "prompt_version"])
+
+CACHE_LOOKUPS = Gauge("llm_cache_lookups", "Response cache lookups since start", ["result"])
+QUEUE_DEPTH = Gauge("llm_queue_depth", "Calls waiting for a provider slot", ["provider", "priority"])
+IN_FLIGHT = Gauge("llm_in_flight", "Calls currently holding a provider slot", ["provider"])
+BREAKER_OPEN = Gauge("llm_circuit_open", "1 while the provider's circuit breaker is open", ["provider"])
+
+
+def refresh_gauges(stats: dict) -> None:
+    """Copy point-in-time values from `LLMClient.stats()` into gauges before a scrape."""
+    cache = stats["cache"]
+    CACHE_LOOKUPS.labels("memory_hit").set(cache["memory_hits"])
+    CACHE_LOOKUPS.labels("mongo_hit").set(cache["mongo_hits"])
+    CACHE_LOOKUPS.labels("miss").set(cache["misses"])
+    for provider, snap in stats["schedulers"].items():
+        IN_FLIGHT.labels(provider).set(snap["in_flight"])
+        for priority, depth in snap["queued"].items():
+            QUEUE_DEPTH.labels(provider, priority).set(depth)
+    for provider, snap in stats["breakers"].items():
+        BREAKER_OPEN.labels(provider).set(0 if snap["state"] == "closed" else 1)
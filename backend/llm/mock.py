@@ -0,0 +1,168 @@
+"""
+Mock LLM provider — Perspectra
+
+A local stand-in for an OpenAI-compatible client, selected with
+`LLM_PROVIDER=mock` (or as the fallback provider). No network, no API key.
+
+  - Content is deterministic: the same (system, prompt) always yields the
+    same response, and it is schema-valid for whichever agent is calling
+    (reviewer, onboarding, background → JSON; tutor, hint → text).
+  - Latency, error rate and streaming token rate are configurable in
+    Settings (`mock_llm_*`) so the FastAPI app can be load-tested.
+"""
+
+import asyncio
+import hashlib
+import json
+import random
+from types import SimpleNamespace
+from typing import AsyncIterator
+
+from config import Settings
+from prompts.builder import estimate_tokens
+
+TAXONOMY = [
+    "Arrays", "Strings", "Linked Lists", "Stacks", "Queues", "Hash Maps & Sets",
+    "Recursion", "Binary Trees", "BST", "Heaps & Priority Queues", "Graphs",
+    "Sorting Algorithms", "Binary Search", "Two Pointers", "Sliding Window",
+    "Prefix Sums", "Dynamic Programming", "Backtracking", "BFS", "DFS",
+]
+THINKING_STYLES = ["brute_force", "optimized", "pattern_matching", "confused", "creative", "methodical"]
+MISTAKES = ["off-by-one", "missing base case", "unhandled empty input", "mutating input while iterating", "nested loop where a hash map fits"]
+SYNTAX_TOPICS = ["Python: enumerate()", "Python: dictionary get-or-default (dict.get(key, 0))", "Python: string slicing (s[::-1])"]
+
+
+class MockProviderError(Exception):
+    """Injected failure, raised at `mock_llm_error_rate`."""
+
+
+def _detect_agent(system: str, prompt: str) -> str:
+    if "JSON review object" in prompt:
+        return "reviewer"
+    if "onboarding answers" in prompt:
+        return "onboarding"
+    if "learning insights JSON" in prompt:
+        return "background"
+    if "Generate ONE hint" in prompt:
+        return "hint"
+    if "JSON" in system:
+        return "json"
+    return "tutor"
+
+
+def _response_for(agent: str, rng: random.Random) -> str:
+    def pick(n: int) -> list[str]:
+        return rng.sample(TAXONOMY, n)
+
+    if agent == "reviewer":
+        gaps = pick(2)
+        return json.dumps({
+            "score": rng.randint(20, 95),
+            "strengths": ["clear variable names", "handles the main case"],
+            "weaknesses": ["misses edge cases", "quadratic time where linear is possible"],
+            "thinking_style": rng.choice(THINKING_STYLES),
+            "concept_gaps": gaps,
+            "topics_to_revise": gaps + [rng.choice(SYNTAX_TOPICS)],
+            "known_concepts": pick(3),
+            "detailed_feedback": "Nice progress on this one. Your loop structure is solid. "
+                                 "Think about what happens when the input is empty.",
+            "profile_updates": {
+                "skills": {c: round(rng.uniform(0.1, 0.9), 2) for c in pick(3)},
+                "gaps": gaps,
+                "strengths": pick(2),
+                "mistake_patterns": [rng.choice(MISTAKES)],
+            },
+        })
+    if agent == "onboarding":
+        level = rng.choice(["beginner", "intermediate", "advanced"])
+        return json.dumps({
+            "experience_level": level,
+            "skill_level": level,
+            "preferred_style": rng.choice(["visual", "verbal", "example-based", "conceptual", "hands-on"]),
+            "background": "CS student comfortable with Python basics.",
+            "goal": "Crack coding interviews.",
+            "initial_skills": {c: round(rng.uniform(0.1, 0.35), 2) for c in pick(3)},
+            "initial_gaps": pick(2),
+            "initial_strengths": pick(2),
+            "known_concepts": pick(4),
+        })
+    if agent == "background":
+        return json.dumps({
+            "summary": "Steady progress over the last few problems, with better edge-case handling.",
+            "improving_concepts": pick(2),
+            "declining_concepts": pick(1),
+            "top_mistake_pattern": rng.choice(MISTAKES),
+            "recommended_focus": pick(3),
+            "motivational_note": "You're building real momentum — keep going!",
+        })
+    if agent == "json":
+        return json.dumps({"ok": True})
+    if agent == "hint":
+        return f"What would change if you tracked each value you've seen using {rng.choice(TAXONOMY)}?"
+    return (
+        f"Good question. Think about how {rng.choice(TAXONOMY)} could help here. "
+        "What does your loop need to remember between iterations?"
+    )
+
+
+class _MockStream:
+    def __init__(self, chunks: AsyncIterator):
+        self._chunks = chunks
+
+    def __aiter__(self):
+        return self._chunks
+
+    async def close(self) -> None:
+        await self._chunks.aclose()
+
+
+class _MockCompletions:
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        self._jitter = random.Random()  # latency/errors vary; content does not
+
+    def _latency(self) -> float:
+        s = self.settings
+        return self._jitter.lognormvariate(0, s.mock_llm_latency_sigma) * s.mock_llm_latency_median_ms / 1000
+
+    async def create(self, model: str, messages: list[dict], max_tokens: int = 2048, stream: bool = False, **_):
+        system = next((m["content"] for m in messages if m["role"] == "system"), "")
+        prompt = next((m["content"] for m in reversed(messages) if m["role"] == "user"), "")
+        seed = hashlib.sha256(f"{model}\n{system}\n{prompt}".encode("utf-8")).digest()
+        content = _response_for(_detect_agent(system, prompt), random.Random(seed))
+
+        await asyncio.sleep(self._latency())  # time to first token
+        if self._jitter.random() < self.settings.mock_llm_error_rate:
+            raise MockProviderError("mock provider: injected failure")
+
+        pieces = [content[i:i + 4] for i in range(0, len(content), 4)][:max_tokens]
+        prompt_tokens = estimate_tokens(system) + estimate_tokens(prompt)
+        usage = SimpleNamespace(
+            prompt_tokens=prompt_tokens,
+            completion_tokens=len(pieces),
+            total_tokens=prompt_tokens + len(pieces),
+        )
+        delay = 1 / self.settings.mock_llm_tokens_per_second if self.settings.mock_llm_tokens_per_second > 0 else 0
+
+        if stream:
+            async def chunks():
+                for piece in pieces:
+                    await asyncio.sleep(delay)
+                    yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=piece))], usage=None)
+            return _MockStream(chunks())
+
+        await asyncio.sleep(delay * len(pieces))
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content="".join(pieces)))],
+            usage=usage,
+        )
+
+
+class MockAsyncClient:
+    """Duck-types the parts of AsyncOpenAI that LLMClient uses."""
+
+    def __init__(self, settings: Settings):
+        self.chat = SimpleNamespace(completions=_MockCompletions(settings))
+
+    async def close(self) -> None:
+        pass
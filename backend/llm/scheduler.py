@@ -0,0 +1,167 @@
+"""
+Priority-aware request scheduler — Perspectra
+
+One `ProviderScheduler` per LLM provider enforces:
+  - a cap on concurrent in-flight calls
+  - an (estimated) tokens-per-minute budget, as a token bucket
+  - strict priority: queued interactive calls (tutor, hint, reviewer,
+    onboarding) are always dispatched before background summarisation
+Time spent waiting for a slot is exported as llm_queue_wait_seconds.
+
+Usage:
+    async with scheduler.slot("interactive", tokens=1200) as slot:
+        response = await client.chat.completions.create(...)
+        slot.settle(response.usage.total_tokens)
+"""
+
+import asyncio
+import heapq
+import itertools
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from llm import metrics
+
+PRIORITY_INTERACTIVE = "interactive"
+PRIORITY_BACKGROUND = "background"
+
+_PRIORITY_RANK = {PRIORITY_INTERACTIVE: 0, PRIORITY_BACKGROUND: 1}
+
+
+class _Slot:
+    """Handle for an acquired slot; lets the caller report actual token usage."""
+
+    def __init__(self, scheduler: "ProviderScheduler", tokens: int):
+        self._scheduler = scheduler
+        self.tokens = tokens
+
+    def settle(self, actual_tokens: int | None) -> None:
+        """Refund (or charge) the difference between estimated and actual tokens."""
+        if actual_tokens is None:
+            return
+        self._scheduler._refund(self.tokens - actual_tokens)
+        self.tokens = actual_tokens
+
+
+class ProviderScheduler:
+    def __init__(self, name: str, max_concurrency: int = 16, tokens_per_minute: int = 0):
+        self.name = name
+        self.max_concurrency = max(1, max_concurrency)
+        self.tokens_per_minute = tokens_per_minute
+        self._in_flight = 0
+        self._bucket = float(tokens_per_minute)
+        self._refilled_at = time.monotonic()
+        self._waiters: list[tuple[int, int, int, asyncio.Future]] = []  # (rank, seq, tokens, future)
+        self._seq = itertools.count()
+        self._timer: asyncio.TimerHandle | None = None
+        # Observability
+        self.dispatched = {p: 0 for p in _PRIORITY_RANK}
+        self.total_wait_seconds = {p: 0.0 for p in _PRIORITY_RANK}
+        self.max_wait_seconds = {p: 0.0 for p in _PRIORITY_RANK}
+
+    @asynccontextmanager
+    async def slot(self, priority: str = PRIORITY_INTERACTIVE, tokens: int = 0) -> AsyncIterator[_Slot]:
+        if priority not in _PRIORITY_RANK:
+            priority = PRIORITY_INTERACTIVE
+        if self.tokens_per_minute:
+            tokens = min(tokens, self.tokens_per_minute)
+        started = time.monotonic()
+        await self._acquire(_PRIORITY_RANK[priority], tokens)
+        waited = time.monotonic() - started
+        self.dispatched[priority] += 1
+        self.total_wait_seconds[priority] += waited
+        self.max_wait_seconds[priority] = max(self.max_wait_seconds[priority], waited)
+        metrics.QUEUE_WAIT_SECONDS.labels(self.name, priority).observe(waited)
+        try:
+            yield _Slot(self, tokens)
+        finally:
+            self._release()
+
+    async def _acquire(self, rank: int, tokens: int) -> None:
+        if not self._waiters and self._can_start(tokens):
+            self._start(tokens)
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (rank, next(self._seq), tokens, future))
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Granted a slot just as we were cancelled — hand it back
+                self._release()
+            raise
+
+    def _refill(self) -> None:
+        if not self.tokens_per_minute:
+            return
+        now = time.monotonic()
+        rate = self.tokens_per_minute / 60
+        self._bucket = min(self.tokens_per_minute, self._bucket + (now - self._refilled_at) * rate)
+        self._refilled_at = now
+
+    def _can_start(self, tokens: int) -> bool:
+        if self._in_flight >= self.max_concurrency:
+            return False
+        if not self.tokens_per_minute:
+            return True
+        self._refill()
+        return self._bucket >= tokens
+
+    def _start(self, tokens: int) -> None:
+        self._in_flight += 1
+        if self.tokens_per_minute:
+            self._bucket -= tokens
+
+    def _release(self) -> None:
+        self._in_flight -= 1
+        self._dispatch()
+
+    def _refund(self, tokens: int) -> None:
+        if self.tokens_per_minute and tokens:
+            self._refill()
+            self._bucket = min(self.tokens_per_minute, self._bucket + tokens)
+            self._dispatch()
+
+    def _dispatch(self) -> None:
+        """Start queued calls in priority order while capacity and budget allow."""
+        while self._waiters:
+            _, _, tokens, future = self._waiters[0]
+            if future.done():  # waiter was cancelled
+                heapq.heappop(self._waiters)
+                continue
+            if not self._can_start(tokens):
+                if self._in_flight < self.max_concurrency:
+                    self._wake_after_refill(tokens)
+                return
+            heapq.heappop(self._waiters)
+            self._start(tokens)
+            future.set_result(None)
+
+    def _wake_after_refill(self, tokens: int) -> None:
+        """Head of the queue is waiting on the token budget — re-check once it refills."""
+        if self._timer is not None and not self._timer.cancelled():
+            self._timer.cancel()
+        delay = (tokens - self._bucket) / (self.tokens_per_minute / 60)
+        self._timer = asyncio.get_running_loop().call_later(max(delay, 0.01), self._dispatch)
+
+    def snapshot(self) -> dict:
+        queued = {p: 0 for p in _PRIORITY_RANK}
+        for rank, _, _, future in self._waiters:
+            if not future.done():
+                queued[next(p for p, r in _PRIORITY_RANK.items() if r == rank)] += 1
+        self._refill()
+        return {
+            "in_flight": self._in_flight,
+            "max_concurrency": self.max_concurrency,
+            "queued": queued,
+            "tokens_available": round(self._bucket) if self.tokens_per_minute else None,
+            "dispatched": dict(self.dispatched),
+            "avg_wait_ms": {
+                p: round(self.total_wait_seconds[p] / n * 1000, 1) if (n := self.dispatched[p]) else 0.0
+                for p in _PRIORITY_RANK
+            },
+            "max_wait_ms": {p: round(w * 1000, 1) for p, w in self.max_wait_seconds.items()},
+        }
@@ -2,12 +2,20 @@
 Perspectra Backend — FastAPI Application Entry Point
 """
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 
 from db.mongo import connect_mongo, close_mongo
 from db.neo4j import connect_neo4j, close_neo4j
+from llm.client import llm
+from llm.metrics import refresh_gauges
+from prompts.loader import start_prompt_watcher, stop_prompt_watcher
+from graph.sync import start_graph_sync_worker, stop_graph_sync_worker
+from profile.service import start_profile_invalidation, stop_profile_invalidation
+from review.jobs import resume_review_workers, stop_review_workers
+from sandbox.runner import start_sandbox, stop_sandbox
 from auth.router import router as auth_router
 from profile.router import router as profile_router
 from review.router import router as review_router
@@ -21,8 +29,19 @@ async def lifespan(app: FastAPI):
     # Startup
     await connect_mongo()
     await connect_neo4j()
+    start_prompt_watcher()
+    start_graph_sync_worker()
+    start_profile_invalidation()
+    start_sandbox()
+    await resume_review_workers()
     yield
     # Shutdown
+    await stop_review_workers()
+    await stop_sandbox()
+    await stop_profile_invalidation()
+    await stop_graph_sync_worker()
+    await stop_prompt_watcher()
+    await llm.aclose()
     await close_mongo()
     await close_neo4j()
 
@@ -63,6 +82,13 @@ async def health():
     return {"status": "healthy"}
 
 
+@app.get("/metrics", tags=["health"], include_in_schema=False)
+async def metrics():
+    """Prometheus scrape endpoint — LLM latency, tokens, retries, fallbacks, errors."""
+    refresh_gauges(llm.stats())
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
 if __name__ == "__main__":
     import uvicorn
     from config import get_settings
@@ -7,8 +7,11 @@ from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 
 from auth.utils import get_current_user
+from config import get_settings
 from profile.service import get_profile, update_profile
 from llm.client import llm
+from llm.deadline import deadline, http_status_for
+from agents.schemas import OnboardingOutput
 from prompts.loader import load_prompt
 
 router = APIRouter(prefix="/profile", tags=["profile"])
@@ -50,9 +53,10 @@ async def submit_onboarding(payload: OnboardingRequest, user: dict = Depends(get
 Analyze and return the JSON profile inference."""
 
     try:
-        inferred = await llm.complete_json(prompt, system=load_prompt("onboarding"))
+        with deadline(get_settings().deadline_onboarding_seconds):
+            inferred = await llm.complete_json(prompt, system=load_prompt("onboarding"), agent="onboarding", schema=OnboardingOutput)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"LLM inference failed: {e}")
+        raise HTTPException(status_code=http_status_for(e), detail=f"LLM inference failed: {e}")
 
     updates = {
         "onboarding_complete": True,
@@ -1,10 +1,125 @@
 """
 Profile service — create and update Dynamic Profiles.
+
+Reads go through an in-process LRU/TTL cache keyed by user_id. Every write
+bumps the profile's `version` and refreshes the cache with the document the
+write returned, so a user always reads their own writes. Writes made by other
+uvicorn workers evict entries via a Mongo change stream
+(`start_profile_invalidation`); the TTL bounds staleness where change streams
+are unavailable (standalone mongod).
 """
 
+import asyncio
+import copy
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
 from datetime import datetime, timezone
+from pymongo import ReturnDocument
+from pymongo.errors import OperationFailure
+from config import get_settings
+from db.metrics import PROFILE_CACHE_LOOKUPS
 from db.mongo import get_db
-from db.neo4j import run_query
+from graph.sync import record_graph_change
+
+logger = logging.getLogger(__name__)
+
+RECENT_HINTS_LIMIT = 20
+MISTAKE_PATTERNS_LIMIT = 20
+
+
+@dataclass(frozen=True)
+class ListMerge:
+    """
+    Server-side merge of `values` into a profile list, for `update_profile`.
+    Values already in the list are not added again; new ones go at the end
+    (or the front with `prepend=True`), and the list is trimmed to the
+    `limit` most recent entries. Plain lists passed to `update_profile`
+    replace the stored list instead.
+    """
+    values: list
+    prepend: bool = False
+    limit: int | None = None
+
+
+@dataclass(frozen=True)
+class Increment:
+    """Atomic server-side `field += by`, for `update_profile`. Read the new value off the returned profile."""
+    by: int = 1
+
+
+class _ProfileCache:
+    """user_id -> profile, newest version wins. Also maps Mongo _id -> user_id for change events."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        # user_id -> (expires_at, _id, profile)
+        self._entries: OrderedDict[str, tuple[float, object, dict]] = OrderedDict()
+        self._user_ids: dict = {}
+
+    def get(self, user_id: str) -> dict | None:
+        entry = self._entries.get(user_id)
+        if entry is None or entry[0] < time.monotonic():
+            PROFILE_CACHE_LOOKUPS.labels("miss").inc()
+            return None
+        self._entries.move_to_end(user_id)
+        PROFILE_CACHE_LOOKUPS.labels("hit").inc()
+        return copy.deepcopy(entry[2])
+
+    def put(self, doc: dict) -> None:
+        """Cache a profile read or returned by a write (with its _id), unless a newer version is cached."""
+        if self.max_entries <= 0:
+            return
+        profile = {k: v for k, v in doc.items() if k != "_id"}
+        user_id = profile["user_id"]
+        current = self._entries.get(user_id)
+        if current is not None and current[2].get("version", 0) > profile.get("version", 0):
+            return
+        doc_id = doc.get("_id", current[1] if current else None)
+        if doc_id is not None:
+            self._user_ids[doc_id] = user_id
+        self._entries[user_id] = (time.monotonic() + self.ttl_seconds, doc_id, copy.deepcopy(profile))
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_entries:
+            self._forget(next(iter(self._entries)))
+
+    def on_change(self, doc_id, version: int | None) -> None:
+        """Change-stream event for `doc_id`: evict unless we already hold that version or newer."""
+        user_id = self._user_ids.get(doc_id)
+        entry = self._entries.get(user_id) if user_id else None
+        if entry is None:
+            return
+        if version is not None and entry[2].get("version", 0) >= version:
+            return  # our own write, already cached
+        self._forget(user_id)
+
+    def _forget(self, user_id: str) -> None:
+        _, doc_id, _ = self._entries.pop(user_id)
+        self._user_ids.pop(doc_id, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._user_ids.clear()
+
+
+_settings = get_settings()
+_cache = _ProfileCache(
+    _settings.profile_cache_max_entries if _settings.profile_cache_enabled else 0,
+    _settings.profile_cache_ttl_seconds,
+)
+_watcher: asyncio.Task | None = None
+# Cleared the first time the server turns a transaction down (standalone mongod)
+_transactions_supported = True
+
+_ILLEGAL_OPERATION = 20
+_INVALID_RESUME_TOKEN = 260
+_CHANGE_STREAM_FATAL = 280
+_CHANGE_STREAM_HISTORY_LOST = 286
+_CHANGE_STREAM_NOT_SUPPORTED = 40573
+_WATCH_BACKOFF_SECONDS = 1
+_WATCH_MAX_BACKOFF_SECONDS = 60
 
 
 def _empty_profile(user_id: str) -> dict:
@@ -19,10 +134,11 @@ def _empty_profile(user_id: str) -> dict:
         "gaps": [],                        # concept names with gaps
         "strengths": [],                   # concept names that are strong
         "mistake_patterns": [],            # ["off-by-one", "missing base case", ...]
-        "recent_hints": [],                # last 5 hints given by Tutor
+        "recent_hints": [],                # last 20 hints given by Tutor
         "submissions_count": 0,
         "last_summarized_at": 0,           # submission count at last background run
         "insights": None,                  # from Background Agent
+        "version": 0,                      # bumped by every update_profile
         "created_at": datetime.now(timezone.utc).isoformat(),
         "updated_at": datetime.now(timezone.utc).isoformat(),
     }
@@ -32,87 +148,209 @@ async def create_initial_profile(user_id: str) -> dict:
     db = get_db()
     profile = _empty_profile(user_id)
     await db.profiles.insert_one(profile)
+    _cache.put(profile)
     return profile
 
 
 async def get_profile(user_id: str) -> dict | None:
+    cached = _cache.get(user_id)
+    if cached is not None:
+        return cached
     db = get_db()
-    return await db.profiles.find_one({"user_id": user_id}, {"_id": 0})
+    doc = await db.profiles.find_one({"user_id": user_id})
+    if doc is None:
+        return None
+    _cache.put(doc)
+    doc.pop("_id")
+    return doc
 
 
 async def update_profile(user_id: str, updates: dict) -> dict:
     """
     Merge `updates` into the user profile document.
     Special keys handled: skills (dict merge), gaps/strengths (list replace), 
-    mistake_patterns (append unique), recent_hints (append, keep last 5).
+    mistake_patterns (append unique, keep last 20), recent_hints (a str is
+    appended, keep last 20). Any field given a `ListMerge` is merged into;
+    any field given an `Increment` is incremented.
+
+    One round-trip: an upsert `find_one_and_update` whose pipeline fills in
+    blank-profile defaults for missing fields, then applies the merge
+    server-side — concurrent updates never overwrite each other's list
+    entries — and returns the updated document.
     """
     db = get_db()
-    profile = await get_profile(user_id)
-    if not profile:
-        profile = _empty_profile(user_id)
-        await db.profiles.insert_one({**profile})
 
-    set_ops: dict = {"updated_at": datetime.now(timezone.utc).isoformat()}
-    push_ops: dict = {}
+    set_ops: dict = {
+        "updated_at": datetime.now(timezone.utc).isoformat(),
+        "version": {"$add": [{"$ifNull": ["$version", 0]}, 1]},
+    }
 
     for key, value in updates.items():
         if key == "skills" and isinstance(value, dict):
             # Merge skill scores — take the new value only if it changed significantly
             for concept, score in value.items():
-                set_ops[f"skills.{concept}"] = round(float(score), 2)
+                set_ops[f"skills.{concept}"] = {"$literal": round(float(score), 2)}
         elif key == "gaps" and isinstance(value, list):
-            set_ops["gaps"] = value
+            set_ops["gaps"] = {"$literal": value}
         elif key == "strengths" and isinstance(value, list):
-            set_ops["strengths"] = value
+            set_ops["strengths"] = {"$literal": value}
+        elif isinstance(value, ListMerge):
+            set_ops[key] = _merge_expr(key, value)
+        elif isinstance(value, Increment):
+            # Pipeline form of $inc — applied atomically by the same write
+            set_ops[key] = {"$add": [{"$ifNull": [f"${key}", 0]}, value.by]}
         elif key == "mistake_patterns" and isinstance(value, list):
-            # Append new patterns without duplicates
-            current = profile.get("mistake_patterns", [])
-            merged = list(dict.fromkeys(current + value))  # preserve order, dedupe
-            set_ops["mistake_patterns"] = merged[-20:]     # keep last 20
+            # Append new patterns without duplicates; keep last 20
+            set_ops[key] = _merge_expr(key, ListMerge(value, limit=MISTAKE_PATTERNS_LIMIT))
         elif key == "recent_hints" and isinstance(value, str):
-            current = profile.get("recent_hints", [])
-            set_ops["recent_hints"] = (current + [value])[-5:]
+            set_ops[key] = {"$slice": [
+                {"$concatArrays": [_array(key), [{"$literal": value}]]}, -RECENT_HINTS_LIMIT,
+            ]}
         else:
-            set_ops[key] = value
-
-    await db.profiles.update_one({"user_id": user_id}, {"$set": set_ops})
-
-    # Sync gaps/strengths to Neo4j as HAS_GAP / HAS_SKILL edges
-    if "gaps" in updates or "skills" in updates:
-        await _sync_skills_to_neo4j(user_id, updates)
-
-    return await get_profile(user_id)
-
-
-async def _sync_skills_to_neo4j(user_id: str, updates: dict):
-    """Write HAS_SKILL and HAS_GAP edges to Neo4j for the knowledge graph."""
-    # Ensure Student node exists
-    await run_query(
-        "MERGE (s:Student {id: $uid})",
-        {"uid": user_id}
-    )
-
-    if "skills" in updates:
-        for concept_name, score in updates["skills"].items():
-            await run_query("""
-                MATCH (s:Student {id: $uid}), (c:Concept {name: $name})
-                MERGE (s)-[r:HAS_SKILL]->(c)
-                SET r.level = $level, r.updated_at = $ts
-            """, {
-                "uid": user_id,
-                "name": concept_name,
-                "level": float(score),
-                "ts": datetime.now(timezone.utc).isoformat()
-            })
-
-    if "gaps" in updates:
-        for concept_name in updates["gaps"]:
-            await run_query("""
-                MATCH (s:Student {id: $uid}), (c:Concept {name: $name})
-                MERGE (s)-[r:HAS_GAP]->(c)
-                SET r.since = $ts
-            """, {
-                "uid": user_id,
-                "name": concept_name,
-                "ts": datetime.now(timezone.utc).isoformat()
-            })
+            set_ops[key] = {"$literal": value}
+
+    # Blank-profile fields for documents that don't have them yet (first write upserts)
+    defaults = {
+        key: {"$ifNull": [f"${key}", {"$literal": default}]}
+        for key, default in _empty_profile(user_id).items()
+        if key not in set_ops and key != "user_id"
+    }
+
+    async def write(session=None) -> dict:
+        return await db.profiles.find_one_and_update(
+            {"user_id": user_id},
+            [{"$set": defaults}, {"$set": set_ops}],
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+            session=session,
+        )
+
+    # Gaps/skills become HAS_GAP / HAS_SKILL edges in Neo4j. They are written
+    # behind by graph/sync.py from an outbox entry committed with the profile.
+    if "gaps" not in updates and "skills" not in updates:
+        doc = await write()
+    elif not (get_settings().mongo_transactions and _transactions_supported):
+        # Standalone mongod has no multi-document transactions; a crash between
+        # these two writes leaves drift for the reconciler to repair.
+        doc = await write()
+        await record_graph_change(db, user_id)
+    else:
+        async def write_with_outbox(session) -> dict:
+            doc = await write(session)
+            await record_graph_change(db, user_id, session=session)
+            return doc
+
+        try:
+            async with await db.client.start_session() as session:
+                doc = await session.with_transaction(write_with_outbox)
+        except OperationFailure as e:
+            if not _transactions_unsupported(e):
+                raise
+            # The transaction was rejected before anything was written
+            _disable_transactions(e)
+            doc = await write()
+            await record_graph_change(db, user_id)
+
+    _cache.put(doc)
+    doc.pop("_id")
+    return doc
+
+
+def _transactions_unsupported(error: OperationFailure) -> bool:
+    """True for "Transaction numbers are only allowed on a replica set member or mongos"."""
+    return error.code == _ILLEGAL_OPERATION or "replica set" in str(error)
+
+
+def _disable_transactions(error: OperationFailure) -> None:
+    global _transactions_supported
+    if _transactions_supported:
+        logger.warning(
+            f"MongoDB rejected a transaction ({error}) — writing profiles and graph outbox entries "
+            "without one. Set MONGO_TRANSACTIONS=false for a standalone mongod."
+        )
+    _transactions_supported = False
+
+
+async def _watch_profile_changes() -> None:
+    """
+    Evict cache entries changed by other workers. Needs a replica set (Atlas).
+
+    A dropped stream is reopened with backoff from its last resume token, so
+    no change is missed. If the server can't resume from there (or there was
+    no token yet) the cache is cleared instead. On a standalone mongod change
+    streams are unsupported and the watcher stops, leaving the TTL as the
+    only bound on staleness.
+    """
+    pipeline = [{"$match": {"operationType": {"$in": ["insert", "update", "replace", "delete"]}}}]
+    resume_token = None
+    delay = _WATCH_BACKOFF_SECONDS
+    first = True
+    while True:
+        try:
+            async with get_db().profiles.watch(pipeline, resume_after=resume_token) as stream:
+                if not first and resume_token is None:
+                    _cache.clear()  # changes while we were disconnected can't be replayed
+                first = False
+                async for event in stream:
+                    fields = (event.get("updateDescription") or {}).get("updatedFields") or {}
+                    version = fields.get("version", (event.get("fullDocument") or {}).get("version"))
+                    _cache.on_change(event["documentKey"]["_id"], version)
+                    resume_token = stream.resume_token
+                    delay = _WATCH_BACKOFF_SECONDS
+        except asyncio.CancelledError:
+            raise
+        except OperationFailure as e:
+            if e.code == _CHANGE_STREAM_NOT_SUPPORTED or "replica set" in str(e):
+                logger.warning(f"Profile change streams unsupported, relying on cache TTL: {e}")
+                return
+            if e.code in (_INVALID_RESUME_TOKEN, _CHANGE_STREAM_FATAL, _CHANGE_STREAM_HISTORY_LOST):
+                resume_token = None
+            logger.warning(f"Profile change stream failed, reopening in {delay:.0f}s: {e}")
+        except Exception as e:
+            logger.warning(f"Profile change stream failed, reopening in {delay:.0f}s: {e}")
+        first = False
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, _WATCH_MAX_BACKOFF_SECONDS)
+
+
+def start_profile_invalidation() -> None:
+    """Start the change-stream listener. Called from the app lifespan."""
+    global _watcher
+    if _settings.profile_cache_enabled and _settings.profile_cache_change_stream and _watcher is None:
+        _watcher = asyncio.create_task(_watch_profile_changes())
+
+
+async def stop_profile_invalidation() -> None:
+    global _watcher
+    if _watcher is None:
+        return
+    _watcher.cancel()
+    try:
+        await _watcher
+    except asyncio.CancelledError:
+        pass
+    _watcher = None
+
+
+def invalidate_cache() -> None:
+    """Drop every cached profile. Useful in tests."""
+    _cache.clear()
+
+
+def _merge_expr(field: str, merge: ListMerge) -> dict:
+    """Aggregation expression implementing `merge` against the stored `field`."""
+    new = {"$literal": list(dict.fromkeys(merge.values))}
+    if merge.prepend:
+        # new values first, then the stored ones they don't repeat
+        rest = {"$filter": {"input": _array(field), "cond": {"$not": [{"$in": ["$$this", new]}]}}}
+        merged = {"$concatArrays": [new, rest]}
+        return merged if merge.limit is None else {"$slice": [merged, merge.limit]}
+    current = _array(field)
+    added = {"$filter": {"input": new, "cond": {"$not": [{"$in": ["$$this", current]}]}}}
+    merged = {"$concatArrays": [current, added]}
+    return merged if merge.limit is None else {"$slice": [merged, -merge.limit]}
+
+
+def _array(field: str) -> dict:
+    """Aggregation expression for `field` as an array — [] when missing or of an older, non-list shape."""
+    return {"$cond": [{"$isArray": f"${field}"}, f"${field}", []]}
@@ -0,0 +1,120 @@
+"""
+Token-budgeted prompt assembly — Perspectra
+
+Agent context builders split their user prompt into sections, each with a
+priority. `PromptBuilder.build()` keeps sections in the order they were
+added, but fills the token budget by priority:
+  - priority 0 sections are required and always included
+  - higher numbers are lower priority; a section that doesn't fit is shrunk
+    via its `shrink(max_tokens)` callback, or dropped if it has none
+Every agent's PERSONALISATION PROFILE section is required: it sets the
+student's level and the agent's mode, so a prompt without it isn't
+personalised at all.
+
+Token counts are estimated locally (~4 characters per token) — no tokenizer
+download and no network call.
+
+Usage:
+    from prompts.builder import PromptBuilder, clip_code
+    pb = PromptBuilder(budget_tokens=4000)
+    pb.add(profile_block, priority=3)
+    pb.add(code_block, priority=1, shrink=lambda n: render(clip_code(code, n)))
+    prompt = pb.build()
+"""
+
+from dataclasses import dataclass
+from typing import Callable
+
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap local token estimate — good enough for budgeting, not billing."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def clip_text(text: str, max_tokens: int) -> str:
+    """Cut `text` to roughly `max_tokens`, marking the cut."""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    marker = " …(truncated)"
+    keep = max(0, max_tokens * CHARS_PER_TOKEN - len(marker))
+    return text[:keep].rstrip() + marker
+
+
+def clip_code(code: str, max_tokens: int) -> str:
+    """
+    Shrink code to roughly `max_tokens` by keeping its head and tail lines —
+    signatures and return paths carry the most signal for review.
+    """
+    if estimate_tokens(code) <= max_tokens:
+        return code
+    lines = code.splitlines()
+    budget = max_tokens * CHARS_PER_TOKEN
+    head: list[str] = []
+    used = 0
+    for line in lines:
+        if used + len(line) + 1 > budget * 2 // 3:
+            break
+        head.append(line)
+        used += len(line) + 1
+    tail: list[str] = []
+    for line in reversed(lines[len(head):]):
+        if used + len(line) + 1 > budget:
+            break
+        tail.insert(0, line)
+        used += len(line) + 1
+    omitted = len(lines) - len(head) - len(tail)
+    if omitted <= 0:
+        return code
+    return "\n".join(head + [f"# … {omitted} lines omitted …"] + tail)
+
+
+def join_recent(items: list, limit: int, sep: str = ", ") -> str:
+    """Join the most recent `limit` items (lists are append-ordered), noting how many were left out."""
+    items = [str(i) for i in items]
+    if len(items) <= limit:
+        return sep.join(items)
+    return sep.join(items[-limit:]) + f"{sep}(+{len(items) - limit} older)"
+
+
+@dataclass
+class _Section:
+    text: str
+    priority: int
+    shrink: Callable[[int], str] | None
+
+
+class PromptBuilder:
+    def __init__(self, budget_tokens: int, separator: str = "\n\n"):
+        self.budget_tokens = budget_tokens
+        self.separator = separator
+        self._sections: list[_Section] = []
+        self.used_tokens = 0
+        self.shrunk = 0
+        self.dropped = 0
+
+    def add(self, text: str, priority: int = 0, shrink: Callable[[int], str] | None = None) -> "PromptBuilder":
+        self._sections.append(_Section(text, priority, shrink))
+        return self
+
+    def build(self) -> str:
+        rendered = [""] * len(self._sections)
+        remaining = self.budget_tokens
+        order = sorted(range(len(self._sections)), key=lambda i: (self._sections[i].priority, i))
+
+        for i in order:
+            section = self._sections[i]
+            cost = estimate_tokens(section.text)
+            if section.priority == 0 or cost <= remaining:
+                rendered[i] = section.text
+            elif section.shrink is not None and remaining > 0:
+                rendered[i] = section.shrink(remaining)
+                self.shrunk += 1
+            else:
+                self.dropped += 1
+                continue
+            remaining -= estimate_tokens(rendered[i])
+
+        self.used_tokens = self.budget_tokens - remaining
+        return self.separator.join(text for text in rendered if text)
@@ -1,60 +1,171 @@
 """
 Prompt loader — reads system prompts from backend/prompts/*.md
 
+Prompts live in an in-memory table of versioned entries; `load_prompt` is a
+dict lookup and never touches the disk on the request path.
+
 Two modes:
-  - Production (HOT_RELOAD_PROMPTS != "1"): cache prompts in memory after first load.
-  - Dev / testing (HOT_RELOAD_PROMPTS=1): re-read from disk on every call so you can
-    edit a .md file and immediately see the effect without restarting the server.
+  - Production (HOT_RELOAD_PROMPTS != "1"): each prompt is read once, on first use.
+  - Dev / staging (HOT_RELOAD_PROMPTS=1): a background watcher (started from the
+    app lifespan) notices edits to *.md files — via watchfiles/inotify when
+    available, mtime polling otherwise — re-reads them and swaps in a new table
+    atomically, so you can edit a prompt and see the effect without restarting.
+
+Every prompt has a version: a short hash of its text. LLM metrics and cached
+responses record it (see llm/client.py), so changing a prompt also retires
+the cache entries made with the old text.
 
 Usage:
-    from prompts.loader import load_prompt
+    from prompts.loader import load_prompt, prompt_version
     system = load_prompt("reviewer")   # reads prompts/reviewer.md
+    version = prompt_version(system)   # e.g. "3f2a9c1e04b7"
 """
 
+import asyncio
+import hashlib
+import logging
 import os
+from typing import NamedTuple
+
+logger = logging.getLogger(__name__)
 
 _PROMPTS_DIR = os.path.dirname(__file__)
-_cache: dict[str, str] = {}
 
-# Set HOT_RELOAD_PROMPTS=1 in your .env to disable caching during development
+# Set HOT_RELOAD_PROMPTS=1 in your .env to watch prompt files for changes
 _HOT_RELOAD = os.getenv("HOT_RELOAD_PROMPTS", "0") == "1"
+_POLL_SECONDS = float(os.getenv("PROMPT_POLL_SECONDS", "1.0"))
 
 
-def load_prompt(name: str) -> str:
-    """
-    Load a system prompt from backend/prompts/<name>.md.
+class Prompt(NamedTuple):
+    text: str
+    version: str
+    mtime: float
+
+
+# name -> Prompt. Replaced wholesale, never mutated in place, so readers
+# always see a consistent table.
+_table: dict[str, Prompt] = {}
+# text -> version, for callers that only hold the rendered system prompt
+_versions: dict[str, str] = {}
+_watcher: asyncio.Task | None = None
 
-    In production: the result is cached in memory after the first read.
-    In dev (HOT_RELOAD_PROMPTS=1): re-reads from disk every time — no restart needed
-    when you edit a prompt file and want to test the change immediately.
-    """
-    if not _HOT_RELOAD and name in _cache:
-        return _cache[name]
 
-    path = os.path.join(_PROMPTS_DIR, f"{name}.md")
+def _hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:12]
+
+
+def _path(name: str) -> str:
+    return os.path.join(_PROMPTS_DIR, f"{name}.md")
+
+
+def _read(name: str) -> Prompt:
+    path = _path(name)
     if not os.path.exists(path):
         raise FileNotFoundError(
             f"Prompt file not found: {path}\n"
             f"Create backend/prompts/{name}.md to define this prompt."
         )
-
+    mtime = os.path.getmtime(path)
     with open(path, "r", encoding="utf-8") as f:
         content = f.read().strip()
+    return Prompt(content, _hash(content), mtime)
+
+
+def _swap(updates: dict[str, Prompt], removed: tuple[str, ...] = ()) -> None:
+    global _table, _versions
+    table = {**_table, **updates}
+    for name in removed:
+        table.pop(name, None)
+    _versions = {p.text: p.version for p in table.values()}
+    _table = table
+
+
+def load_prompt(name: str) -> str:
+    """
+    Load a system prompt from backend/prompts/<name>.md.
+
+    Served from the in-memory table; the file is only read on first use.
+    With HOT_RELOAD_PROMPTS=1 the watcher keeps the table in sync with disk.
+    """
+    prompt = _table.get(name)
+    if prompt is None:
+        prompt = _read(name)
+        _swap({name: prompt})
+    return prompt.text
+
+
+def prompt_version(text: str) -> str:
+    """Version hash of a system prompt (prompts not loaded from disk are hashed on the fly)."""
+    version = _versions.get(text)
+    return version if version is not None else _hash(text)
+
+
+def prompt_versions() -> dict[str, str]:
+    """name -> version for every loaded prompt."""
+    return {name: p.version for name, p in _table.items()}
+
+
+def reload_changed() -> list[str]:
+    """Re-read prompt files whose mtime changed; returns the names whose text changed."""
+    updates: dict[str, Prompt] = {}
+    for name, current in _table.items():
+        try:
+            if os.path.getmtime(_path(name)) == current.mtime:
+                continue
+            updates[name] = _read(name)  # a touch without edits only refreshes the mtime
+        except OSError:
+            # Deleted or mid-save — keep serving the last good version
+            continue
+    changed = [name for name, p in updates.items() if p.version != _table[name].version]
+    if updates:
+        _swap(updates)
+    for name in changed:
+        logger.info(f"Prompt reloaded: {name} -> {updates[name].version}")
+    return changed
+
+
+async def _watch() -> None:
+    try:
+        from watchfiles import awatch  # installed with uvicorn[standard]
+    except ImportError:
+        awatch = None
+
+    if awatch is not None:
+        async for _ in awatch(_PROMPTS_DIR, watch_filter=lambda _, path: path.endswith(".md")):
+            reload_changed()
+        return
+
+    while True:
+        await asyncio.sleep(_POLL_SECONDS)
+        reload_changed()
+
+
+def start_prompt_watcher() -> None:
+    """Start watching prompt files (no-op unless HOT_RELOAD_PROMPTS=1). Called from the app lifespan."""
+    global _watcher
+    if _HOT_RELOAD and _watcher is None:
+        _watcher = asyncio.create_task(_watch())
 
-    if not _HOT_RELOAD:
-        _cache[name] = content
 
-    return content
+async def stop_prompt_watcher() -> None:
+    global _watcher
+    if _watcher is None:
+        return
+    _watcher.cancel()
+    try:
+        await _watcher
+    except asyncio.CancelledError:
+        pass
+    _watcher = None
 
 
 def invalidate_cache(name: str | None = None) -> None:
     """
-    Manually invalidate the prompt cache.
+    Manually invalidate the prompt table.
     Call with no args to clear all, or pass a name to clear just one.
     Useful in tests.
     """
-    global _cache
     if name is None:
-        _cache = {}
+        _swap({}, tuple(_table))
     else:
-        _cache.pop(name, None)
+        _swap({}, (name,))
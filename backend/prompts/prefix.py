@@ -0,0 +1,60 @@
+"""
+Stable prompt prefixes — Perspectra
+
+Agent prompts are split in two:
+  - prefix:   problem + profile blocks — identical across every call a student
+              makes on one problem until their profile changes
+  - volatile: code, question, conversation, previous hints — goes last
+
+The rendered prefix is memoized per (agent, problem_id, user_id, profile
+version), so repeat interactions skip the formatting work, and because the
+bytes are identical the provider can serve the system prompt + prefix from
+its prompt cache (see `prefix=` in llm/client.py).
+
+Usage:
+    from prompts.prefix import memoized_prefix
+    prefix = memoized_prefix("tutor", problem, profile, lambda: render(...))
+"""
+
+from collections import OrderedDict
+from typing import Callable
+
+_MAX_ENTRIES = 1024
+_cache: OrderedDict[tuple, str] = OrderedDict()
+_stats = {"hits": 0, "misses": 0}
+
+
+def profile_version(profile: dict) -> str | None:
+    """Identifies one state of a profile — every update_profile bumps `updated_at`."""
+    version = profile.get("version", profile.get("updated_at"))
+    return None if version is None else str(version)
+
+
+def memoized_prefix(agent: str, problem: dict, profile: dict, render: Callable[[], str]) -> str:
+    """Return the cached prefix for this problem/profile state, rendering it on a miss."""
+    version = profile_version(profile)
+    if version is None:
+        return render()
+
+    key = (agent, problem.get("id"), profile.get("user_id"), version)
+    prefix = _cache.get(key)
+    if prefix is not None:
+        _cache.move_to_end(key)
+        _stats["hits"] += 1
+        return prefix
+
+    _stats["misses"] += 1
+    prefix = render()
+    _cache[key] = prefix
+    if len(_cache) > _MAX_ENTRIES:
+        _cache.popitem(last=False)
+    return prefix
+
+
+def stats() -> dict:
+    return {**_stats, "entries": len(_cache)}
+
+
+def invalidate_cache() -> None:
+    """Drop every memoized prefix (e.g. after prompt templates change). Useful in tests."""
+    _cache.clear()
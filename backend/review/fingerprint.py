@@ -0,0 +1,56 @@
+"""
+Submission fingerprints — Perspectra
+
+Two submissions get the same fingerprint when they are the same program for
+the same problem: formatting and comments don't count, identifiers do.
+
+  - Python: the AST dump (no positions), so whitespace, comments and
+    line breaks disappear but every name and literal is kept
+  - anything else, or Python that doesn't parse: comments stripped
+    (outside string literals) and whitespace runs collapsed
+
+Usage:
+    from review.fingerprint import code_fingerprint
+    fp = code_fingerprint("two-sum", "python", code)
+"""
+
+import ast
+import hashlib
+import re
+
+# Bump when normalization changes so old fingerprints stop matching
+_VERSION = "1"
+
+_C_STYLE = re.compile(r'("(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\')|//[^\n]*|/\*.*?\*/', re.S)
+_HASH_STYLE = re.compile(r'("(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\')|#[^\n]*')
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _normalize_python(code: str) -> str | None:
+    try:
+        tree = ast.parse(code)
+    except (SyntaxError, ValueError):
+        return None
+    return ast.dump(tree, annotate_fields=False, include_attributes=False)
+
+
+def _normalize_text(code: str, language: str) -> str:
+    comments = _HASH_STYLE if language in ("python", "ruby") else _C_STYLE
+    code = comments.sub(lambda m: m.group(1) or " ", code)
+    return _WHITESPACE.sub(" ", code).strip()
+
+
+def normalize_code(code: str, language: str) -> str:
+    language = language.lower()
+    if language == "python":
+        normalized = _normalize_python(code)
+        if normalized is not None:
+            return normalized
+    return _normalize_text(code, language)
+
+
+def code_fingerprint(problem_id: str, language: str, code: str) -> str:
+    """Stable hash of (problem, language, normalized code)."""
+    language = language.lower()
+    key = "\x00".join((_VERSION, problem_id, language, normalize_code(code, language)))
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
@@ -0,0 +1,166 @@
+"""
+Review history — keyset pagination over `reviews`
+
+Pages are ordered newest first by (created_at, _id) and served from the
+(user_id, created_at, _id) index. A page ends with an opaque cursor token
+naming its last review; the next page starts strictly after it, so paging
+costs the same on page 1 and page 100 and never skips or repeats reviews
+when new ones arrive.
+
+`created_at` is a BSON datetime. Reviews written before that change store
+an ISO string; Mongo sorts those after every datetime (newest first), and
+cursors carry the type so paging walks through both. Convert them once with:
+
+Usage:
+  cd backend
+  python -m review.history --migrate
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import os
+import sys
+from datetime import datetime, timezone
+from typing import AsyncIterator
+
+from bson import ObjectId
+from bson.errors import InvalidId
+
+# Allow running as a module from backend/
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from db.mongo import connect_mongo, close_mongo, get_db
+
+# Fields a client may ask for with `fields=`
+HISTORY_FIELDS = (
+    "problem_id", "problem_title", "language", "code", "score", "strengths",
+    "weaknesses", "concept_gaps", "topics_to_revise", "thinking_style",
+    "detailed_feedback", "known_concepts", "profile_updates", "tests", "created_at",
+)
+# Default page fields — everything but the submitted code
+DEFAULT_FIELDS = tuple(f for f in HISTORY_FIELDS if f != "code")
+
+MAX_PAGE_SIZE = 100
+EXPORT_BATCH_SIZE = 200
+
+
+class InvalidCursor(ValueError):
+    """The cursor token is malformed or was not issued by this endpoint."""
+
+
+def parse_fields(fields: str | None, default: tuple[str, ...] = DEFAULT_FIELDS) -> tuple[str, ...]:
+    """`fields=score,problem_title` -> the requested subset of HISTORY_FIELDS (unknown names are rejected)."""
+    if not fields:
+        return default
+    requested = tuple(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+    unknown = [f for f in requested if f not in HISTORY_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return requested
+
+
+def encode_cursor(review: dict) -> str:
+    created_at = review["created_at"]
+    if isinstance(created_at, datetime):
+        data = {"t": created_at.isoformat(), "id": str(review["_id"])}
+    else:  # legacy ISO string, not yet migrated
+        data = {"s": str(created_at), "id": str(review["_id"])}
+    raw = json.dumps(data)
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str) -> tuple[datetime | str, ObjectId]:
+    """(created_at, _id) of the cursor's review; created_at is a str for a legacy string value."""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        data = json.loads(raw)
+        if "s" in data:
+            if not isinstance(data["s"], str):
+                raise TypeError("legacy created_at must be a string")
+            return data["s"], ObjectId(data["id"])
+        return datetime.fromisoformat(data["t"]), ObjectId(data["id"])
+    except (ValueError, KeyError, TypeError, InvalidId) as e:
+        raise InvalidCursor("Invalid history cursor") from e
+
+
+def _query(user_id: str, cursor: str | None) -> dict:
+    query: dict = {"user_id": user_id}
+    if cursor:
+        created_at, last_id = decode_cursor(cursor)
+        query["$or"] = [
+            {"created_at": {"$lt": created_at}},
+            {"created_at": created_at, "_id": {"$lt": last_id}},
+        ]
+        if isinstance(created_at, datetime):
+            # $lt only compares within a BSON type; string dates sort after every datetime
+            query["$or"].append({"created_at": {"$type": "string"}})
+    return query
+
+
+def _find(user_id: str, cursor: str | None, fields: tuple[str, ...]):
+    projection = {field: 1 for field in fields}
+    projection["created_at"] = 1  # always needed for the cursor
+    return get_db().reviews.find(_query(user_id, cursor), projection).sort([("created_at", -1), ("_id", -1)])
+
+
+def _public(review: dict, fields: tuple[str, ...]) -> dict:
+    out = {field: review[field] for field in fields if field in review}
+    if isinstance(out.get("created_at"), datetime):
+        # Motor returns naive UTC datetimes — say so, or browsers read them as local time
+        ts = out["created_at"]
+        out["created_at"] = (ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)).isoformat()
+    return out
+
+
+async def history_page(
+    user_id: str,
+    limit: int = 10,
+    cursor: str | None = None,
+    fields: tuple[str, ...] = DEFAULT_FIELDS,
+) -> dict:
+    """One page of reviews, newest first, plus the token for the next page (None on the last)."""
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    # One extra row tells us whether another page exists
+    reviews = await _find(user_id, cursor, fields).limit(limit + 1).to_list(length=limit + 1)
+    next_cursor = encode_cursor(reviews[limit - 1]) if len(reviews) > limit else None
+    return {
+        "reviews": [_public(r, fields) for r in reviews[:limit]],
+        "next_cursor": next_cursor,
+    }
+
+
+async def export_ndjson(user_id: str, fields: tuple[str, ...] = HISTORY_FIELDS) -> AsyncIterator[str]:
+    """Every review as one JSON object per line, read from Mongo in batches."""
+    async for review in _find(user_id, None, fields).batch_size(EXPORT_BATCH_SIZE):
+        yield json.dumps(_public(review, fields), default=str) + "\n"
+
+
+async def migrate_created_at() -> int:
+    """Convert ISO-string `created_at` values to BSON datetimes; returns how many reviews changed."""
+    result = await get_db().reviews.update_many(
+        {"created_at": {"$type": "string"}},
+        [{"$set": {"created_at": {"$toDate": "$created_at"}}}],
+    )
+    return result.modified_count
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Review history maintenance")
+    parser.add_argument("--migrate", action="store_true", help="convert string created_at values to BSON dates")
+    args = parser.parse_args()
+    if not args.migrate:
+        parser.print_help()
+        return
+
+    await connect_mongo()
+    try:
+        changed = await migrate_created_at()
+        print(f"✅ Converted created_at on {changed} reviews")
+    finally:
+        await close_mongo()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,291 @@
+"""
+Asynchronous review jobs — Mongo-backed queue + worker pool
+
+POST /review/jobs enqueues a submission and returns straight away; a worker
+runs the reviewer and the profile merge, and the client picks the result up
+from GET /review/jobs/{id} or the SSE stream at /review/jobs/{id}/stream.
+One document per job in `review_jobs`:
+
+    {_id, user_id, problem_id, code, language, status, attempts,
+     created_at, next_attempt_at, locked_until, lease, started_at,
+     finished_at, result, error}
+
+status: queued -> running -> done | failed. Workers claim jobs with a lease,
+so a job whose worker died is picked up again once the lease runs out. Each
+claim gets a fresh `lease` token and only its holder can finish or requeue
+the job, so a worker that outlived its lease can't overwrite the result of
+the worker that re-claimed it.
+Transient provider failures are retried with backoff, and lease-expired
+jobs are re-claimed, up to review_job_max_attempts in all; a job whose
+lease runs out on its last attempt (it hung, or killed its worker) is
+failed. Finished jobs expire after review_job_ttl_seconds.
+
+The queue is bounded: `enqueue` raises QueueFull once review_queue_max jobs
+are waiting, and the route answers 429 with Retry-After.
+
+Workers run in the API process (review_job_workers > 0) or as a separate
+process. In-process workers start on the first enqueue, or at startup when
+unfinished jobs are waiting, so an API that never sees a job never polls:
+
+Usage:
+  cd backend
+  python -m review.jobs [--workers 4]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from fastapi import BackgroundTasks, HTTPException
+from pymongo import ReturnDocument
+
+# Allow running as a module from backend/
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from config import get_settings
+from db.metrics import REVIEW_JOB_FAILURES, REVIEW_JOB_SECONDS, REVIEW_JOBS_QUEUED
+from db.mongo import connect_mongo, close_mongo, get_db
+from profile.service import start_profile_invalidation, stop_profile_invalidation
+from llm.client import llm
+from llm.deadline import deadline, is_retryable
+from review.fingerprint import code_fingerprint
+from review.service import find_reused_review, load_problem_and_profile, record_review, review_submission
+from sandbox.runner import start_sandbox, stop_sandbox
+
+logger = logging.getLogger(__name__)
+
+_workers: list[asyncio.Task] = []
+
+
+class QueueFull(Exception):
+    """Too many review jobs are waiting; `retry_after` is a hint in seconds."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Review queue is full, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+async def enqueue(user_id: str, problem_id: str, code: str, language: str) -> dict:
+    """Queue a review job and return it. Raises QueueFull when the queue is at capacity."""
+    settings = get_settings()
+    db = get_db()
+    waiting = await db.review_jobs.count_documents({"status": "queued"})
+    REVIEW_JOBS_QUEUED.set(waiting)
+    if waiting >= settings.review_queue_max:
+        raise QueueFull(settings.review_queue_retry_after_seconds)
+
+    now = datetime.now(timezone.utc)
+    job = {
+        "_id": uuid.uuid4().hex,
+        "user_id": user_id,
+        "problem_id": problem_id,
+        "code": code,
+        "language": language,
+        "status": "queued",
+        "attempts": 0,
+        "created_at": now,
+        "next_attempt_at": now,
+        "locked_until": None,
+    }
+    await db.review_jobs.insert_one(job)
+    start_review_workers()
+    return job
+
+
+async def get_job(job_id: str, user_id: str) -> dict | None:
+    """The job, as seen by its owner — None for unknown ids and other users' jobs."""
+    return await get_db().review_jobs.find_one(
+        {"_id": job_id, "user_id": user_id},
+        {"code": 0, "locked_until": 0, "lease": 0, "next_attempt_at": 0},
+    )
+
+
+def job_view(job: dict) -> dict:
+    """Client body for a job."""
+    view = {
+        "job_id": job["_id"],
+        "status": job["status"],
+        "problem_id": job["problem_id"],
+        "created_at": job["created_at"],
+    }
+    if job["status"] == "done":
+        view["result"] = job.get("result")
+    elif job["status"] == "failed":
+        view["error"] = job.get("error")
+    return view
+
+
+async def _claim(db, now: datetime, lease_seconds: float, max_attempts: int) -> dict | None:
+    """Lease the oldest due job: queued, or running under a lease that ran out with attempts to spare."""
+    return await db.review_jobs.find_one_and_update(
+        {
+            "$or": [
+                {"status": "queued", "next_attempt_at": {"$lte": now}},
+                {"status": "running", "locked_until": {"$lte": now}, "attempts": {"$lt": max_attempts}},
+            ],
+        },
+        {
+            "$set": {
+                "status": "running",
+                "started_at": now,
+                "locked_until": now + timedelta(seconds=lease_seconds),
+                "lease": uuid.uuid4().hex,
+            },
+            "$inc": {"attempts": 1},
+        },
+        sort=[("created_at", 1)],
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+async def _fail_abandoned(db, now: datetime, max_attempts: int) -> None:
+    """Fail jobs whose lease ran out on their last attempt — retrying would only hang or crash again."""
+    result = await db.review_jobs.update_many(
+        {"status": "running", "locked_until": {"$lte": now}, "attempts": {"$gte": max_attempts}},
+        {"$set": {
+            "status": "failed",
+            "finished_at": now,
+            "locked_until": None,
+            "lease": None,
+            "error": f"Review did not finish after {max_attempts} attempts",
+        }},
+    )
+    if result.modified_count:
+        REVIEW_JOB_FAILURES.inc(result.modified_count)
+        logger.warning(f"Failed {result.modified_count} review jobs that ran out of attempts")
+
+
+def _held(job: dict) -> dict:
+    """Filter matching `job` only while this worker's lease on it is current."""
+    return {"_id": job["_id"], "status": "running", "lease": job["lease"]}
+
+
+async def _finish(db, job: dict, status: str, **fields) -> bool:
+    """Record the outcome; False when another worker has since re-claimed the job."""
+    result = await db.review_jobs.update_one(_held(job), {"$set": {
+        "status": status,
+        "finished_at": datetime.now(timezone.utc),
+        "locked_until": None,
+        "lease": None,
+        **fields,
+    }})
+    if not result.matched_count:
+        logger.warning(f"Review job {job['_id']} was re-claimed after its lease ran out; dropping this result")
+        return False
+    return True
+
+
+async def _process(db, job: dict) -> None:
+    settings = get_settings()
+    started = time.perf_counter()
+    background_tasks = BackgroundTasks()
+    try:
+        problem, profile = await load_problem_and_profile(job["problem_id"], job["user_id"])
+        fingerprint = code_fingerprint(job["problem_id"], job["language"], job["code"])
+        result = await find_reused_review(job["user_id"], profile, fingerprint)
+        if result is None:
+            with deadline(settings.deadline_review_seconds):
+                review = await review_submission(problem, profile, job["code"], job["language"])
+            result = await record_review(
+                job["user_id"], problem, job["code"], job["language"], fingerprint, review, background_tasks,
+                job_id=job["_id"],
+            )
+    except HTTPException as e:
+        REVIEW_JOB_FAILURES.inc()
+        await _finish(db, job, "failed", error=e.detail)
+        return
+    except Exception as e:
+        REVIEW_JOB_FAILURES.inc()
+        if is_retryable(e) and job["attempts"] < settings.review_job_max_attempts:
+            delay = settings.review_job_backoff_seconds * 2 ** (job["attempts"] - 1)
+            logger.warning(f"Review job {job['_id']} failed (attempt {job['attempts']}), retrying in {delay:.0f}s: {e}")
+            await db.review_jobs.update_one(_held(job), {"$set": {
+                "status": "queued",
+                "next_attempt_at": datetime.now(timezone.utc) + timedelta(seconds=delay),
+                "locked_until": None,
+                "lease": None,
+            }})
+            return
+        await _finish(db, job, "failed", error=f"Reviewer agent failed: {e}")
+        return
+
+    if not await _finish(db, job, "done", result=result):
+        return
+    REVIEW_JOB_SECONDS.observe(time.perf_counter() - started)
+    # Background agent (every 5th submission) runs after the result is visible
+    await background_tasks()
+
+
+async def _run() -> None:
+    settings = get_settings()
+    db = get_db()
+    while True:
+        try:
+            now = datetime.now(timezone.utc)
+            job = await _claim(db, now, settings.review_job_lease_seconds, settings.review_job_max_attempts)
+            if job is not None:
+                await _process(db, job)
+                continue
+            # Idle — sweep jobs abandoned on their last attempt
+            await _fail_abandoned(db, now, settings.review_job_max_attempts)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Review job worker iteration failed: {e}")
+        await asyncio.sleep(settings.review_job_poll_seconds)
+
+
+def start_review_workers(count: int | None = None) -> None:
+    """Start `count` (default review_job_workers) job workers, once. Called on enqueue."""
+    if _workers:
+        return
+    for _ in range(get_settings().review_job_workers if count is None else count):
+        _workers.append(asyncio.create_task(_run()))
+
+
+async def resume_review_workers() -> None:
+    """Start the in-process workers if jobs were left queued or running. Called from the app lifespan."""
+    if get_settings().review_job_workers <= 0:
+        return
+    if await get_db().review_jobs.count_documents({"status": {"$in": ["queued", "running"]}}, limit=1):
+        start_review_workers()
+
+
+async def stop_review_workers() -> None:
+    for worker in _workers:
+        worker.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers.clear()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Run review job workers outside the API process")
+    parser.add_argument("--workers", type=int, default=get_settings().review_job_workers or 1)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    await connect_mongo()
+    start_profile_invalidation()
+    start_sandbox()
+    start_review_workers(args.workers)
+    print(f"✅ {args.workers} review job workers running — Ctrl+C to stop")
+    try:
+        await asyncio.gather(*_workers)
+    finally:
+        await stop_review_workers()
+        await stop_profile_invalidation()
+        await stop_sandbox()
+        await llm.aclose()
+        await close_mongo()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
@@ -1,16 +1,46 @@
 """
-Review router — /review/submit and /review/history
+Review router — /review/submit, /review/submit/stream, /review/jobs and /review/history
+
+/review/history is keyset-paginated (review/history.py): pass the returned
+`next_cursor` back as `cursor` for the next page, and `fields=a,b` to pick
+fields. /review/history/export streams every review as NDJSON.
+
+/review/submit/stream pushes review fields as Server-Sent Events while the
+reviewer is still generating:
+    event: field  data: {"key": "score", "value": 72}
+    event: done   data: {<same body as /review/submit>}
+    event: error  data: {"detail": "..."}
+
+/review/jobs is the asynchronous alternative (review/jobs.py): it queues the
+submission and answers 202 with a job id straight away. Poll
+GET /review/jobs/{id}, or follow GET /review/jobs/{id}/stream:
+    event: status data: {"status": "running"}
+    event: done   data: {<same body as /review/submit>}
+    event: error  data: {"detail": "..."}
+A full queue answers 429 with a Retry-After header.
 """
 
-from datetime import datetime, timezone
+import asyncio
 from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
 from auth.utils import get_current_user
-from db.mongo import get_db
-from profile.service import get_profile, update_profile
-from agents.reviewer import run_reviewer
-from agents.background import run_background_agent
+from config import get_settings
+from review.fingerprint import code_fingerprint
+from review.history import HISTORY_FIELDS, export_ndjson, history_page, parse_fields
+from review.service import (
+    RESPONSE_FIELDS,
+    find_reused_review,
+    load_problem_and_profile,
+    record_review,
+    review_submission,
+    test_submission,
+)
+from review.jobs import QueueFull, enqueue, get_job, job_view
+from agents.reviewer import run_reviewer_stream, apply_review_defaults
+from llm.deadline import deadline, http_status_for
+from sse import sse_event, sse_response
 
 router = APIRouter(prefix="/review", tags=["review"])
 
@@ -28,83 +58,144 @@ async def submit_review(
     user: dict = Depends(get_current_user),
 ):
     user_id = user["sub"]
-    db = get_db()
+    problem, profile = await load_problem_and_profile(payload.problem_id, user_id)
 
-    # Fetch problem
-    problem = await db.problems.find_one({"id": payload.problem_id}, {"_id": 0})
-    if not problem:
-        raise HTTPException(status_code=404, detail="Problem not found")
+    # Same code as a recent submission — answer from its review, no LLM call
+    fingerprint = code_fingerprint(payload.problem_id, payload.language, payload.code)
+    reused = await find_reused_review(user_id, profile, fingerprint)
+    if reused is not None:
+        return reused
 
-    # Fetch profile
-    profile = await get_profile(user_id)
-    if not profile:
-        raise HTTPException(status_code=404, detail="Profile not found")
-
-    # Run Reviewer Agent
+    # Run the tests, then the Reviewer Agent
     try:
-        review = await run_reviewer(problem, payload.code, profile, payload.language)
+        with deadline(get_settings().deadline_review_seconds):
+            review = await review_submission(problem, profile, payload.code, payload.language)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Reviewer agent failed: {e}")
-
-    # Persist review
-    review_doc = {
-        "user_id": user_id,
-        "problem_id": payload.problem_id,
-        "problem_title": problem["title"],
-        "code": payload.code,
-        "language": payload.language,
-        "created_at": datetime.now(timezone.utc).isoformat(),
-        **review,
-    }
-    await db.reviews.insert_one(review_doc)
-
-    # Update profile from review — merge profile_updates from LLM
-    profile_updates = review.get("profile_updates", {})
-
-    # Also persist high-signal fields from the review directly onto the profile
-    # so every subsequent agent call gets richer context automatically
-    if review.get("thinking_style"):
-        profile_updates["thinking_style"] = review["thinking_style"]
-
-    if review.get("concept_gaps"):
-        # recent_weaknesses = last 10 unique gaps across submissions
-        existing_weaknesses = profile.get("recent_weaknesses", [])
-        merged = review["concept_gaps"] + [w for w in existing_weaknesses if w not in review["concept_gaps"]]
-        profile_updates["recent_weaknesses"] = merged[:10]
-
-    if review.get("known_concepts"):
-        existing_known = set(profile.get("known_concepts", []))
-        existing_known.update(review["known_concepts"])
-        profile_updates["known_concepts"] = list(existing_known)
-
-    if profile_updates:
-        await update_profile(user_id, profile_updates)
-
-    # Increment submission count
-    new_count = profile.get("submissions_count", 0) + 1
-    await update_profile(user_id, {"submissions_count": new_count})
-
-    # Trigger background agent every 5 submissions
-    if new_count % 5 == 0:
-        background_tasks.add_task(run_background_agent, user_id)
-
-    return {
-        "score": review.get("score", 0),
-        "strengths": review.get("strengths", []),
-        "weaknesses": review.get("weaknesses", []),
-        "concept_gaps": review.get("concept_gaps", []),
-        "topics_to_revise": review.get("topics_to_revise", []),
-        "thinking_style": review.get("thinking_style", ""),
-        "detailed_feedback": review.get("detailed_feedback", ""),
-        "known_concepts": review.get("known_concepts", []),
-    }
+        raise HTTPException(status_code=http_status_for(e), detail=f"Reviewer agent failed: {e}")
+
+    return await record_review(
+        user_id, problem, payload.code, payload.language, fingerprint, review, background_tasks,
+    )
+
+
+@router.post("/submit/stream")
+async def submit_review_stream(
+    payload: SubmitRequest,
+    background_tasks: BackgroundTasks,
+    user: dict = Depends(get_current_user),
+):
+    user_id = user["sub"]
+    problem, profile = await load_problem_and_profile(payload.problem_id, user_id)
+    fingerprint = code_fingerprint(payload.problem_id, payload.language, payload.code)
+    reused = await find_reused_review(user_id, profile, fingerprint)
+
+    async def events():
+        if reused is not None:
+            for key, value in reused.items():
+                yield sse_event("field", {"key": key, "value": value})
+            yield sse_event("done", reused)
+            return
+
+        review: dict = {}
+        try:
+            tests, review = await test_submission(problem, payload.code, payload.language)
+            if review is not None:
+                # Doesn't compile — no LLM call
+                for key in RESPONSE_FIELDS:
+                    yield sse_event("field", {"key": key, "value": review.get(key)})
+            else:
+                review = {}
+                async for key, value in run_reviewer_stream(problem, payload.code, profile, payload.language, tests=tests):
+                    review[key] = value
+                    if key in RESPONSE_FIELDS:
+                        yield sse_event("field", {"key": key, "value": value})
+                review = {**apply_review_defaults(review), "tests": tests}
+        except Exception as e:
+            yield sse_event("error", {"detail": f"Reviewer agent failed: {e}"})
+            return
+
+        # Persist only once the whole review has arrived
+        try:
+            result = await record_review(
+                user_id, problem, payload.code, payload.language, fingerprint, review, background_tasks,
+            )
+        except Exception as e:
+            yield sse_event("error", {"detail": f"Saving the review failed: {e}"})
+            return
+        yield sse_event("done", result)
+
+    return sse_response(events())
+
+
+@router.post("/jobs", status_code=202)
+async def submit_review_job(payload: SubmitRequest, user: dict = Depends(get_current_user)):
+    user_id = user["sub"]
+    await load_problem_and_profile(payload.problem_id, user_id)  # 404 now, not in the job
+    try:
+        job = await enqueue(user_id, payload.problem_id, payload.code, payload.language)
+    except QueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    return job_view(job)
+
+
+@router.get("/jobs/{job_id}")
+async def review_job(job_id: str, user: dict = Depends(get_current_user)):
+    job = await get_job(job_id, user["sub"])
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_view(job)
+
+
+@router.get("/jobs/{job_id}/stream")
+async def review_job_stream(job_id: str, user: dict = Depends(get_current_user)):
+    user_id = user["sub"]
+    job = await get_job(job_id, user_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def events():
+        current = job
+        status = None
+        while True:
+            if current is None:
+                yield sse_event("error", {"detail": "Job not found"})
+                return
+            if current["status"] == "done":
+                yield sse_event("done", current.get("result") or {})
+                return
+            if current["status"] == "failed":
+                yield sse_event("error", {"detail": current.get("error")})
+                return
+            if current["status"] != status:
+                status = current["status"]
+                yield sse_event("status", {"status": status})
+            await asyncio.sleep(get_settings().review_job_poll_seconds)
+            current = await get_job(job_id, user_id)
+
+    return sse_response(events())
 
 
 @router.get("/history")
-async def review_history(user: dict = Depends(get_current_user), limit: int = 10):
-    db = get_db()
-    cursor = db.reviews.find(
-        {"user_id": user["sub"]},
-        {"_id": 0, "code": 0}
-    ).sort("created_at", -1).limit(limit)
-    return {"reviews": await cursor.to_list(length=limit)}
+async def review_history(
+    user: dict = Depends(get_current_user),
+    limit: int = 10,
+    cursor: str | None = None,
+    fields: str | None = None,
+):
+    try:
+        return await history_page(user["sub"], limit, cursor, parse_fields(fields))
+    except ValueError as e:  # includes InvalidCursor
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/history/export")
+async def export_review_history(user: dict = Depends(get_current_user), fields: str | None = None):
+    try:
+        selected = parse_fields(fields, default=HISTORY_FIELDS)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return StreamingResponse(
+        export_ndjson(user["sub"], selected),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="review-history.ndjson"'},
+    )
@@ -0,0 +1,173 @@
+"""
+Review service — the submit pipeline shared by the /review routes and the
+review job workers (review/jobs.py): load the problem and profile, reuse a
+recent review of the same code if there is one, otherwise run the code
+against the problem's tests (sandbox/runner.py) and review it, then persist
+the review and merge its signals into the profile.
+"""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+from fastapi import BackgroundTasks, HTTPException
+from pymongo.errors import DuplicateKeyError
+
+from config import get_settings
+from db.metrics import REVIEW_DEDUP_LOOKUPS
+from db.mongo import get_db
+from profile.service import Increment, ListMerge, get_profile, update_profile
+from agents.background import run_background_agent
+from agents.reviewer import run_reviewer, syntax_error_review
+from sandbox.runner import run_tests
+
+# Fields returned to the client (profile_updates stays server-side)
+RESPONSE_FIELDS = {
+    "score": 0,
+    "strengths": [],
+    "weaknesses": [],
+    "concept_gaps": [],
+    "topics_to_revise": [],
+    "thinking_style": "",
+    "detailed_feedback": "",
+    "known_concepts": [],
+    "tests": None,            # sandbox results, when the code was run
+}
+
+
+async def load_problem_and_profile(problem_id: str, user_id: str) -> tuple[dict, dict]:
+    db = get_db()
+
+    # Independent reads — issue them together
+    problem, profile = await asyncio.gather(
+        db.problems.find_one({"id": problem_id}, {"_id": 0}),
+        get_profile(user_id),
+    )
+    if not problem:
+        raise HTTPException(status_code=404, detail="Problem not found")
+    if not profile:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return problem, profile
+
+
+async def test_submission(problem: dict, code: str, language: str) -> tuple[dict | None, dict | None]:
+    """
+    (test results, short-circuit review). The review is set when the code
+    is too broken to be worth an LLM call (it doesn't compile) and
+    sandbox_short_circuit is on; use it instead of running the reviewer.
+    """
+    tests = await run_tests(problem, code, language)
+    if tests and tests["status"] == "syntax_error" and get_settings().sandbox_short_circuit:
+        return tests, {**syntax_error_review(tests["error"]), "tests": tests}
+    return tests, None
+
+
+async def review_submission(problem: dict, profile: dict, code: str, language: str) -> dict:
+    """Test the code, then run the Reviewer Agent with the results (unless short-circuited)."""
+    tests, review = await test_submission(problem, code, language)
+    if review is not None:
+        return review
+    review = await run_reviewer(problem, code, profile, language, tests=tests)
+    return {**review, "tests": tests}
+
+
+async def find_reused_review(user_id: str, profile: dict, fingerprint: str) -> dict | None:
+    """
+    Client body of this user's most recent review of the same code (see
+    review/fingerprint.py) within review_dedup_window_hours, or None.
+
+    review_dedup_policy:
+      - "off":          always review
+      - "any":          reuse regardless of profile changes since
+      - "same_profile": reuse only if the profile hasn't changed since that review
+    """
+    settings = get_settings()
+    if settings.review_dedup_policy == "off":
+        return None
+
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=settings.review_dedup_window_hours)
+    query = {"user_id": user_id, "fingerprint": fingerprint, "created_at": {"$gte": cutoff}}
+    if settings.review_dedup_policy == "same_profile":
+        query["profile_version"] = profile.get("version", 0)
+
+    projection = {"_id": 0, **{field: 1 for field in RESPONSE_FIELDS}}
+    previous = await get_db().reviews.find_one(query, projection, sort=[("created_at", -1)])
+    REVIEW_DEDUP_LOOKUPS.labels("hit" if previous else "miss").inc()
+    if previous is None:
+        return None
+    return {field: previous.get(field, default) for field, default in RESPONSE_FIELDS.items()}
+
+
+async def record_review(
+    user_id: str,
+    problem: dict,
+    code: str,
+    language: str,
+    fingerprint: str,
+    review: dict,
+    background_tasks: BackgroundTasks,
+    job_id: str | None = None,
+) -> dict:
+    """
+    Merge the review's signals into the profile, persist the review and return the client body.
+    The profile is written first so the review records the version that write produced.
+
+    With `job_id` (review/jobs.py) recording happens at most once per job:
+    the review is inserted first under a unique job_id, and a worker that
+    loses that race (its lease ran out and the job was re-claimed) gets the
+    stored review back without touching the profile.
+    """
+    db = get_db()
+
+    # Persist review
+    review_doc = {
+        "user_id": user_id,
+        "problem_id": problem["id"],
+        "problem_title": problem["title"],
+        "code": code,
+        "language": language,
+        "fingerprint": fingerprint,
+        "created_at": datetime.now(timezone.utc),
+        **review,
+    }
+    if job_id is not None:
+        review_doc["job_id"] = job_id
+        try:
+            await db.reviews.insert_one(review_doc)
+        except DuplicateKeyError:
+            stored = await db.reviews.find_one({"job_id": job_id}, {"_id": 0, **{field: 1 for field in RESPONSE_FIELDS}})
+            return {field: stored.get(field, default) for field, default in RESPONSE_FIELDS.items()}
+
+    # Update profile from review — merge profile_updates from LLM
+    profile_updates = dict(review.get("profile_updates", {}))
+
+    # Also persist high-signal fields from the review directly onto the profile
+    # so every subsequent agent call gets richer context automatically
+    if review.get("thinking_style"):
+        profile_updates["thinking_style"] = review["thinking_style"]
+
+    # List merges run server-side (see ListMerge) so concurrent submissions don't lose entries
+    if review.get("concept_gaps"):
+        # recent_weaknesses = last 10 unique gaps across submissions, newest first
+        profile_updates["recent_weaknesses"] = ListMerge(review["concept_gaps"], prepend=True, limit=10)
+
+    if review.get("known_concepts"):
+        # First-seen order (not set order) keeps rendered prompt prefixes stable
+        profile_updates["known_concepts"] = ListMerge(review["known_concepts"])
+
+    # Count the submission in the same write, atomically — concurrent submits
+    # each see their own count, so the trigger below fires exactly once per 5
+    profile_updates["submissions_count"] = Increment()
+
+    updated = await update_profile(user_id, profile_updates)
+    # The version this review's own update produced; a resubmission sees it
+    # unchanged unless something else has written the profile since
+    if job_id is not None:
+        await db.reviews.update_one({"_id": review_doc["_id"]}, {"$set": {"profile_version": updated["version"]}})
+    else:
+        review_doc["profile_version"] = updated["version"]
+        await db.reviews.insert_one(review_doc)
+
+    # Trigger background agent every 5 submissions
+    if updated["submissions_count"] % 5 == 0:
+        background_tasks.add_task(run_background_agent, user_id)
+
+    return {field: review.get(field, default) for field, default in RESPONSE_FIELDS.items()}
@@ -0,0 +1,314 @@
+"""
+Test-case harness — parses problem examples and runs one case against a submission
+
+Problem examples are written LeetCode-style:
+    {"input": "nums = [2,7,11,15], target = 9", "output": "[0,1]"}
+
+`parse_case` turns one into call arguments and an expected value using
+`ast` only (nothing is evaluated); JSON-style true/false/null are accepted.
+Examples that aren't plain data (e.g. "addNum(1), findMedian()") are skipped.
+
+Inside the sandbox (sandbox/runner.py) each case takes two processes:
+  - `main`, the judge, holds the expected value and the channel back to
+    the runner. It starts a fresh interpreter for the submission, with only
+    the submission and the example's input, and judges what comes back
+  - `call_main` runs the submission as a module, finds the function to
+    call — a top-level function or a method (e.g. on `class Solution`)
+    whose parameters match the example's argument names — calls it and
+    reports the return value's repr
+The submission can write anything to its own process's output; it never
+sees the expected value, the judge's report channel or the runner's nonce,
+so the worst it can forge is its own return value.
+
+Neither process imports this file: its source arrives on stdin with the
+request and BOOTSTRAP calls the named entry point, so nothing is read from
+disk inside the sandbox. Keep it standard-library only.
+"""
+
+import ast
+import contextlib
+import inspect
+import io
+import json
+import math
+import os
+import signal
+import subprocess
+import sys
+import time
+from typing import Any
+
+_JSON_NAMES = {"true": True, "false": False, "null": None}
+_MAX_REPR = 300
+_MAX_REPLY_BYTES = 1024 * 1024
+
+_PR_SET_PDEATHSIG = 1
+_PR_SET_DUMPABLE = 4
+
+# `python -I -S -c BOOTSTRAP`: read the request, define this module, run request["entry"]
+BOOTSTRAP = (
+    "import json, sys\n"
+    "request = json.loads(sys.stdin.buffer.read())\n"
+    "exec(compile(request['harness'], 'harness', 'exec'))\n"
+    "globals()[request['entry']](request)\n"
+)
+
+
+class _JsonNames(ast.NodeTransformer):
+    def visit_Name(self, node: ast.Name):
+        if node.id in _JSON_NAMES:
+            return ast.copy_location(ast.Constant(_JSON_NAMES[node.id]), node)
+        return node
+
+
+def _literal(node: ast.AST) -> Any:
+    return ast.literal_eval(_JsonNames().visit(node))
+
+
+def parse_case(example: dict) -> dict | None:
+    """{"args": [(name, value), ...], "expected": value}, or None if the example isn't plain data."""
+    try:
+        call = ast.parse(f"f({example['input']})", mode="eval").body
+        if call.args or not call.keywords or any(kw.arg is None for kw in call.keywords):
+            return None
+        args = [(kw.arg, _literal(kw.value)) for kw in call.keywords]
+        expected = _literal(ast.parse(example["output"].strip(), mode="eval").body)
+    except (KeyError, SyntaxError, ValueError, TypeError, AttributeError, RecursionError):
+        return None
+    return {"args": args, "expected": expected}
+
+
+def _canonical(value: Any) -> Any:
+    if isinstance(value, tuple):
+        value = list(value)
+    if isinstance(value, list):
+        return [_canonical(v) for v in value]
+    return value
+
+
+def _unordered(value: Any) -> Any:
+    if isinstance(value, list):
+        return sorted((_unordered(v) for v in value), key=repr)
+    return value
+
+
+def _same(a: Any, b: Any) -> bool:
+    if isinstance(a, float) or isinstance(b, float):
+        return isinstance(a, (int, float)) and isinstance(b, (int, float)) and math.isclose(a, b, rel_tol=1e-6, abs_tol=1e-9)
+    if isinstance(a, list) and isinstance(b, list):
+        return len(a) == len(b) and all(_same(x, y) for x, y in zip(a, b))
+    return a == b
+
+
+def compare(actual: Any, expected: Any) -> tuple[bool, bool]:
+    """(passed, order_only) — order_only when the values match only if list order is ignored."""
+    actual, expected = _canonical(actual), _canonical(expected)
+    if _same(actual, expected):
+        return True, False
+    if isinstance(expected, list) and _same(_unordered(actual), _unordered(expected)):
+        return True, True
+    return False, False
+
+
+def _shorten(text: str) -> str:
+    return text if len(text) <= _MAX_REPR else text[:_MAX_REPR] + "…"
+
+
+def _candidates(namespace: dict) -> list[tuple[str, Any]]:
+    """Submission-defined functions, then methods of submission-defined classes."""
+    found = []
+    for name, obj in list(namespace.items()):
+        if name.startswith("_"):
+            continue
+        if inspect.isfunction(obj) and obj.__module__ == "__submission__":
+            found.append((name, obj))
+    for name, cls in list(namespace.items()):
+        if not (inspect.isclass(cls) and cls.__module__ == "__submission__"):
+            continue
+        for attr, member in vars(cls).items():
+            if not attr.startswith("_") and inspect.isfunction(member):
+                found.append((f"{name}.{attr}", (cls, attr)))
+    return found
+
+
+def _params(fn) -> list[str]:
+    return [
+        p.name for p in inspect.signature(fn).parameters.values()
+        if p.kind in (p.POSITIONAL_ONLY, p.POSITIONAL_OR_KEYWORD) and p.default is p.empty
+    ]
+
+
+def find_entrypoint(namespace: dict, arg_names: list[str]):
+    """
+    (label, callable, by_name) for the function the example should call, or
+    (None, None, False). by_name is False when only the parameter count
+    matches, so the arguments are passed by position.
+    """
+    by_arity = []
+    for label, target in _candidates(namespace):
+        fn = getattr(target[0], target[1]) if isinstance(target, tuple) else target
+        params = _params(fn)
+        if isinstance(target, tuple) and params[:1] == ["self"]:
+            params = params[1:]
+        if set(params) == set(arg_names) or len(params) == len(arg_names):
+            by_arity.append((set(params) == set(arg_names), label, target))
+    if not by_arity:
+        return None, None, False
+    # Prefer a name match; among equals, the first defined
+    by_arity.sort(key=lambda c: not c[0])
+    by_name, label, target = by_arity[0]
+    if isinstance(target, tuple):
+        cls, attr = target
+        try:
+            target = getattr(cls(), attr)
+        except Exception:
+            target = getattr(cls, attr)  # static method or needs ctor args
+    return label, target, by_name
+
+
+def call_case(code: str, case: dict) -> dict:
+    """
+    Run the submission on one case's arguments. Called in the submission's
+    process; never raises. The return value comes back as its repr, for
+    `judge` to parse and compare.
+    """
+    names = [name for name, _ in case["args"]]
+    stdout = io.StringIO()
+    try:
+        namespace = {"__name__": "__submission__"}
+        with contextlib.redirect_stdout(stdout):
+            exec(compile(code, "<submission>", "exec"), namespace)
+        label, fn, by_name = find_entrypoint(namespace, names)
+        if fn is None:
+            return {"status": "no_entrypoint", "error": f"No function taking ({', '.join(names)}) found"}
+
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(stdout):
+            if by_name:
+                actual = fn(**dict(case["args"]))
+            else:
+                actual = fn(*(value for _, value in case["args"]))
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        shown = repr(actual)
+    except RecursionError:
+        return {"status": "error", "error": "RecursionError: maximum recursion depth exceeded"}
+    except MemoryError:
+        return {"status": "error", "error": "MemoryError: memory limit exceeded"}
+    except Exception as e:
+        # The exception type only — its message is whatever the submission put there
+        return {"status": "error", "error": type(e).__name__}
+    return {"status": "returned", "function": label, "actual": shown, "time_ms": round(elapsed_ms, 3)}
+
+
+def judge(reply: dict, expected: Any) -> dict:
+    """The case result for the submission's `reply`. Only a returned value can pass."""
+    status = reply.get("status")
+    if status in ("error", "no_entrypoint"):
+        return {"status": status, "error": str(reply.get("error", ""))[:_MAX_REPR]}
+    if status != "returned" or not isinstance(reply.get("actual"), str):
+        return {"status": "crashed", "error": "Submission exited before reporting a result"}
+
+    text = reply["actual"]
+    try:
+        actual = _literal(ast.parse(text.strip(), mode="eval").body)
+        passed, order_only = compare(actual, expected)
+    except (SyntaxError, ValueError, TypeError, AttributeError, RecursionError, MemoryError):
+        passed, order_only = False, False  # not plain data, so not the expected value
+    time_ms = reply.get("time_ms")
+    return {
+        "status": "passed" if passed else "wrong_answer",
+        "function": str(reply.get("function", ""))[:_MAX_REPR],
+        "actual": _shorten(text),
+        "order_only": order_only,
+        "time_ms": time_ms if isinstance(time_ms, (int, float)) else None,
+    }
+
+
+def _prctl(option: int, value: int) -> None:
+    try:
+        import ctypes
+        ctypes.CDLL(None).prctl(option, value, 0, 0, 0)
+    except (OSError, AttributeError):
+        pass  # not Linux
+
+
+def call_main(request: dict) -> None:
+    """
+    Submission process entry point: limit this process, run the case's
+    arguments through the submission and print the reply. The submission's
+    own output goes to /dev/null.
+    """
+    import resource
+
+    _prctl(_PR_SET_PDEATHSIG, signal.SIGKILL)  # don't outlive the judge
+    limits = request["limits"]
+    cpu = limits["cpu_seconds"]
+    resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu + 1))
+    memory = limits["memory_mb"] * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (memory, memory))
+    for limit in (resource.RLIMIT_FSIZE, resource.RLIMIT_NPROC, resource.RLIMIT_CORE):
+        resource.setrlimit(limit, (0, 0))
+
+    reply = os.dup(1)
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, 1)
+    os.dup2(devnull, 2)
+
+    case = parse_case({"input": request["input"], "output": "None"})
+    result = call_case(request["code"], case) if case else {"status": "error", "error": "Unparseable test case"}
+    with os.fdopen(reply, "wb") as out:
+        out.write(json.dumps(result).encode("utf-8"))
+
+
+def _run_submission(request: dict) -> dict:
+    """Run `call_main` in a fresh interpreter and collect its reply."""
+    job = {
+        "harness": request["harness"],
+        "entry": "call_main",
+        "code": request["code"],
+        "input": request["example"]["input"],
+        "limits": request["limits"],
+    }
+    child = subprocess.Popen(
+        [sys.executable, "-I", "-S", "-c", BOOTSTRAP],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, env={}, cwd="/",
+    )
+    try:
+        child.stdin.write(json.dumps(job).encode("utf-8"))
+        child.stdin.close()
+    except BrokenPipeError:
+        pass
+    data = child.stdout.read(_MAX_REPLY_BYTES + 1)
+    if len(data) > _MAX_REPLY_BYTES:
+        child.kill()
+    child.wait()
+
+    if child.returncode < 0:
+        sig = -child.returncode
+        if sig == signal.SIGXCPU:
+            return {"status": "timeout", "error": f"CPU limit of {request['limits']['cpu_seconds']}s exceeded"}
+        return {"status": "crashed", "error": f"Killed by {signal.Signals(sig).name} (memory limit is {request['limits']['memory_mb']} MB)"}
+    if len(data) > _MAX_REPLY_BYTES:
+        return {"status": "wrong_answer", "actual": "<output too large>", "order_only": False}
+    try:
+        reply = json.loads(data)
+    except ValueError:
+        reply = {}
+    return judge(reply if isinstance(reply, dict) else {}, request["expected"])
+
+
+def main(request: dict) -> None:
+    """
+    Judge process entry point: run one example through the submission in
+    its own process and write the result, tagged with the runner's nonce,
+    to stdout.
+    """
+    # Not dumpable: the submission (same uid) can't open /proc/<judge>/fd or ptrace us
+    _prctl(_PR_SET_DUMPABLE, 0)
+    case = parse_case(request["example"])
+    if case is None:
+        result = {"status": "error", "error": "Unparseable test case"}
+    else:
+        result = _run_submission({**request, "expected": case["expected"]})
+    sys.stdout.write(json.dumps({"nonce": request["nonce"], **result}, default=str))
+    sys.stdout.flush()
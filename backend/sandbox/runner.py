@@ -0,0 +1,296 @@
+"""
+Sandboxed test runner — executes Python submissions against a problem's tests
+
+Tests are the problem's `examples` plus optional `hidden_tests` (same shape,
+never shown to students). Problems whose examples aren't plain data in and
+out (linked lists, trees, graphs) set `"sandbox": False` and are skipped.
+
+Off by default (sandbox_enabled). Execution model:
+  - every case runs in a fresh interpreter (`python -I -S`) with an empty
+    environment; the harness source, the submission and the case arrive on
+    stdin, so the child needs no access to the backend's files
+  - that child judges the case; the submission itself runs in a second,
+    rlimited interpreter that never sees the expected value or the
+    channel back to the API (see sandbox/harness.py). Results must carry
+    the per-run nonce sent to the judge, so output the submission writes
+    can't pass as a result
+  - the API enforces the wall-clock limit and kills the child's whole
+    process group when it runs out
+  - at most sandbox_workers children run at once
+  - a syntax error is found by compiling in the API process (compile never
+    runs code) and short-circuits the whole run
+
+Isolation (sandbox_isolation) — submissions are untrusted code:
+  - "bwrap" (default): bubblewrap with every namespace unshared — no
+    network, its own /proc, and a read-only filesystem holding only the
+    system libraries and the Python install, plus an empty /tmp
+  - "uid": the child runs as sandbox_uid/sandbox_gid (the API must run as
+    root to switch). It can't read the API's /proc entries or private
+    files, but still has the network and every world-readable file
+  - "none": local development only — the child can read anything the API
+    can, including .env
+When the API runs as root, the child always drops to sandbox_uid/sandbox_gid.
+If the configured isolation isn't available, submissions are not run.
+
+Usage:
+    from sandbox.runner import run_tests
+    results = await run_tests(problem, code, "python")   # None when not applicable
+"""
+
+import asyncio
+import json
+import logging
+import os
+import secrets
+import shutil
+import signal
+import sys
+from pathlib import Path
+
+from config import get_settings
+from sandbox.harness import BOOTSTRAP, parse_case
+
+try:
+    import resource
+except ImportError:  # Windows — no rlimits, tests are skipped
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+_MAX_RESULT_BYTES = 64 * 1024
+_MAX_ERROR_CHARS = 300
+
+_HARNESS_SOURCE = Path(__file__).with_name("harness.py").read_text(encoding="utf-8")
+
+_command: tuple[list[str], dict] | None = None   # (argv, subprocess options)
+_slots: asyncio.Semaphore | None = None
+_children: set[asyncio.subprocess.Process] = set()
+_started = False
+
+
+def available() -> bool:
+    return resource is not None and os.name == "posix"
+
+
+def _bwrap_args(python: str) -> list[str]:
+    args = [
+        "--unshare-all", "--die-with-parent", "--new-session", "--clearenv",
+        "--proc", "/proc", "--dev", "/dev", "--tmpfs", "/tmp", "--chdir", "/",
+    ]
+    prefix = os.path.dirname(os.path.dirname(python))  # /usr for /usr/bin/python3.11
+    for path in dict.fromkeys(("/usr", "/lib", "/lib64", "/bin", prefix)):
+        args += ["--ro-bind-try", path, path]
+    return args
+
+
+def _isolation() -> tuple[list[str], dict] | None:
+    """argv and subprocess options for the configured isolation, or None if it can't be had here."""
+    settings = get_settings()
+    executable = os.path.realpath(settings.sandbox_python or sys.executable)
+    python = [executable, "-I", "-S", "-c", BOOTSTRAP]
+    options: dict = {"env": {}, "cwd": "/", "start_new_session": True}
+    if os.geteuid() == 0:
+        options.update(user=settings.sandbox_uid, group=settings.sandbox_gid, extra_groups=[])
+
+    mode = settings.sandbox_isolation
+    if mode == "bwrap":
+        bwrap = shutil.which(settings.sandbox_bwrap_path)
+        if bwrap is None:
+            logger.warning(f"Test sandbox needs bubblewrap ({settings.sandbox_bwrap_path}) — submissions will not be executed")
+            return None
+        return [bwrap, *_bwrap_args(executable), *python], options
+    if mode == "uid":
+        if os.geteuid() != 0:
+            logger.warning("Test sandbox isolation 'uid' needs the API to run as root — submissions will not be executed")
+            return None
+        return python, options
+    if mode == "none":
+        logger.warning("Test sandbox isolation is off — submissions can read the API's files and network. Local development only.")
+        return python, options
+    logger.warning(f"Unknown sandbox_isolation '{mode}' — submissions will not be executed")
+    return None
+
+
+def start_sandbox() -> None:
+    """Resolve the isolation command once. Called from the app lifespan."""
+    global _command, _slots, _started
+    settings = get_settings()
+    if _started or not settings.sandbox_enabled:
+        return
+    _started = True
+    if not available():
+        logger.warning("Test sandbox needs a POSIX system with rlimits — submissions will not be executed on this platform")
+        return
+    _command = _isolation()
+    _slots = asyncio.Semaphore(max(1, settings.sandbox_workers))
+
+
+async def stop_sandbox() -> None:
+    global _command, _slots, _started
+    for child in list(_children):
+        if child.returncode is None:
+            _kill(child)
+    await asyncio.gather(*(child.wait() for child in list(_children)), return_exceptions=True)
+    _children.clear()
+    _command, _slots, _started = None, None, False
+
+
+async def _read_capped(stream: asyncio.StreamReader) -> bytes:
+    """Read to EOF, keeping at most _MAX_RESULT_BYTES + 1 (draining the rest so the child can't block)."""
+    data = b""
+    while chunk := await stream.read(65536):
+        if len(data) <= _MAX_RESULT_BYTES:
+            data += chunk
+    return data[:_MAX_RESULT_BYTES + 1]
+
+
+def _kill(child: asyncio.subprocess.Process) -> None:
+    """SIGKILL the child and the submission process it started (its own session/process group)."""
+    try:
+        os.killpg(child.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+
+async def _execute(code: str, example: dict, limits: dict) -> dict | None:
+    """Run one example in a fresh, isolated child and collect its result (None if no child could start)."""
+    argv, options = _command
+    nonce = secrets.token_hex(16)
+    request = json.dumps({
+        "harness": _HARNESS_SOURCE, "entry": "main", "nonce": nonce,
+        "code": code, "example": example, "limits": limits,
+    })
+    async with _slots:
+        try:
+            child = await asyncio.create_subprocess_exec(
+                *argv,
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                **options,
+            )
+        except OSError as e:
+            logger.warning(f"Test sandbox could not start {argv[0]}: {e}")
+            return None
+        _children.add(child)
+        try:
+            async def communicate() -> tuple[bytes, bytes]:
+                try:
+                    child.stdin.write(request.encode("utf-8"))
+                    await child.stdin.drain()
+                    child.stdin.close()
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # exited before reading the request — stderr says why
+                out, err = await asyncio.gather(_read_capped(child.stdout), _read_capped(child.stderr))
+                await child.wait()
+                return out, err
+
+            out, err = await asyncio.wait_for(communicate(), timeout=limits["wall_seconds"])
+        except asyncio.TimeoutError:
+            return {"status": "timeout", "error": f"Wall-clock limit of {limits['wall_seconds']}s exceeded"}
+        finally:
+            if child.returncode is None:
+                _kill(child)
+                await child.wait()
+            _children.discard(child)
+
+    if child.returncode < 0:
+        sig = -child.returncode
+        if sig == signal.SIGXCPU:
+            return {"status": "timeout", "error": f"CPU limit of {limits['cpu_seconds']}s exceeded"}
+        return {"status": "crashed", "error": f"Killed by {signal.Signals(sig).name} (memory limit is {limits['memory_mb']} MB)"}
+    try:
+        result = json.loads(out)
+    except ValueError:
+        if err:
+            # Usually the isolation layer failing to start, not the submission
+            logger.warning(f"Test sandbox child exited with {child.returncode}: {err.decode('utf-8', 'replace')[:_MAX_ERROR_CHARS]}")
+        return {"status": "crashed", "error": "Submission exited before reporting a result"}
+    if not isinstance(result, dict) or not secrets.compare_digest(str(result.pop("nonce", "")), nonce):
+        logger.warning("Test sandbox result without the run's nonce — discarded")
+        return {"status": "crashed", "error": "Malformed result"}
+    return result
+
+
+def syntax_error(code: str) -> str | None:
+    """The submission's syntax error as a one-line message, or None if it compiles."""
+    try:
+        compile(code, "<submission>", "exec")
+    except SyntaxError as e:
+        return f"{type(e).__name__}: {e.msg} (line {e.lineno})"
+    except (ValueError, RecursionError, MemoryError) as e:
+        return f"{type(e).__name__}: {e}"[:_MAX_ERROR_CHARS]
+    return None
+
+
+def _cases(problem: dict) -> list[tuple[str, bool, dict, dict]]:
+    """(name, hidden, example, parsed case) for every runnable example and hidden test."""
+    cases = []
+    for hidden, key in ((False, "examples"), (True, "hidden_tests")):
+        for i, example in enumerate(problem.get(key) or [], 1):
+            case = parse_case(example)
+            if case is not None:
+                cases.append((f"{'hidden' if hidden else 'example'} {i}", hidden, example, case))
+    return cases
+
+
+_RESULT_FIELDS = ("status", "function", "order_only", "time_ms", "error")
+
+
+def _summary(name: str, hidden: bool, case: dict, result: dict) -> dict:
+    # Only fields we know; the child's output is as untrusted as the code it ran
+    entry = {"name": name, "hidden": hidden, "status": "crashed"}
+    entry.update({k: result[k] for k in _RESULT_FIELDS if k in result})
+    if isinstance(entry.get("error"), str):
+        entry["error"] = entry["error"][:_MAX_ERROR_CHARS]
+    if not hidden:
+        entry["input"] = ", ".join(f"{k} = {v!r}" for k, v in case["args"])
+        entry["expected"] = repr(case["expected"])
+        # The submission's output is only shown where it explains a visible wrong answer
+        if entry["status"] == "wrong_answer" and isinstance(result.get("actual"), str):
+            entry["actual"] = result["actual"][:_MAX_ERROR_CHARS + 1]
+    return entry
+
+
+async def run_tests(problem: dict, code: str, language: str) -> dict | None:
+    """
+    Run the submission against the problem's tests.
+
+    Returns None when nothing could be checked (not Python, sandbox off or
+    unavailable, problem opted out). Otherwise:
+        {"status": "ran" | "syntax_error" | "no_tests", "passed": 2, "total": 3,
+         "cases": [{"name", "hidden", "status", "time_ms", ...}], "error": "..."}
+    """
+    settings = get_settings()
+    if language.lower() != "python" or not settings.sandbox_enabled or not available():
+        return None
+    if problem.get("sandbox") is False:
+        return None
+
+    error = syntax_error(code)
+    if error:
+        return {"status": "syntax_error", "passed": 0, "total": 0, "cases": [], "error": error}
+
+    cases = _cases(problem)
+    if not cases:
+        return {"status": "no_tests", "passed": 0, "total": 0, "cases": []}
+
+    start_sandbox()
+    if _command is None:
+        return None
+    limits = {
+        "cpu_seconds": settings.sandbox_cpu_seconds,
+        "memory_mb": settings.sandbox_memory_mb,
+        "wall_seconds": settings.sandbox_wall_seconds,
+    }
+    results = await asyncio.gather(*(_execute(code, example, limits) for _, _, example, _ in cases))
+    if any(result is None for result in results):
+        return None
+
+    entries = [_summary(name, hidden, case, result) for (name, hidden, _, case), result in zip(cases, results)]
+    return {
+        "status": "ran",
+        "passed": sum(1 for e in entries if e["status"] == "passed"),
+        "total": len(entries),
+        "cases": entries,
+    }
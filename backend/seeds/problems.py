@@ -1,6 +1,9 @@
 """
 50 DSA Problems seed — linked to concept IDs from concepts.py
 Each problem has: id, title, description, examples, constraints, difficulty (1-5), concept_ids
+Optional: hidden_tests (examples-shaped, never shown to students) and
+"sandbox": False for problems whose examples can't be run as plain data
+(linked lists, trees, graphs) — see sandbox/runner.py
 """
 
 PROBLEMS = [
@@ -217,7 +220,7 @@ PROBLEMS = [
 
     # ── Linked Lists (c06) ───────────────────────────────────────────────────
     {
-        "id": "p021", "difficulty": 2, "concept_ids": ["c06"],
+        "id": "p021", "difficulty": 2, "concept_ids": ["c06"], "sandbox": False,
         "title": "Reverse Linked List",
         "description": "Given the head of a singly linked list, reverse the list and return the reversed list.",
         "examples": [
@@ -227,7 +230,7 @@ PROBLEMS = [
         "constraints": ["The number of nodes is in range [0, 5000]."],
     },
     {
-        "id": "p022", "difficulty": 2, "concept_ids": ["c06", "c18"],
+        "id": "p022", "difficulty": 2, "concept_ids": ["c06", "c18"], "sandbox": False,
         "title": "Linked List Cycle",
         "description": "Given the head of a linked list, determine if the linked list has a cycle. Use Floyd's slow/fast pointer technique.",
         "examples": [
@@ -237,7 +240,7 @@ PROBLEMS = [
         "constraints": ["Number of nodes 0 to 10^4"],
     },
     {
-        "id": "p023", "difficulty": 3, "concept_ids": ["c06"],
+        "id": "p023", "difficulty": 3, "concept_ids": ["c06"], "sandbox": False,
         "title": "Merge Two Sorted Lists",
         "description": "You are given the heads of two sorted linked lists. Merge the two lists into one sorted list and return the head.",
         "examples": [
@@ -248,7 +251,7 @@ PROBLEMS = [
 
     # ── Binary Trees (c11) ───────────────────────────────────────────────────
     {
-        "id": "p024", "difficulty": 2, "concept_ids": ["c11", "c10"],
+        "id": "p024", "difficulty": 2, "concept_ids": ["c11", "c10"], "sandbox": False,
         "title": "Maximum Depth of Binary Tree",
         "description": "Given the root of a binary tree, return its maximum depth (number of nodes along the longest path from root to leaf).",
         "examples": [
@@ -257,7 +260,7 @@ PROBLEMS = [
         "constraints": ["0 <= number of nodes <= 10^4"],
     },
     {
-        "id": "p025", "difficulty": 2, "concept_ids": ["c11", "c10"],
+        "id": "p025", "difficulty": 2, "concept_ids": ["c11", "c10"], "sandbox": False,
         "title": "Invert Binary Tree",
         "description": "Given the root of a binary tree, invert the tree (mirror image) and return its root.",
         "examples": [
@@ -266,7 +269,7 @@ PROBLEMS = [
         "constraints": ["0 <= number of nodes <= 100"],
     },
     {
-        "id": "p026", "difficulty": 3, "concept_ids": ["c11", "c08"],
+        "id": "p026", "difficulty": 3, "concept_ids": ["c11", "c08"], "sandbox": False,
         "title": "Binary Tree Level Order Traversal",
         "description": "Given the root of a binary tree, return the level order traversal of its nodes' values (left to right, level by level).",
         "examples": [
@@ -275,7 +278,7 @@ PROBLEMS = [
         "constraints": ["0 <= number of nodes <= 2000"],
     },
     {
-        "id": "p027", "difficulty": 3, "concept_ids": ["c11"],
+        "id": "p027", "difficulty": 3, "concept_ids": ["c11"], "sandbox": False,
         "title": "Diameter of Binary Tree",
         "description": "Given the root of a binary tree, return the length of the diameter (the longest path between any two nodes, which may or may not pass through the root).",
         "examples": [
@@ -286,7 +289,7 @@ PROBLEMS = [
 
     # ── BST (c12) ────────────────────────────────────────────────────────────
     {
-        "id": "p028", "difficulty": 2, "concept_ids": ["c12"],
+        "id": "p028", "difficulty": 2, "concept_ids": ["c12"], "sandbox": False,
         "title": "Validate Binary Search Tree",
         "description": "Given the root of a binary tree, determine if it is a valid BST (left subtree values < node, right subtree values > node, recursively).",
         "examples": [
@@ -327,7 +330,7 @@ PROBLEMS = [
         "constraints": ["1 <= m, n <= 300"],
     },
     {
-        "id": "p032", "difficulty": 3, "concept_ids": ["c14", "c25"],
+        "id": "p032", "difficulty": 3, "concept_ids": ["c14", "c25"], "sandbox": False,
         "title": "Clone Graph",
         "description": "Given a reference of a node in a connected undirected graph, return a deep copy (clone) of the graph.",
         "examples": [
@@ -0,0 +1,102 @@
+"""
+Sandbox harness — a submission must not be able to forge its test results
+
+Runs the judge the way sandbox/runner.py does (a fresh `python -I -S` fed
+the request on stdin), without the API settings or any isolation layer.
+
+    cd backend
+    python -m pytest tests
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sandbox import harness
+
+pytestmark = pytest.mark.skipif(os.name != "posix", reason="the sandbox needs POSIX rlimits")
+
+HARNESS_SOURCE = open(harness.__file__, encoding="utf-8").read()
+EXAMPLE = {"input": "nums = [2,7,11,15], target = 9", "output": "[0,1]"}
+LIMITS = {"cpu_seconds": 2, "memory_mb": 256, "wall_seconds": 10}
+NONCE = "0123456789abcdef"
+
+
+def judge(code: str) -> dict:
+    request = {
+        "harness": HARNESS_SOURCE, "entry": "main", "nonce": NONCE,
+        "code": code, "example": EXAMPLE, "limits": LIMITS,
+    }
+    done = subprocess.run(
+        [sys.executable, "-I", "-S", "-c", harness.BOOTSTRAP],
+        input=json.dumps(request).encode("utf-8"), capture_output=True, timeout=LIMITS["wall_seconds"], env={},
+    )
+    return json.loads(done.stdout)
+
+
+def test_correct_submission_passes():
+    code = (
+        "def two_sum(nums, target):\n"
+        "    seen = {}\n"
+        "    for i, x in enumerate(nums):\n"
+        "        if target - x in seen:\n"
+        "            return [seen[target - x], i]\n"
+        "        seen[x] = i\n"
+    )
+    result = judge(code)
+    assert result["nonce"] == NONCE
+    assert result["status"] == "passed"
+
+
+def test_wrong_submission_fails():
+    result = judge("def two_sum(nums, target):\n    return [1, 2]\n")
+    assert result["status"] == "wrong_answer"
+    assert result["actual"] == "[1, 2]"
+
+
+@pytest.mark.parametrize("forged", [
+    {"status": "passed"},
+    {"nonce": NONCE, "status": "passed"},
+])
+def test_result_written_by_submission_is_not_trusted(forged):
+    # No entry point: writes a result line to every fd it might own, then exits
+    code = (
+        "import json, os\n"
+        f"line = json.dumps({forged!r}).encode()\n"
+        "for fd in range(0, 10):\n"
+        "    try:\n"
+        "        os.write(fd, line)\n"
+        "    except OSError:\n"
+        "        pass\n"
+        "os._exit(0)\n"
+    )
+    result = judge(code)
+    assert result["nonce"] == NONCE
+    assert result["status"] != "passed"
+
+
+def test_submission_never_sees_the_expected_value():
+    code = (
+        "import sys\n"
+        "def two_sum(nums, target):\n"
+        "    names = set()\n"
+        "    frame = sys._getframe()\n"
+        "    while frame:\n"
+        "        names |= set(frame.f_locals) | set(frame.f_globals)\n"
+        "        frame = frame.f_back\n"
+        "    return sorted(n for n in names if n in ('expected', 'nonce', 'output'))\n"
+    )
+    result = judge(code)
+    assert result["status"] == "wrong_answer"
+    assert result["actual"] == "[]"
+
+
+def test_judge_only_passes_a_returned_value():
+    assert harness.judge({"status": "passed"}, [0, 1])["status"] == "crashed"
+    assert harness.judge({"status": "returned", "actual": "[1, 0]"}, [0, 1])["order_only"] is True
+    assert harness.judge({"status": "returned", "actual": "object()"}, [0, 1])["status"] == "wrong_answer"
@@ -1,5 +1,11 @@
 """
 Tutor router — /tutor/ask and /tutor/hint
+
+Both endpoints also have `/stream` variants that push tokens to the client
+as Server-Sent Events:
+    event: token  data: {"text": "..."}
+    event: done   data: {...}
+    event: error  data: {"detail": "..."}
 """
 
 from fastapi import APIRouter, Depends, HTTPException
@@ -7,9 +13,12 @@ from pydantic import BaseModel
 from typing import Optional
 
 from auth.utils import get_current_user
-from db.mongo import get_db
-from profile.service import get_profile, update_profile
-from agents.tutor import run_tutor, run_hint
+from config import get_settings
+from profile.service import update_profile
+from review.service import load_problem_and_profile
+from agents.tutor import run_tutor, run_hint, run_tutor_stream, run_hint_stream
+from llm.deadline import deadline, http_status_for
+from sse import sse_event, sse_response
 
 router = APIRouter(prefix="/tutor", tags=["tutor"])
 
@@ -30,57 +39,112 @@ class HintRequest(BaseModel):
     current_code: Optional[str] = None     # student's current code snapshot
 
 
-@router.post("/ask")
-async def ask_tutor(payload: AskRequest, user: dict = Depends(get_current_user)):
-    db = get_db()
-    problem = await db.problems.find_one({"id": payload.problem_id}, {"_id": 0})
-    if not problem:
-        raise HTTPException(status_code=404, detail="Problem not found")
-
-    profile = await get_profile(user["sub"])
-    if not profile:
-        raise HTTPException(status_code=404, detail="Profile not found")
-
-    history = (
+def _history(payload: AskRequest) -> list[dict] | None:
+    return (
         [{"role": m.role, "content": m.content} for m in payload.conversation_history]
         if payload.conversation_history
         else None
     )
 
-    response = await run_tutor(
-        user_question=payload.question,
-        problem=problem,
-        profile=profile,
-        conversation_history=history,
-    )
-    return {"response": response}
-
-
-@router.post("/hint")
-async def get_hint(payload: HintRequest, user: dict = Depends(get_current_user)):
-    db = get_db()
-    problem = await db.problems.find_one({"id": payload.problem_id}, {"_id": 0})
-    if not problem:
-        raise HTTPException(status_code=404, detail="Problem not found")
-
-    profile = await get_profile(user["sub"])
-    if not profile:
-        raise HTTPException(status_code=404, detail="Profile not found")
 
+def _previous_hints(profile: dict) -> list[str]:
     previous_hints = profile.get("recent_hints", [])
     if isinstance(previous_hints, str):
         # Older schema stored a single string — normalise
         previous_hints = [previous_hints] if previous_hints else []
+    return previous_hints
 
-    hint = await run_hint(
-        problem=problem,
-        profile=profile,
-        previous_hints=previous_hints,
-        current_code=payload.current_code,
-    )
 
-    # Append new hint to profile's recent_hints (cap at 20)
-    updated_hints = previous_hints + [hint]
-    await update_profile(user["sub"], {"recent_hints": updated_hints[-20:]})
+async def _save_hint(user_id: str, hint: str) -> None:
+    # Append new hint to profile's recent_hints server-side (capped at 20)
+    await update_profile(user_id, {"recent_hints": hint})
+
+
+@router.post("/ask")
+async def ask_tutor(payload: AskRequest, user: dict = Depends(get_current_user)):
+    problem, profile = await load_problem_and_profile(payload.problem_id, user["sub"])
+
+    try:
+        with deadline(get_settings().deadline_tutor_seconds):
+            response = await run_tutor(
+                user_question=payload.question,
+                problem=problem,
+                profile=profile,
+                conversation_history=_history(payload),
+            )
+    except Exception as e:
+        raise HTTPException(status_code=http_status_for(e), detail=f"Tutor agent failed: {e}")
+    return {"response": response}
+
+
+@router.post("/ask/stream")
+async def ask_tutor_stream(payload: AskRequest, user: dict = Depends(get_current_user)):
+    problem, profile = await load_problem_and_profile(payload.problem_id, user["sub"])
+    history = _history(payload)
+
+    async def events():
+        parts: list[str] = []
+        try:
+            async for token in run_tutor_stream(
+                user_question=payload.question,
+                problem=problem,
+                profile=profile,
+                conversation_history=history,
+            ):
+                parts.append(token)
+                yield sse_event("token", {"text": token})
+        except Exception as e:
+            yield sse_event("error", {"detail": f"Tutor agent failed: {e}"})
+            return
+        yield sse_event("done", {"response": "".join(parts)})
+
+    return sse_response(events())
+
+
+@router.post("/hint")
+async def get_hint(payload: HintRequest, user: dict = Depends(get_current_user)):
+    problem, profile = await load_problem_and_profile(payload.problem_id, user["sub"])
+    previous_hints = _previous_hints(profile)
+
+    try:
+        with deadline(get_settings().deadline_hint_seconds):
+            hint = await run_hint(
+                problem=problem,
+                profile=profile,
+                previous_hints=previous_hints,
+                current_code=payload.current_code,
+            )
+    except Exception as e:
+        raise HTTPException(status_code=http_status_for(e), detail=f"Hint agent failed: {e}")
+
+    await _save_hint(user["sub"], hint)
 
     return {"hint": hint}
+
+
+@router.post("/hint/stream")
+async def get_hint_stream(payload: HintRequest, user: dict = Depends(get_current_user)):
+    problem, profile = await load_problem_and_profile(payload.problem_id, user["sub"])
+    previous_hints = _previous_hints(profile)
+
+    async def events():
+        parts: list[str] = []
+        try:
+            async for token in run_hint_stream(
+                problem=problem,
+                profile=profile,
+                previous_hints=previous_hints,
+                current_code=payload.current_code,
+            ):
+                parts.append(token)
+                yield sse_event("token", {"text": token})
+        except Exception as e:
+            yield sse_event("error", {"detail": f"Hint agent failed: {e}"})
+            return
+
+        hint = "".join(parts)
+        # Persist only once the full hint has been delivered
+        await _save_hint(user["sub"], hint)
+        yield sse_event("done", {"hint": hint})
+
+    return sse_response(events())
@@ -65,7 +65,7 @@ export const problemsAPI = {
 export const reviewAPI = {
   submit: (data: { problem_id: string; code: string; language: string }) =>
     api.post('/review/submit', data),
-  history: (limit = 10) => api.get('/review/history', { params: { limit } }),
+  history: (limit = 10, cursor?: string) => api.get('/review/history', { params: { limit, cursor } }),
 };
 
 // Tutor API
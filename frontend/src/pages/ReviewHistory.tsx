@@ -290,15 +290,16 @@ function StatsBar({ reviews }: { reviews: any[] }) {
 export default function ReviewHistory() {
     const [reviews, setReviews] = useState<any[]>([]);
     const [loading, setLoading] = useState(true);
-    const [limit, setLimit] = useState(20);
+    const [cursor, setCursor] = useState<string | null>(null);
     const [loadingMore, setLoadingMore] = useState(false);
 
-    useEffect(() => { loadHistory(20); }, []);
+    useEffect(() => { loadHistory(); }, []);
 
-    const loadHistory = async (n: number) => {
+    const loadHistory = async (after?: string) => {
         try {
-            const { data } = await reviewAPI.history(n);
-            setReviews(data.reviews ?? []);
+            const { data } = await reviewAPI.history(20, after);
+            setReviews(prev => after ? [...prev, ...(data.reviews ?? [])] : (data.reviews ?? []));
+            setCursor(data.next_cursor ?? null);
         } catch {
             toast.error('Failed to load review history');
         } finally {
@@ -308,10 +309,9 @@ export default function ReviewHistory() {
     };
 
     const handleLoadMore = async () => {
-        const next = limit + 20;
-        setLimit(next);
+        if (!cursor) return;
         setLoadingMore(true);
-        await loadHistory(next);
+        await loadHistory(cursor);
     };
 
     // ── Loading ────────────────────────────────────────────────────────────────
@@ -379,7 +379,7 @@ export default function ReviewHistory() {
                                 </div>
 
                                 {/* Load more */}
-                                {reviews.length === limit && (
+                                {cursor && (
                                     <div className="pt-4 pb-2 text-center">
                                         <button
                                             onClick={handleLoadMore}